@@ -3,14 +3,43 @@ ASGI config for app project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Requests are routed through ``app.asgi_urls``, which serves the game and
+arithmetical endpoints with their async views. The streamed endpoints
+are routed ahead of Django to bare ASGI apps (see core.async_utils):
+the server-sent events of the games (``game.events``), the game export
+(``game.streams``) and the streamed user directory (``user.streams``).
+
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 """
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
-application = get_asgi_application()
+
+class AsyncURLConfASGIHandler(ASGIHandler):
+    """ASGI handler resolving requests with the async URL configuration."""
+    urlconf = 'app.asgi_urls'
+
+    def create_request(self, scope, body_file):
+        request, error_response = super().create_request(scope, body_file)
+        if request is not None:
+            request.urlconf = self.urlconf
+        return request, error_response
+
+
+django.setup(set_prefix=False)
+
+from core.async_utils import StreamRouter  # noqa: E402
+from game import events  # noqa: E402
+from game import streams as game_streams  # noqa: E402
+from user import streams as user_streams  # noqa: E402
+
+application = StreamRouter(
+    [events.route, game_streams.route, user_streams.route],
+    AsyncURLConfASGIHandler(),
+)
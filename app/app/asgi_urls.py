@@ -0,0 +1,25 @@
+"""app URL Configuration for the ASGI deployment
+
+Same routes as app.urls, with the game and arithmetical endpoints served
+by their async views.
+"""
+from drf_spectacular.views import (
+    SpectacularAPIView,
+    SpectacularSwaggerView,
+)
+
+from django.contrib import admin
+from django.urls import path, include
+
+urlpatterns = [
+    path('admin/', admin.site.urls),
+    path('api/schema/', SpectacularAPIView.as_view(), name='api-schema'),
+    path(
+        'api/docs/',
+        SpectacularSwaggerView.as_view(url_name='api-schema'),
+        name='api-docs',
+    ),
+    path('api/user/', include('user.urls')),
+    path('api/airth/', include('arithmetical.async_urls')),
+    path('api/game/', include('game.async_urls')),
+]
@@ -47,6 +47,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.query_budget.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -136,6 +137,47 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'core.User'
 
+# Threads running the database work of the async views (see app/asgi.py)
+
+ASYNC_DB_THREADS = 8
+
+# Seconds a worker serves its catalog snapshot before checking the version
+# stored in the database (see core/catalog.py)
+
+CATALOG_VERSION_TTL = 2
+
+# Catalog responses at least this large are also kept gzipped (None to
+# never gzip them)
+
+CATALOG_GZIP_MIN_SIZE = 1024
+
+# Cache of the users authenticated by token (see core/authentication.py):
+# seconds an entry is kept, entries kept per worker without a shared
+# cache, and the Django cache shared by the workers (None to keep entries
+# in the workers only, where revocations reach other workers on expiry)
+
+TOKEN_AUTH_CACHE_TTL = 60
+TOKEN_AUTH_CACHE_SIZE = 10000
+TOKEN_AUTH_CACHE_ALIAS = None
+
+# Events of the games streamed to their viewers (see core/events.py):
+# the broker fanning them out, the events kept per viewer falling behind,
+# and the seconds between keepalives of idle streams
+
+GAME_EVENTS_BROKER = 'core.events.LocalBroker'
+GAME_EVENTS_QUEUE_SIZE = 100
+GAME_EVENTS_KEEPALIVE = 15
+
+# Possible numbers listed in the game details: the smallest ones, at most
+# this many
+
+GAME_POSSIBLE_NUMBERS_LIMIT = 100
+
+# Report the queries of each request in X-DB-* headers and logs (see
+# core/query_budget.py)
+
+QUERY_BUDGET_ENABLED = os.environ.get('QUERY_BUDGET_ENABLED') == '1'
+
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
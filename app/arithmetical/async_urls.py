@@ -0,0 +1,23 @@
+"""
+URL mappings for arith API served through app/asgi.py.
+"""
+from django.urls import path
+
+from arithmetical import async_views
+
+app_name = 'arith'
+
+urlpatterns = [
+    path(
+        'ariths/',
+        async_views.get_all_arithmetical_concepts,
+        name='ariths',
+    ),
+    path(
+        'ariths/<int:id>/',
+        async_views.get_arithmetical_concept_detail,
+        name='ariths',
+    ),
+    path('numbers/', async_views.get_all_numbers, name='numbers'),
+    path('numbers/<int:id>/', async_views.get_number_detail, name='numbers'),
+]
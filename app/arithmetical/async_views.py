@@ -0,0 +1,52 @@
+"""
+Async views for the ariths API, served through app/asgi.py.
+"""
+from rest_framework import status
+
+from core.async_utils import (
+    run_db,
+    json_response,
+    method_not_allowed,
+)
+
+from arithmetical.views import (
+    all_ariths_data,
+    all_numbers_data,
+    arith_detail_data,
+    number_detail_data,
+    catalog_response,
+)
+
+
+async def get_all_arithmetical_concepts(request):
+    "Get list of all arithmetical concepts in the game."
+    if request.method != 'GET':
+        return method_not_allowed(request, ['GET'])
+    return await run_db(catalog_response, request, all_ariths_data)
+
+
+async def get_all_numbers(request):
+    "Get list of all numbers in the game."
+    if request.method != 'GET':
+        return method_not_allowed(request, ['GET'])
+    return await run_db(catalog_response, request, all_numbers_data)
+
+
+async def get_arithmetical_concept_detail(request, id):
+    if request.method != 'GET':
+        return method_not_allowed(request, ['GET'])
+    response = await run_db(catalog_response, request, arith_detail_data, id)
+    if response is None:
+        return json_response({}, status.HTTP_404_NOT_FOUND)
+    return response
+
+
+async def get_number_detail(request, id):
+    if request.method != 'GET':
+        return method_not_allowed(request, ['GET'])
+    response = await run_db(
+        catalog_response, request, number_detail_data, id,
+    )
+    if response is None:
+        return json_response({}, status.HTTP_404_NOT_FOUND)
+    return response
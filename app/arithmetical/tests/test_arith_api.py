@@ -1,7 +1,14 @@
 """
 Tests for the arithmetical concept API.
 """
-from django.test import TestCase
+import gzip
+import json
+
+from django.test import (
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
 from django.urls import reverse
 from django.core.management import call_command
 
@@ -9,6 +16,7 @@ from rest_framework.test import APIClient
 from rest_framework import status
 from core.models import (
     ArithmeticalConceptModel,
+    CatalogVersionModel,
     NumberModel,
 )
 
@@ -32,6 +40,10 @@ class PublicUserApiTests(TestCase):
     def setUp(self):
         call_command('create_default_arithmetical_concept')
         self.client = APIClient()
+        self.number = NumberModel.objects.get(value=7)
+        self.arith = ArithmeticalConceptModel.objects.get(
+            name='Even Numbers',
+        )
 
     def test_list_all_ariths_sucessful(self):
         "Test list all arithmetical concepts sucessful."
@@ -39,7 +51,7 @@ class PublicUserApiTests(TestCase):
         res = self.client.get(ARITHS_URL)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         number_of_ariths_in_db = ArithmeticalConceptModel.objects.all().count()
-        self.assertEqual(len(res.data), number_of_ariths_in_db)
+        self.assertEqual(len(res.json()), number_of_ariths_in_db)
 
     def test_list_all_numbers_sucessful(self):
         "Test list all numbers sucessful."
@@ -47,7 +59,7 @@ class PublicUserApiTests(TestCase):
         res = self.client.get(NUMBERS_URL)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         number_of_numbers_in_db = NumberModel.objects.all().count()
-        self.assertEqual(len(res.data), number_of_numbers_in_db)
+        self.assertEqual(len(res.json()), number_of_numbers_in_db)
 
     def test_post_list_all_ariths_not_allowed(self):
         "Test post all arithmetical concepts not allowed."
@@ -67,7 +79,7 @@ class PublicUserApiTests(TestCase):
         arith_id = arith.id
         res = self.client.get(get_arith_url(arith_id))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data['name'], arith.name)
+        self.assertEqual(res.json()['name'], arith.name)
 
     def test_number_detail_sucessful(self):
         "Test get number detail sucessful."
@@ -76,8 +88,8 @@ class PublicUserApiTests(TestCase):
         number_id = number.id
         res = self.client.get(get_number_url(number_id))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data['name'], number.name)
-        self.assertIn('count', res.data)
+        self.assertEqual(res.json()['name'], number.name)
+        self.assertIn('count', res.json())
 
     def test_post_arith_detail_not_allowed(self):
         "Test post arithmetical concept detail not allowed."
@@ -90,3 +102,145 @@ class PublicUserApiTests(TestCase):
 
         res = self.client.post(get_number_url(3), {})
         self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_detail_not_found(self):
+        "Test get missing arithmetical concept or number not found."
+
+        res = self.client.get(get_arith_url(0))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        res = self.client.get(get_number_url(0))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_numbers_served_from_catalog(self):
+        "Test list all numbers does not query the database once loaded."
+
+        self.client.get(NUMBERS_URL)
+        with self.assertNumQueries(0):
+            res = self.client.get(NUMBERS_URL)
+        number = NumberModel.objects.get(value=res.json()[5]['value'])
+        self.assertEqual(
+            res.json()[5]['count'],
+            len(number.get_arithmetical_concepts()),
+        )
+
+    def test_list_revalidated_with_etag(self):
+        "Test list all ariths answers a matching If-None-Match with 304."
+
+        res = self.client.get(ARITHS_URL)
+        etag = res['ETag']
+        self.assertTrue(etag.startswith('"'))
+        res = self.client.get(ARITHS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+        self.assertEqual(res.content, b'')
+
+        res = self.client.get(ARITHS_URL, HTTP_IF_NONE_MATCH='"other"')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_etag_changes_with_catalog(self):
+        "Test the ETag and the body change when the catalog changes."
+
+        res = self.client.get(get_number_url(self.number.id))
+        etag = res['ETag']
+        arith = ArithmeticalConceptModel.objects.create(
+            name='Lucky Numbers',
+            description='Numbers bringing luck.',
+        )
+        arith.add_number(self.number)
+
+        res = self.client.get(
+            get_number_url(self.number.id),
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+        self.assertIn(
+            arith.name,
+            [arith['name'] for arith in res.json()['arithmetical_concepts']],
+        )
+
+    @override_settings(CATALOG_VERSION_TTL=0)
+    def test_etag_changes_with_catalog_of_another_process(self):
+        "Test the ETag and the body follow changes made by another process."
+
+        res = self.client.get(get_arith_url(self.arith.id))
+        etag = res['ETag']
+        # another process renames the concept and replaces the version,
+        # without signals in this one.
+        ArithmeticalConceptModel.objects.filter(id=self.arith.id).update(
+            name='Multiples of Two',
+        )
+        CatalogVersionModel.objects.update(version='other')
+
+        res = self.client.get(
+            get_arith_url(self.arith.id),
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+        self.assertEqual(res.json()['name'], 'Multiples of Two')
+
+    def test_list_gzip(self):
+        "Test list all numbers is served gzipped when accepted."
+
+        res = self.client.get(NUMBERS_URL, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(
+            json.loads(gzip.decompress(res.content)),
+            self.client.get(NUMBERS_URL).json(),
+        )
+        res = self.client.get(
+            NUMBERS_URL,
+            HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_IF_NONE_MATCH=res['ETag'],
+        )
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_gzip_qvalues(self):
+        "Test the q-values of Accept-Encoding are followed."
+        for header, encoded in [
+            ('gzip;q=0', False),
+            ('gzip; q=0.0, identity', False),
+            ('*;q=0', False),
+            ('br, *', True),
+            ('gzip;q=0, *', False),
+            ('deflate, gzip;q=0.5', True),
+            ('GZIP', True),
+            ('identity', False),
+        ]:
+            res = self.client.get(NUMBERS_URL, HTTP_ACCEPT_ENCODING=header)
+            self.assertEqual(res.has_header('Content-Encoding'), encoded,
+                             header)
+
+
+@override_settings(ROOT_URLCONF='app.asgi_urls')
+class AsyncArithApiTests(TransactionTestCase):
+    """Test the async arithmetical views served through ASGI."""
+
+    def setUp(self):
+        call_command('create_default_arithmetical_concept')
+        self.arith = ArithmeticalConceptModel.objects.order_by('id')[2]
+        self.number = NumberModel.objects.get(value=12)
+
+    async def test_list_all(self):
+        "Test list all arithmetical concepts and numbers."
+        res = await self.async_client.get(ARITHS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn(self.arith.id, [arith['id'] for arith in res.json()])
+
+        res = await self.async_client.get(NUMBERS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn(12, [number['value'] for number in res.json()])
+
+    async def test_details(self):
+        "Test get arithmetical concept and number details."
+        res = await self.async_client.get(get_arith_url(self.arith.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()['name'], self.arith.name)
+
+        res = await self.async_client.get(get_number_url(self.number.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()['name'], self.number.name)
+
+        res = await self.async_client.get(get_number_url(0))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
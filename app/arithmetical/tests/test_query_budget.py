@@ -0,0 +1,46 @@
+"""
+Query budgets of the arithmetical API endpoints.
+"""
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import ArithmeticalConceptModel, NumberModel
+from core.query_budget import QueryBudgetTestMixin
+
+
+class ArithmeticalQueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """Test the arithmetical endpoints stay within their query budget.
+
+    The first request reads the catalog version and loads the catalog,
+    later requests are served from memory.
+    """
+
+    def setUp(self):
+        call_command('create_default_arithmetical_concept')
+        self.client = APIClient()
+        self.arith = ArithmeticalConceptModel.objects.first()
+        self.number = NumberModel.objects.first()
+
+    def assertBudget(self, url, cold):
+        with self.assertMaxQueries(cold):
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        with self.assertMaxQueries(0):
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list_ariths(self):
+        self.assertBudget(reverse('arith:ariths'), 4)
+
+    def test_arith_detail(self):
+        self.assertBudget(reverse('arith:ariths', args=[self.arith.id]), 4)
+
+    def test_list_numbers(self):
+        self.assertBudget(reverse('arith:numbers'), 4)
+
+    def test_number_detail(self):
+        self.assertBudget(reverse('arith:numbers', args=[self.number.id]), 4)
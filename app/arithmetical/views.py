@@ -5,56 +5,105 @@ from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
 
-from core.models import (
-    ArithmeticalConceptModel,
-    NumberModel,
+from core.catalog import get_catalog
+from core.http_cache import (
+    render_body,
+    rendered_response,
 )
 
 from arithmetical.serializers import (
-    ListArithmeticalConceptSerializer,
-    ListNumberSerializer,
-    DetailArithmeticalConceptSerializer,
-    DetailNumberSerializer,
+    arith_data,
+    number_data,
 )
 
 
+def all_ariths_data(catalog):
+    "Return the list of all arithmetical concepts."
+    return [arith_data(catalog.concepts[id]) for id in catalog.concept_ids]
+
+
+def all_numbers_data(catalog):
+    "Return the list of all numbers."
+    return [
+        number_data(catalog, number) for number in catalog.numbers.values()
+    ]
+
+
+def arith_detail_data(catalog, id):
+    "Return the details of an arithmetical concept, or None."
+    arith = catalog.concepts.get(id)
+    if arith is None:
+        return None
+    return {
+        'name': arith.name,
+        'description': arith.description,
+        'count': arith.count,
+        'numbers': [
+            number_data(catalog, catalog.number(value))
+            for value in catalog.concept_values(id)
+        ],
+    }
+
+
+def number_detail_data(catalog, id):
+    "Return the details of a number, or None."
+    number = catalog.numbers.get(id)
+    if number is None:
+        return None
+    concept_ids = catalog.number_concept_ids(number.value)
+    return {
+        'name': number.name,
+        'value': number.value,
+        'count': len(concept_ids),
+        'arithmetical_concepts': [
+            arith_data(catalog.concepts[concept_id])
+            for concept_id in concept_ids
+        ],
+    }
+
+
+def catalog_response(request, data_func, *args):
+    """Return the response serving the data built from the catalog.
+
+    The data is rendered once per catalog snapshot and served with the
+    catalog digest as ETag. Returns None if the data is missing.
+    """
+    def render(catalog):
+        data = data_func(catalog, *args)
+        if data is None:
+            return None
+        return render_body(data)
+
+    catalog = get_catalog()
+    rendered = catalog.memoize((data_func.__name__, *args), render)
+    if rendered is None:
+        return None
+    return rendered_response(request, rendered, catalog.digest)
+
+
 @api_view(['GET'])
 def get_all_arithmetical_concepts(request):
     "Get list of all arithmetical concepts in the game."
-    ariths = ArithmeticalConceptModel.objects.all().order_by('id')
-    serializer = ListArithmeticalConceptSerializer(ariths, many=True)
-    return Response(serializer.data)
+    return catalog_response(request, all_ariths_data)
 
 
 @api_view(['GET'])
 def get_all_numbers(request):
     "Get list of all numbers in the game."
-    numbers = NumberModel.objects.all().order_by('value')
-    serializer = ListNumberSerializer(numbers, many=True)
-    return Response(serializer.data)
+    return catalog_response(request, all_numbers_data)
 
 
 @api_view(['GET'])
 def get_arithmetical_concept_detail(request, id):
-    model = ArithmeticalConceptModel
-    try:
-        arith = model.objects.get(
-            id=id,
-        )
-        serializer = DetailArithmeticalConceptSerializer(arith)
-        return Response(serializer.data)
-    except model.DoesNotExist:
+    response = catalog_response(request, arith_detail_data, id)
+    if response is None:
         return Response({}, status=status.HTTP_404_NOT_FOUND)
+    return response
 
 
 @api_view(['GET'])
 def get_number_detail(request, id):
-    model = NumberModel
-    try:
-        number = model.objects.get(
-            id=id,
-        )
-        serializer = DetailNumberSerializer(number)
-        return Response(serializer.data)
-    except model.DoesNotExist:
+    response = catalog_response(request, number_detail_data, id)
+    if response is None:
         return Response({}, status=status.HTTP_404_NOT_FOUND)
+    return response
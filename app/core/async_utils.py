@@ -0,0 +1,180 @@
+"""
+Helpers for the async views served through app/asgi.py.
+
+Django 3.2 has no async ORM, so async views run their database work in
+a bounded pool of threads. The size of the pool (ASYNC_DB_THREADS) caps
+the number of database connections held by an ASGI worker.
+
+Django 3.2 can not stream responses from async code either: it would
+iterate the body on the event loop. Streamed endpoints are served by
+bare ASGI apps routed ahead of Django (see StreamRouter), which fetch
+the body chunk by chunk in the thread pool (see send_stream).
+"""
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.http import HttpResponse
+
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.renderers import JSONRenderer
+
+from core.authentication import CachedTokenAuthentication
+from core.query_budget import install_context_recording
+
+
+_executor = None
+
+
+def get_executor():
+    """Return the thread pool running the database work."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.ASYNC_DB_THREADS,
+            thread_name_prefix='async-db',
+        )
+    return _executor
+
+
+def _call(func, args, kwargs):
+    close_old_connections()
+    if settings.QUERY_BUDGET_ENABLED:
+        install_context_recording(connection)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_db(func, *args, **kwargs):
+    """Run a function using the database in the thread pool, in a copy
+    of the current context (see core.query_budget)."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_executor(),
+        functools.partial(
+            contextvars.copy_context().run, _call, func, args, kwargs,
+        ),
+    )
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    """Return a response rendered like the API views render theirs."""
+    return HttpResponse(
+        JSONRenderer().render(data),
+        status=status_code,
+        content_type='application/json',
+    )
+
+
+def method_not_allowed(request, allowed):
+    """Return the response to a request with a method not allowed."""
+    response = json_response(
+        {'detail': f'Method "{request.method}" not allowed.'},
+        status.HTTP_405_METHOD_NOT_ALLOWED,
+    )
+    response['Allow'] = ', '.join(allowed)
+    return response
+
+
+def authenticate(request):
+    """Return the user authenticated by the request token, or None."""
+    try:
+        result = CachedTokenAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    if result is None:
+        return None
+    return result[0]
+
+
+def authenticate_header(authorization):
+    """Return the user authenticated by a token Authorization header, or
+    None."""
+    parts = authorization.split()
+    if len(parts) != 2 or parts[0].lower() != b'token':
+        return None
+    try:
+        user, _ = CachedTokenAuthentication().authenticate_credentials(
+            parts[1].decode(),
+        )
+    except (AuthenticationFailed, UnicodeDecodeError):
+        return None
+    return user
+
+
+def not_authenticated():
+    """Return the response to a request missing valid credentials."""
+    response = json_response(
+        {'detail': 'Authentication credentials were not provided.'},
+        status.HTTP_401_UNAUTHORIZED,
+    )
+    response['WWW-Authenticate'] = 'Token'
+    return response
+
+
+def scope_header(scope, name):
+    """Return the value of a request header of an ASGI scope, or b''."""
+    for key, value in scope['headers']:
+        if key == name:
+            return value
+    return b''
+
+
+async def send_json(send, data, status_code, headers=()):
+    """Send a JSON response from a bare ASGI app."""
+    await send({
+        'type': 'http.response.start',
+        'status': status_code,
+        'headers': [(b'content-type', b'application/json'), *headers],
+    })
+    await send({
+        'type': 'http.response.body',
+        'body': JSONRenderer().render(data),
+    })
+
+
+async def send_stream(send, fetch, state, content_type):
+    """Send a streamed response from a bare ASGI app.
+
+    fetch(state) runs in the thread pool and returns the bytes of a chunk
+    and the state of the next chunk, which is None after the last one.
+    """
+    await send({
+        'type': 'http.response.start',
+        'status': status.HTTP_200_OK,
+        'headers': [(b'content-type', content_type)],
+    })
+    while state is not None:
+        body, state = await run_db(fetch, state)
+        await send({
+            'type': 'http.response.body',
+            'body': body,
+            'more_body': state is not None,
+        })
+
+
+class StreamRouter:
+    """ASGI app serving the streamed endpoints, and the rest with another
+    app.
+
+    Each route takes the scope of a request, and returns the ASGI app
+    serving it, or None.
+    """
+
+    def __init__(self, routes, application):
+        self.routes = routes
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            for route in self.routes:
+                app = route(scope)
+                if app is not None:
+                    return await app(scope, receive, send)
+        return await self.application(scope, receive, send)
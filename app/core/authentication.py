@@ -0,0 +1,146 @@
+"""
+Token authentication with the token lookups cached.
+
+DRF TokenAuthentication joins the token and its user on every request.
+CachedTokenAuthentication keeps the result for TOKEN_AUTH_CACHE_TTL
+seconds: in the Django cache named by TOKEN_AUTH_CACHE_ALIAS, shared by
+the workers, or in a bounded in-process cache when no alias is set.
+
+Deleting a token and saving or deleting a user evict the matching
+entries (see core.signals). With a shared cache, the eviction applies
+to every worker at once, as no worker keeps entries of its own. Without
+one, only the worker making the change evicts them, and the other
+workers keep theirs until they expire: deployments running several
+workers set an alias.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+CACHE_KEY_PREFIX = 'core:auth:token:'
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a while."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        """Return the entry of the key, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl, size):
+        """Add an entry, evicting the least recently used beyond size."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > size:
+                self._entries.popitem(last=False)
+
+    def delete(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def keys_where(self, predicate):
+        """Return the keys whose value matches the predicate."""
+        with self._lock:
+            return [
+                key for key, (_, value) in self._entries.items()
+                if predicate(value)
+            ]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_local = TTLCache()
+
+
+def shared_cache():
+    """Return the Django cache shared by the workers, or None."""
+    alias = settings.TOKEN_AUTH_CACHE_ALIAS
+    return caches[alias] if alias else None
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication caching the user of each token."""
+
+    def authenticate_credentials(self, key):
+        ttl = settings.TOKEN_AUTH_CACHE_TTL
+        shared = shared_cache()
+        if shared is not None:
+            token = shared.get(CACHE_KEY_PREFIX + key)
+        else:
+            token = _local.get(key)
+        if token is None:
+            # raises AuthenticationFailed for unknown or inactive users.
+            user, token = super().authenticate_credentials(key)
+            if shared is not None:
+                shared.set(CACHE_KEY_PREFIX + key, token, ttl)
+            else:
+                _local.set(key, token, ttl, settings.TOKEN_AUTH_CACHE_SIZE)
+
+        # requests get their own copy, as views may change the user.
+        token = copy.copy(token)
+        token.user = copy.copy(token.user)
+        return token.user, token
+
+
+def _evict(keys):
+    _local.delete(keys)
+    shared = shared_cache()
+    if shared is not None:
+        shared.delete_many([CACHE_KEY_PREFIX + key for key in keys])
+
+
+def evict_tokens(keys):
+    """Evict the cached tokens with the given keys.
+
+    The tokens are evicted again once the transaction commits, so that
+    no request caches a row read before the change became visible.
+    """
+    keys = list(keys)
+    if not keys:
+        return
+    _evict(keys)
+    transaction.on_commit(lambda: _evict(keys))
+
+
+def evict_user(user_id):
+    """Evict the cached tokens of a user."""
+    keys = set(_local.keys_where(lambda token: token.user_id == user_id))
+    if shared_cache() is not None:
+        keys.update(Token.objects.filter(
+            user_id=user_id,
+        ).values_list('key', flat=True))
+    evict_tokens(keys)
+
+
+def clear():
+    """Empty the cache of this worker."""
+    _local.clear()
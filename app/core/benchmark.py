@@ -0,0 +1,52 @@
+"""
+Helpers for the benchmark management commands.
+"""
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+
+
+def percentile(timings, percent):
+    """Return the given percentile of a list of timings."""
+    timings = sorted(timings)
+    index = min(len(timings) - 1, int(len(timings) * percent / 100))
+    return timings[index]
+
+
+class Phase:
+    """Timings and query count of the operations of a benchmark phase."""
+
+    def __init__(self, name):
+        self.name = name
+        self.timings = []
+        self.queries = 0
+
+    def _count_query(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+    @contextmanager
+    def measure(self):
+        """Time one operation and count its queries."""
+        with connection.execute_wrapper(self._count_query):
+            start = time.perf_counter()
+            yield
+            self.timings.append(time.perf_counter() - start)
+
+    @property
+    def elapsed(self):
+        return sum(self.timings)
+
+    def summary(self):
+        """Return a line summing up the phase."""
+        count = len(self.timings)
+        if not count:
+            return f'{self.name}: no operations'
+        return (
+            f'{self.name}: {count} ops in {self.elapsed:.2f} s, '
+            f'{count / self.elapsed:.1f} ops/s, '
+            f'{self.queries} queries ({self.queries / count:.1f}/op), '
+            f'p50 {percentile(self.timings, 50) * 1000:.2f} ms, '
+            f'p99 {percentile(self.timings, 99) * 1000:.2f} ms'
+        )
@@ -0,0 +1,252 @@
+"""
+Read-only snapshot of the numbers and arithmetical concepts.
+
+The catalog seeded by create_default_arithmetical_concept almost never
+changes, so every worker loads it once and keeps it in memory. The
+snapshot is tagged with a version token stored in the database
+(CatalogVersionModel). Saving or deleting a number or a concept replaces
+the token in the same transaction (see core.signals). The worker making
+the change reloads on its next read. Every other worker, and the servers
+when the catalog is changed by a command, reload within
+CATALOG_VERSION_TTL seconds, the longest a worker goes without checking
+the token.
+
+Membership is not materialized: every concept keeps its rule (see
+core.rules), evaluated on demand against the stored numbers. Loading a
+snapshot reads the rows and nothing more, whatever the range of the
+numbers, and testing a number against a concept is a bit of arithmetic.
+
+Each snapshot also carries a digest of its content, usable as an HTTP
+validator, and memoizes data derived from it (see Catalog.memoize).
+"""
+import hashlib
+import heapq
+import itertools
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import transaction
+
+from core import rules
+
+
+NumberEntry = namedtuple(
+    'NumberEntry',
+    ['id', 'name', 'value'],
+)
+ConceptEntry = namedtuple(
+    'ConceptEntry',
+    ['id', 'name', 'description', 'count', 'rule'],
+)
+
+
+class Catalog:
+    """Snapshot of the numbers and arithmetical concepts."""
+
+    def __init__(self, version, numbers, concepts, digest=''):
+        self.version = version
+        self.digest = digest
+        self.numbers = numbers
+        self.concepts = concepts
+        self.numbers_by_value = {
+            number.value: number for number in numbers.values()
+        }
+        self.concept_ids = sorted(concepts)
+        self.low = min(self.numbers_by_value, default=0)
+        self.high = max(self.numbers_by_value, default=-1)
+        self._memo = {}
+
+    @classmethod
+    def load(cls, version):
+        """Load the catalog from the database."""
+        from core.models import (
+            NumberModel,
+            ArithmeticalConceptModel,
+        )
+
+        number_rows = list(NumberModel.objects.values_list(
+            'id', 'name', 'value',
+        ).order_by('value', 'id'))
+        concept_rows = list(ArithmeticalConceptModel.objects.values_list(
+            'id', 'name', 'description', 'count', 'rule_kind', 'rule_params',
+        ).order_by('id'))
+        through = ArithmeticalConceptModel.numbers.through
+        memberships = sorted(through.objects.filter(
+            arithmeticalconceptmodel__rule_kind=rules.LIST,
+        ).values_list(
+            'arithmeticalconceptmodel_id',
+            'numbermodel_id',
+        ))
+        digest = hashlib.sha256(
+            repr((number_rows, concept_rows, memberships)).encode()
+        ).hexdigest()[:32]
+
+        values = {number_id: value for number_id, _, value in number_rows}
+        listed = {}
+        for concept_id, number_id in memberships:
+            listed.setdefault(concept_id, []).append(values[number_id])
+
+        numbers = {
+            number_id: NumberEntry(id=number_id, name=name, value=value)
+            for number_id, name, value in number_rows
+        }
+        concepts = {
+            concept_id: ConceptEntry(
+                id=concept_id,
+                name=name,
+                description=description,
+                count=count,
+                rule=rules.ListRule(listed.get(concept_id, ()))
+                if kind == rules.LIST else rules.get_rule(kind, params),
+            )
+            for concept_id, name, description, count, kind, params
+            in concept_rows
+        }
+        return cls(version, numbers, concepts, digest)
+
+    def contains(self, concept_id, value):
+        """Return True if the concept holds the stored number with the
+        given value, or None if the concept is missing."""
+        concept = self.concepts.get(concept_id)
+        if concept is None:
+            return None
+        return value in self.numbers_by_value and concept.rule.contains(value)
+
+    def concept_values(self, concept_id, low=None):
+        """Generate the values of the numbers of a concept, in increasing
+        order, from low if given."""
+        rule = self.concepts[concept_id].rule
+        low = self.low if low is None else max(low, self.low)
+        for value in rule.values(low, self.high):
+            if value in self.numbers_by_value:
+                yield value
+
+    def number_concept_ids(self, value):
+        """Return the ids of the concepts holding a number."""
+        return [
+            concept_id for concept_id in self.concept_ids
+            if self.contains(concept_id, value)
+        ]
+
+    def is_possible(self, concept_ids, value):
+        """Return True if a number can be played in a game with the given
+        possible concepts: numbers below 0 never can."""
+        return value >= 0 and any(
+            self.contains(concept_id, value) for concept_id in concept_ids
+        )
+
+    def possible_values(self, concept_ids, limit=None):
+        """Return the values of the numbers held by any of the concepts,
+        in increasing order, at most limit of them.
+
+        Numbers below 0 are left out, as they can not be played.
+        """
+        merged = heapq.merge(*(
+            self.concept_values(concept_id, 0) for concept_id in concept_ids
+            if concept_id in self.concepts
+        ))
+        values = (value for value, _ in itertools.groupby(merged))
+        return list(itertools.islice(values, limit))
+
+    def memoize(self, key, func):
+        """Return func(self), computed once per snapshot for the key.
+
+        A None result is not kept, so that lookups of missing entries
+        do not grow the memo.
+        """
+        try:
+            return self._memo[key]
+        except KeyError:
+            value = func(self)
+            if value is not None:
+                self._memo[key] = value
+            return value
+
+    def number(self, value):
+        """Return the entry of the number with the given value, or None."""
+        return self.numbers_by_value.get(value)
+
+    def number_instance(self, value):
+        """Return an unsaved NumberModel for the given value, or None.
+
+        The instance carries the primary key, so it can be assigned to
+        foreign keys without fetching the row.
+        """
+        from core.models import NumberModel
+
+        number = self.number(value)
+        if number is None:
+            return None
+        return NumberModel(id=number.id, name=number.name, value=number.value)
+
+
+_lock = threading.Lock()
+_catalog = None
+# monotonic time until which the version of the snapshot is trusted.
+_checked_until = 0.0
+
+
+def get_version():
+    """Return the catalog version token stored in the database."""
+    from core.models import CatalogVersionModel
+
+    return CatalogVersionModel.objects.filter(
+        id=CatalogVersionModel.ID,
+    ).values_list('version', flat=True).first() or ''
+
+
+def get_catalog():
+    """Return the catalog snapshot, loading it if it is missing or stale.
+
+    The version token is read at most once every CATALOG_VERSION_TTL
+    seconds. While a thread checks it or reloads the snapshot, the other
+    threads keep reading the current snapshot rather than wait.
+    """
+    global _catalog, _checked_until
+    current = _catalog
+    if current is not None:
+        if time.monotonic() < _checked_until:
+            return current
+        if not _lock.acquire(blocking=False):
+            return current
+    else:
+        _lock.acquire()
+    try:
+        version = get_version()
+        if _catalog is None or _catalog.version != version:
+            _catalog = Catalog.load(version)
+        _checked_until = time.monotonic() + settings.CATALOG_VERSION_TTL
+        return _catalog
+    finally:
+        _lock.release()
+
+
+def expire():
+    """Have the next read of this worker check the version token."""
+    global _checked_until
+    _checked_until = 0.0
+
+
+def bump_version():
+    """Replace the catalog version token."""
+    from core.models import CatalogVersionModel
+
+    CatalogVersionModel.objects.update_or_create(
+        id=CatalogVersionModel.ID,
+        defaults={'version': uuid.uuid4().hex},
+    )
+    expire()
+
+
+def invalidate():
+    """Invalidate the catalog of every worker.
+
+    The version is replaced in the transaction making the change, so the
+    other workers see it once the change is visible to them. This worker
+    checks it again on its next read, and once the transaction commits.
+    """
+    bump_version()
+    transaction.on_commit(expire)
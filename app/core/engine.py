@@ -0,0 +1,95 @@
+"""
+Bitset engine for the number game.
+
+A set of small integers, such as the possible concepts of a game, is an
+integer mask (bit ``n`` stands for the value ``n``), stored as bytes.
+A move tests the played number against each possible concept through a
+membership function (see core.catalog), without a query per concept and
+without materializing the numbers of the concepts.
+
+Values below 0 have no bit: building a mask from them raises ValueError,
+and no mask holds them. Numbers below 0 can not be played.
+"""
+from collections import namedtuple
+
+
+MoveOutcome = namedtuple(
+    'MoveOutcome',
+    [
+        'in_hidden',
+        'possible_ariths',
+        'removed_ariths',
+    ],
+)
+
+
+def number_bit(value):
+    """Return the mask of a single number."""
+    if value < 0:
+        raise ValueError(f'Negative numbers have no bit: {value}.')
+    return 1 << value
+
+
+def mask_from_values(values):
+    """Return the mask holding all the given numbers."""
+    # setting bits of a byte array keeps large masks linear to build.
+    values = list(values)
+    if not values:
+        return 0
+    if min(values) < 0:
+        raise ValueError(f'Negative numbers have no bit: {min(values)}.')
+    data = bytearray((max(values) >> 3) + 1)
+    for value in values:
+        data[value >> 3] |= 1 << (value & 7)
+    return int.from_bytes(data, 'little')
+
+
+def values_from_mask(mask):
+    """Return the numbers held by a mask, in increasing order."""
+    bits = bin(mask)[:1:-1]
+    values = []
+    value = bits.find('1')
+    while value != -1:
+        values.append(value)
+        value = bits.find('1', value + 1)
+    return values
+
+
+def mask_to_bytes(mask):
+    """Return the little-endian bytes of a mask, for storage."""
+    return mask.to_bytes((mask.bit_length() + 7) // 8, 'little')
+
+
+def mask_from_bytes(data):
+    """Return the mask stored in the given bytes."""
+    return int.from_bytes(bytes(data), 'little')
+
+
+def has_value(mask, value):
+    """Return True if the number is held by the mask."""
+    return value >= 0 and bool(mask >> value & 1)
+
+
+def apply_move(contains, hidden_id, possible_ariths, value):
+    """Apply a move to a game and return its outcome.
+
+    contains(concept_id, value) tells whether a concept holds a number,
+    and returns None for a missing concept. A concept stays possible only
+    if it agrees with the hidden concept about the played number: both
+    hold it, or neither does. Missing concepts are dropped.
+    """
+    if value < 0:
+        raise ValueError(f'Negative numbers can not be played: {value}.')
+    in_hidden = bool(contains(hidden_id, value))
+    kept, removed = [], []
+    for concept_id in possible_ariths:
+        held = contains(concept_id, value)
+        if held is not None and held == in_hidden:
+            kept.append(concept_id)
+        else:
+            removed.append(concept_id)
+    return MoveOutcome(
+        in_hidden=in_hidden,
+        possible_ariths=kept,
+        removed_ariths=removed,
+    )
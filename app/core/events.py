@@ -0,0 +1,146 @@
+"""
+Events of the games, fanned out to their viewers.
+
+Once a move commits, the change of the game is published as a compact
+delta: the new moves, the ids of the concepts still possible and the
+state. The delta is rendered once and handed to every subscriber of the
+game, so viewers add no database query per move (see game/events.py).
+
+The broker is set by GAME_EVENTS_BROKER. LocalBroker fans events out
+within the process; a broker shared by the workers only needs the same
+publish, subscribe and unsubscribe methods.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from rest_framework.renderers import JSONRenderer
+
+
+class Subscription:
+    """Queue of the events of a channel, read from an event loop.
+
+    When a viewer falls behind, its oldest events are dropped: each event
+    carries the whole state of the game, so only older moves are missed.
+    """
+
+    def __init__(self, channel, size, loop=None):
+        self.channel = channel
+        self.loop = loop or asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=size)
+
+    def deliver(self, event):
+        """Queue an event, from any thread."""
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # the loop of the subscriber is closed.
+            pass
+
+    def _put(self, event):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        """Return the next event."""
+        return await self.queue.get()
+
+
+class LocalBroker:
+    """Publish events to the subscribers of this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, channel, size=None):
+        """Return a subscription to a channel, from an event loop."""
+        subscription = Subscription(
+            channel,
+            size or settings.GAME_EVENTS_QUEUE_SIZE,
+        )
+        with self._lock:
+            self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+    def publish(self, channel, event):
+        """Deliver an event to the subscribers of a channel."""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.deliver(event)
+
+    def subscribers(self, channel):
+        """Return the number of subscribers of a channel."""
+        with self._lock:
+            return len(self._subscriptions.get(channel, ()))
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Return the broker set by GAME_EVENTS_BROKER."""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(settings.GAME_EVENTS_BROKER)()
+        return _broker
+
+
+def game_channel(game_id):
+    return f'game:{game_id}'
+
+
+def game_delta(game, moves=()):
+    """Return the delta of a game after the given moves."""
+    return {
+        'game': game.id,
+        'moves': [
+            {
+                'number': move.number_value,
+                'in_hidden': move.in_hidden,
+                'created_on': move.created_on,
+            }
+            for move in moves
+        ],
+        'possible_ariths': game.get_possible_ariths(),
+        'state': game.get_game_state_display(),
+        'moves_count': game.moves_count,
+    }
+
+
+def render_event(name, delta):
+    """Return a delta as a server-sent event."""
+    return b'id: %d\nevent: %s\ndata: %s\n\n' % (
+        delta['moves_count'],
+        name.encode(),
+        JSONRenderer().render(delta),
+    )
+
+
+def publish_moves(game, moves, using=None):
+    """Publish the moves of a game once the transaction commits."""
+    delta = game_delta(game, moves)
+
+    def publish():
+        get_broker().publish(
+            game_channel(game.id),
+            render_event('move', delta),
+        )
+
+    transaction.on_commit(publish, using=using)
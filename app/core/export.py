@@ -0,0 +1,174 @@
+"""
+Export of the games and their moves, as newline-delimited JSON.
+
+The games are read by chunks of increasing ids, joined with their user,
+and the moves of each chunk of games are read with a single query.
+Archived games keep their ids and are merged in the same order, with
+their packed moves, so the export runs three queries per chunk and its
+memory stays flat whatever the number of games and moves. Each chunk is
+read on its own (see export_chunk), so that async code can read them in
+the thread pool.
+"""
+import json
+
+from django.db.models import Exists, OuterRef, Q
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import is_naive, make_aware
+
+from core.catalog import get_catalog
+from core.models import (
+    ArchivedGameModel,
+    GameModel,
+    GameMoveModel,
+)
+
+
+CHUNK_SIZE = 1000
+
+
+def parse_since(value):
+    """Return the datetime of a `since` value, or None if invalid.
+
+    Datetimes without a time zone are taken in the current one.
+    """
+    try:
+        since = parse_datetime(value)
+    except ValueError:
+        return None
+    if since is not None and is_naive(since):
+        since = make_aware(since)
+    return since
+
+
+def games_since(since=None):
+    """Return the games created, or moved on, since the given datetime."""
+    games = GameModel.objects.all()
+    if since is not None:
+        moved = GameMoveModel.objects.filter(
+            game=OuterRef('pk'),
+            created_on__gte=since,
+        )
+        games = games.filter(Q(created_on__gte=since) | Exists(moved))
+    return games
+
+
+def archived_games_since(since=None):
+    """Return the archived games which may be created, or moved on,
+    since the given datetime.
+
+    The moves are packed, so the moves since the datetime are checked
+    by moved_since; games archived before it have no later move.
+    """
+    games = ArchivedGameModel.objects.all()
+    if since is not None:
+        games = games.filter(
+            Q(created_on__gte=since) | Q(archived_on__gte=since),
+        )
+    return games
+
+
+def moved_since(game, moves, since):
+    """Return whether a game was created, or moved on, since a datetime."""
+    return since is None or game.created_on >= since or any(
+        created_on >= since for _, _, created_on in moves
+    )
+
+
+def game_record(game, moves, catalog):
+    """Return the exported record of a game and its moves."""
+    hidden = catalog.concepts.get(game.hidden_arith_concept_id)
+    return {
+        'id': game.id,
+        'user': game.user.user_name,
+        'created_on': game.created_on.isoformat(),
+        'hidden_arith_concept': {
+            'id': game.hidden_arith_concept_id,
+            'name': hidden.name if hidden else None,
+        },
+        'state': game.get_game_state_display(),
+        'moves': [
+            {
+                'number': number,
+                'in_hidden': in_hidden,
+                'created_on': created_on.isoformat(),
+            }
+            for number, in_hidden, created_on in moves
+        ],
+    }
+
+
+def _records(games, since, catalog):
+    moves = {
+        game.id: [] for game in games if isinstance(game, GameModel)
+    }
+    for game_id, *move in GameMoveModel.objects.filter(
+        game_id__in=moves,
+    ).order_by('game_id', 'created_on', 'id').values_list(
+        'game_id', 'number_value', 'in_hidden', 'created_on',
+    ):
+        moves[game_id].append(move)
+    for game in games:
+        if game.id in moves:
+            yield game_record(game, moves[game.id], catalog)
+        else:
+            archived_moves = game.get_moves()
+            if moved_since(game, archived_moves, since):
+                yield game_record(game, archived_moves, catalog)
+
+
+def games_chunk(since, after, chunk_size):
+    """Return the records of the games after the given id, by id.
+
+    Returns the records and the id to read the next chunk after, which is
+    None after the last chunk.
+    """
+    catalog = get_catalog()
+    games = list(games_since(since).select_related('user').only(
+        'id',
+        'created_on',
+        'hidden_arith_concept_id',
+        'game_state',
+        'user__user_name',
+    ).filter(id__gt=after).order_by('id')[:chunk_size + 1])
+    games += archived_games_since(since).select_related('user').only(
+        'id',
+        'created_on',
+        'hidden_arith_concept_id',
+        'game_state',
+        'moves',
+        'user__user_name',
+    ).filter(id__gt=after).order_by('id')[:chunk_size + 1]
+    games.sort(key=lambda game: game.id)
+    more = len(games) > chunk_size
+    games = games[:chunk_size]
+    records = list(_records(games, since, catalog))
+    return records, games[-1].id if more else None
+
+
+def export_games(since=None, chunk_size=CHUNK_SIZE):
+    """Generate the records of the games, oldest first."""
+    after = 0
+    while after is not None:
+        records, after = games_chunk(since, after, chunk_size)
+        yield from records
+
+
+def render_records(records):
+    """Return records as lines of JSON."""
+    return ''.join(
+        json.dumps(record, separators=(',', ':')) + '\n'
+        for record in records
+    )
+
+
+def export_chunk(since, after):
+    """Return the NDJSON of the games after the given id, as bytes, and
+    the id to read the next chunk after, which is None after the last."""
+    records, after = games_chunk(since, after, CHUNK_SIZE)
+    return render_records(records).encode(), after
+
+
+def export_ndjson(since=None, chunk_size=CHUNK_SIZE):
+    """Generate the records of the games as lines of JSON."""
+    for record in export_games(since, chunk_size):
+        yield render_records([record])
@@ -0,0 +1,83 @@
+"""
+Best-guess hints for running games.
+
+The catalog is turned once per snapshot, on the first hint, into a
+concept x number membership matrix. Residue rules are evaluated over
+the numbers at once with numpy; the other concepts hold few numbers,
+which are generated. To score every number against the possible concepts
+of a game, the rows of those concepts are summed: for a number held by
+k of the n possible concepts, and a hidden concept equally likely to be
+any of them, playing it eliminates n - k concepts with probability k/n
+and k concepts otherwise, so 2k(n - k)/n on average.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from core import rules
+
+
+Membership = namedtuple('Membership', ['rows', 'values', 'matrix'])
+Hint = namedtuple('Hint', ['value', 'expected_eliminated'])
+
+
+def membership_matrix(catalog):
+    """Return the membership matrix of a catalog.
+
+    `rows` maps a concept id to its row, `values` holds the value of the
+    number in each column (numbers below 0 are left out), and
+    `matrix[row, column]` is 1 if the concept holds the number, else 0.
+    """
+    # only the numbers which can be played are hinted.
+    values = np.array(
+        sorted(value for value in catalog.numbers_by_value if value >= 0),
+        dtype=np.int64,
+    )
+    rows = {concept_id: row for row, concept_id in
+            enumerate(catalog.concept_ids)}
+    # one byte per cell; sums over the rows are upcast by numpy.
+    matrix = np.zeros((len(rows), len(values)), dtype=np.uint8)
+    for concept_id, row in rows.items():
+        rule = catalog.concepts[concept_id].rule
+        if isinstance(rule, rules.ResidueRule):
+            held = values % rule.modulus == rule.remainder
+            if rule.min is not None:
+                held &= values >= rule.min
+            if rule.max is not None:
+                held &= values <= rule.max
+            matrix[row, held] = 1
+            continue
+        held = np.fromiter(
+            catalog.concept_values(concept_id, 0),
+            dtype=np.int64,
+        )
+        matrix[row, np.searchsorted(values, held)] = 1
+    return Membership(rows, values, matrix)
+
+
+def get_membership(catalog):
+    """Return the membership matrix of a catalog, built once."""
+    return catalog.memoize('membership_matrix', membership_matrix)
+
+
+def best_split(catalog, possible_ariths):
+    """Return the hint splitting the possible concepts best, or None.
+
+    Ties go to the smallest number. There is no hint when fewer than two
+    concepts are possible, or when no number splits them.
+    """
+    membership = get_membership(catalog)
+    rows = [membership.rows[id] for id in possible_ariths
+            if id in membership.rows]
+    n = len(rows)
+    if n < 2:
+        return None
+    k = membership.matrix[rows].sum(axis=0)
+    scores = 2.0 * k * (n - k) / n
+    column = int(scores.argmax())
+    if scores[column] <= 0:
+        return None
+    return Hint(
+        value=int(membership.values[column]),
+        expected_eliminated=float(scores[column]),
+    )
@@ -0,0 +1,102 @@
+"""
+Conditional responses served from pre-rendered bytes.
+
+Data that only changes with the catalog is rendered once per catalog
+snapshot, and optionally gzipped once, then served with a strong ETag.
+Clients revalidating with If-None-Match get a 304 without a body.
+"""
+import gzip
+from collections import namedtuple
+
+from django.conf import settings
+from django.http import (
+    HttpResponse,
+    HttpResponseNotModified,
+)
+from django.utils.cache import patch_vary_headers
+
+from rest_framework.renderers import JSONRenderer
+
+
+RenderedBody = namedtuple('RenderedBody', ['body', 'gzip_body'])
+
+
+def render_body(data):
+    """Render data to JSON, and gzip it if it is large enough."""
+    body = JSONRenderer().render(data)
+    gzip_body = None
+    if settings.CATALOG_GZIP_MIN_SIZE is not None and \
+            len(body) >= settings.CATALOG_GZIP_MIN_SIZE:
+        gzip_body = gzip.compress(body)
+    return RenderedBody(body, gzip_body)
+
+
+def etag_matches(request, etags):
+    """Return True if the If-None-Match header matches one of the etags."""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    for tag in header.split(','):
+        tag = tag.strip()
+        if tag == '*':
+            return True
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag in etags:
+            return True
+    return False
+
+
+def accepts_gzip(request):
+    """Return True if the client accepts a gzip encoded body.
+
+    A coding with a q-value of 0 is refused. gzip is accepted when listed,
+    or else when `*` is.
+    """
+    qvalues = {}
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, *params = [part.strip() for part in item.split(';')]
+        if not coding:
+            continue
+        qvalue = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    qvalue = float(value)
+                except ValueError:
+                    qvalue = 0.0
+        qvalues[coding.lower()] = qvalue
+    for coding in ('gzip', 'x-gzip', '*'):
+        if coding in qvalues:
+            return qvalues[coding] > 0
+    return False
+
+
+def rendered_response(request, rendered, digest):
+    """Return the response serving rendered bytes tagged with a digest.
+
+    The gzip encoded body has its own strong ETag, and either ETag
+    satisfies If-None-Match.
+    """
+    etag = f'"{digest}"'
+    gzip_etag = f'"{digest}-gzip"'
+    use_gzip = rendered.gzip_body is not None and accepts_gzip(request)
+    if etag_matches(request, (etag, gzip_etag)):
+        response = HttpResponseNotModified()
+    elif use_gzip:
+        response = HttpResponse(
+            rendered.gzip_body,
+            content_type='application/json',
+        )
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(
+            rendered.body,
+            content_type='application/json',
+        )
+    response['ETag'] = gzip_etag if use_gzip else etag
+    response['Cache-Control'] = 'no-cache'
+    if rendered.gzip_body is not None:
+        patch_vary_headers(response, ['Accept-Encoding'])
+    return response
@@ -0,0 +1,63 @@
+"""
+Django command to move the finished games to the archive.
+
+The games won more than --older-than-days days ago are moved, with their
+moves, to ArchivedGameModel in batches of --batch-size games, each batch
+in its own transaction. With --loop, the command keeps archiving every
+given number of seconds, as a background job.
+"""
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.models import ArchivedGameModel
+
+
+class Command(BaseCommand):
+    """Django command to archive the finished games."""
+
+    help = 'Move the games won a while ago to the archive.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days', type=int, default=30,
+            help='Archive the won games created more than this many days '
+                 'ago.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Games moved per transaction.',
+        )
+        parser.add_argument(
+            '--loop', type=int, default=None, metavar='SECONDS',
+            help='Keep archiving, waiting this many seconds once all the '
+                 'games are archived.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if options['older_than_days'] < 0:
+            raise CommandError('The age must not be negative.')
+        if options['batch_size'] < 1:
+            raise CommandError('The batch size must be positive.')
+        if options['loop'] is not None and options['loop'] < 1:
+            raise CommandError('The loop delay must be positive.')
+
+        while True:
+            self.archive(options['older_than_days'], options['batch_size'])
+            if options['loop'] is None:
+                return
+            time.sleep(options['loop'])
+
+    def archive(self, older_than_days, batch_size):
+        """Archive the games old enough, batch by batch."""
+        before = timezone.now() - datetime.timedelta(days=older_than_days)
+        total = 0
+        while True:
+            count = ArchivedGameModel.objects.archive(before, batch_size)
+            total += count
+            if count < batch_size:
+                break
+        self.stdout.write(self.style.SUCCESS(f'Archived {total} games.'))
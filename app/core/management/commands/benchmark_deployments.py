@@ -0,0 +1,159 @@
+"""
+Django command to compare the WSGI and ASGI deployments under load.
+
+Both applications are called in process, without a server in front, so
+the numbers compare the request handling of each deployment: a pool of
+WSGI worker threads against the async views on a single event loop.
+"""
+import asyncio
+import io
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.benchmark import percentile
+from core.models import GameModel
+
+
+def wsgi_environ(path):
+    """Return the WSGI environ of a GET request to the given path."""
+    return {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'SCRIPT_NAME': '',
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+
+
+def asgi_scope(path):
+    """Return the ASGI scope of a GET request to the given path."""
+    return {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [(b'host', b'localhost')],
+        'client': ('127.0.0.1', 0),
+        'server': ('localhost', 80),
+    }
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the WSGI and ASGI deployments."""
+
+    help = 'Compare concurrent throughput of the WSGI and ASGI apps.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--connections', type=int, default=64,
+            help='Number of concurrent connections.',
+        )
+        parser.add_argument(
+            '--requests', type=int, default=2000,
+            help='Total number of requests per deployment.',
+        )
+        parser.add_argument(
+            '--wsgi-workers', type=int, default=8,
+            help='Number of WSGI worker threads.',
+        )
+        parser.add_argument(
+            '--path', default=None,
+            help='Path to request (defaults to the latest game detail).',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        path = options['path']
+        if path is None:
+            game = GameModel.objects.order_by('-id').first()
+            if game is None:
+                self.stderr.write('No game to request, create one first.')
+                return
+            path = f'/api/game/games/{game.id}'
+        close_old_connections()
+
+        total = options['requests']
+        connections = options['connections']
+        self.report('WSGI', *self.run_wsgi(
+            path, total, options['wsgi_workers'],
+        ))
+        self.report('ASGI', *asyncio.run(
+            self.run_asgi(path, total, connections),
+        ))
+
+    def run_wsgi(self, path, total, workers):
+        """Run the requests through the WSGI app and return the timings."""
+        from app.wsgi import application
+
+        statuses = []
+
+        def start_response(status, headers):
+            statuses.append(status)
+
+        def request():
+            start = time.perf_counter()
+            b''.join(application(wsgi_environ(path), start_response))
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            timings = list(pool.map(lambda _: request(), range(total)))
+        elapsed = time.perf_counter() - start
+        failed = sum(1 for status in statuses if not status.startswith('2'))
+        return timings, elapsed, failed
+
+    async def run_asgi(self, path, total, connections):
+        """Run the requests through the ASGI app and return the timings."""
+        from app.asgi import application
+
+        timings = []
+        statuses = []
+        remaining = iter(range(total))
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                statuses.append(message['status'])
+
+        async def connection():
+            for _ in remaining:
+                start = time.perf_counter()
+                await application(asgi_scope(path), receive, send)
+                timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(connection() for _ in range(connections)))
+        elapsed = time.perf_counter() - start
+        failed = sum(1 for status in statuses if not 200 <= status < 300)
+        return timings, elapsed, failed
+
+    def report(self, name, timings, elapsed, failed):
+        """Write the results of a run."""
+        self.stdout.write(
+            f'{name}: {len(timings) / elapsed:.1f} req/s, '
+            f'p50 {percentile(timings, 50) * 1000:.2f} ms, '
+            f'p99 {percentile(timings, 99) * 1000:.2f} ms, '
+            f'mean {statistics.mean(timings) * 1000:.2f} ms, '
+            f'{failed} failed'
+        )
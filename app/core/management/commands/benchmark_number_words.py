@@ -0,0 +1,84 @@
+"""
+Django command to benchmark converting numbers to words.
+
+Compares the former per call conversion, which rebuilt every group of
+three digits, with NumberToWords.convert and NumberToWords.convert_many.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.utils import NumberToWords
+
+
+# the former conversion named the groups of three digits up to this.
+LEGACY_LIMIT = 1000 ** len(NumberToWords.units)
+
+
+def legacy_convert(number):
+    """Convert a number the way NumberToWords.convert used to.
+
+    Only numbers from 0 to LEGACY_LIMIT - 1 are supported.
+    """
+    if number == 0:
+        return "Zero"
+    res, i = [], 0
+    while number:
+        cur = number % 1000
+        if number % 1000:
+            res.append(
+                NumberToWords.threeDigits(cur, NumberToWords.units[i])
+            )
+        number //= 1000
+        i += 1
+    return " ".join(res[::-1])
+
+
+class Command(BaseCommand):
+    """Django command to benchmark NumberToWords."""
+
+    help = 'Measure the speed of converting numbers to words.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count', type=int, default=1000000,
+            help='Number of numbers to convert.',
+        )
+        parser.add_argument(
+            '--start', type=int, default=1,
+            help='First number to convert.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if options['start'] < 0:
+            raise CommandError('The first number must not be negative.')
+        if options['count'] < 1:
+            raise CommandError('The count must be positive.')
+        numbers = range(options['start'], options['start'] + options['count'])
+        if numbers[-1] >= LEGACY_LIMIT:
+            raise CommandError(
+                f'The numbers must be below {LEGACY_LIMIT}, '
+                'the limit of the legacy conversion.'
+            )
+
+        legacy = self.measure(
+            'legacy convert', lambda: [legacy_convert(n) for n in numbers],
+        )
+        self.measure(
+            'convert', lambda: [NumberToWords.convert(n) for n in numbers],
+        )
+        batch = self.measure(
+            'convert_many', lambda: NumberToWords.convert_many(numbers),
+        )
+        self.stdout.write(f'convert_many speedup: {legacy / batch:.2f}x')
+
+    def measure(self, name, func):
+        """Run and time a conversion, and return its duration."""
+        start = time.perf_counter()
+        count = len(func())
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'{name}: {elapsed:.3f} s, {count / elapsed:,.0f} numbers/s'
+        )
+        return elapsed
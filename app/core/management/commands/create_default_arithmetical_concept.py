@@ -1,19 +1,73 @@
 """
 Django command to add default arithmetical concepts to database.
+
+The command is idempotent: it compares the default numbers and concepts
+with the rows already stored and only writes the difference, with bulk
+inserts in a single transaction. Rows outside the defaults are kept,
+unless --prune is given, since deleting them cascades into games.
+
+The default concepts are rules, so they store no membership row
+whatever the range of numbers.
 """
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core import catalog
+from core import rules
 from core.models import (
     NumberModel,
     ArithmeticalConceptModel,
 )
+from core.utils import NumberToWords
+
+
+BATCH_SIZE = 10000
+
 
-from django.core.management.base import BaseCommand
+def insert_columns(model, fields, columns, returning=('id',)):
+    """Insert rows given column by column, and return the returning fields.
+
+    On PostgreSQL each batch is a single INSERT ... SELECT from unnest()
+    of one array per column, which skips building a model instance per
+    row; other databases go through bulk_create.
+    """
+    if connection.vendor != 'postgresql':
+        objs = model.objects.bulk_create(
+            [model(**dict(zip(fields, row))) for row in zip(*columns)],
+            batch_size=BATCH_SIZE,
+        )
+        return [
+            tuple(getattr(obj, name) for name in returning) for obj in objs
+        ]
+
+    opts = model._meta
+    quote = connection.ops.quote_name
+    targets = [opts.get_field(name) for name in fields]
+    sql = 'INSERT INTO {} ({}) SELECT * FROM unnest({}) RETURNING {}'.format(
+        quote(opts.db_table),
+        ', '.join(quote(field.column) for field in targets),
+        ', '.join(f'%s::{field.db_type(connection)}[]' for field in targets),
+        ', '.join(quote(opts.get_field(name).column) for name in returning),
+    )
+    size = BATCH_SIZE * 10
+    result = []
+    with connection.cursor() as cursor:
+        for start in range(0, len(columns[0]), size):
+            cursor.execute(
+                sql, [list(column[start:start + size]) for column in columns],
+            )
+            result += cursor.fetchall()
+    return result
 
 
 def get_mult_of_arth(number):
     return {
         'name': f"Multiples of {number}",
         'description': f"All numbers which are divisible by {number}.",
-        'numbers': [i for i in range(1, 101) if i % number == 0],
+        'rule_kind': rules.RESIDUE,
+        'rule_params': {'modulus': number},
     }
 
 
@@ -21,7 +75,8 @@ def get_ends_with_arth(number):
     return {
         'name': f"Ends with {number}",
         'description': f"All numbers ends with {number}.",
-        'numbers': [i for i in range(1, 101) if i % 10 == number],
+        'rule_kind': rules.RESIDUE,
+        'rule_params': {'modulus': 10, 'remainder': number},
     }
 
 
@@ -29,8 +84,8 @@ def get_power_of_arth(number, offset=0):
     ret = {
         'name': f"Power of {number}",
         'description': f"All numbers which are power of {number}",
-        'numbers': [offset + number**i for i in range(0, 101)
-                    if offset+number**i < 101 and offset+number**i >= 1],
+        'rule_kind': rules.POWER,
+        'rule_params': {'base': number},
     }
     sign = " + "
     if offset < 0:
@@ -39,61 +94,224 @@ def get_power_of_arth(number, offset=0):
         ret['name'] += sign
         ret['name'] += f"{abs(offset)}"
         ret['description'] += f", with offset = {offset}"
+        ret['rule_params']['offset'] = offset
 
     return ret
 
 
-ARITH_CONCEPTS = [
-    {
-        'name': "Even Numbers",
-        'description': "All numbers which are divisible by 2.",
-        'numbers': [i for i in range(2, 101) if i % 2 == 0],
-    },
-    {
-        'name': "Odd Numbers",
-        'description': "All numbers which are not divisible by 2.",
-        'numbers': [i for i in range(2, 101) if i % 2 == 1],
-    },
-    {
-        'name': "Squares Numbers",
-        'description': "All numbers which are\
+def get_arith_concepts():
+    """Return the default arithmetical concepts.
+
+    Every default concept is defined by a rule (see core.rules). A
+    concept listing its numbers instead has a 'numbers' list.
+    """
+    concepts = [
+        {
+            'name': "Even Numbers",
+            'description': "All numbers which are divisible by 2.",
+            'rule_kind': rules.RESIDUE,
+            'rule_params': {'modulus': 2},
+        },
+        {
+            'name': "Odd Numbers",
+            'description': "All numbers which are not divisible by 2.",
+            'rule_kind': rules.RESIDUE,
+            # one has never been part of the odd numbers of the game.
+            'rule_params': {'modulus': 2, 'remainder': 1, 'min': 2},
+        },
+        {
+            'name': "Squares Numbers",
+            'description': "All numbers which are\
                         the product of a number multiplied by itself.",
-        'numbers': [i*i for i in range(1, 11)],
-    },
-    {
-        'name': "All Numbers",
-        'description': "All numbers.",
-        'numbers': [i for i in range(1, 101)],
-    }
-]
+            'rule_kind': rules.SQUARE,
+            'rule_params': {},
+        },
+        {
+            'name': "All Numbers",
+            'description': "All numbers.",
+            'rule_kind': rules.RESIDUE,
+            'rule_params': {'modulus': 1},
+        }
+    ]
+    for i in range(3, 11):
+        concepts.append(get_mult_of_arth(i))
+    for i in range(1, 10):
+        concepts.append(get_ends_with_arth(i))
+    for i in range(2, 11):
+        concepts.append(get_power_of_arth(i))
+
+    concepts.append(get_power_of_arth(2, 37))
+    concepts.append(get_power_of_arth(2, -32))
+    return concepts
 
 
 class Command(BaseCommand):
     """Django command to add default arithmetical concepts to database"""
 
+    help = 'Create or update the default numbers and arithmetical concepts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min', type=int, default=1,
+            help='Smallest number of the catalog.',
+        )
+        parser.add_argument(
+            '--max', type=int, default=100,
+            help='Largest number of the catalog.',
+        )
+        parser.add_argument(
+            '--prune', action='store_true',
+            help='Delete the numbers and concepts outside the defaults '
+                 '(and the games using them).',
+        )
+
     def handle(self, *args, **options):
         """Entrypoint for command."""
-        NumberModel.objects.all().delete()
-        for i in range(1, 101):
-            NumberModel.objects.create(value=i)
-
-        for i in range(3, 11):
-            ARITH_CONCEPTS.append(get_mult_of_arth(i))
-
-        for i in range(1, 10):
-            ARITH_CONCEPTS.append(get_ends_with_arth(i))
-        for i in range(2, 11):
-            ARITH_CONCEPTS.append(get_power_of_arth(i))
-
-        ARITH_CONCEPTS.append(get_power_of_arth(2, 37))
-        ARITH_CONCEPTS.append(get_power_of_arth(2, -32))
-
-        ArithmeticalConceptModel.objects.all().delete()
-        for arth in ARITH_CONCEPTS:
-            ac = ArithmeticalConceptModel.objects.create(
-                name=arth['name'],
-                description=arth['description'],
+        self.verbosity = options['verbosity']
+        self.started = time.perf_counter()
+        low, high = options['min'], options['max']
+        if low < 1 or high < low:
+            raise CommandError('The number range is not valid.')
+        values = range(low, high + 1)
+        concepts = get_arith_concepts()
+        for arth in concepts:
+            arth.setdefault('rule_kind', rules.LIST)
+            arth.setdefault('rule_params', {})
+            if arth['rule_kind'] == rules.LIST:
+                arth['numbers'] = [n for n in arth['numbers'] if n in values]
+                arth['count'] = len(arth['numbers'])
+            else:
+                arth['numbers'] = []
+                arth['count'] = rules.get_rule(
+                    arth['rule_kind'], arth['rule_params'],
+                ).count(low, high)
+
+        with transaction.atomic():
+            number_ids = self.sync_numbers(values)
+            concept_ids = self.sync_concepts(concepts)
+            self.sync_memberships(concepts, concept_ids, number_ids)
+            if options['prune']:
+                self.prune(values, concept_ids)
+            # bulk writes send no signal, so the catalog is reloaded here.
+            catalog.invalidate()
+
+    def report(self, message):
+        if self.verbosity > 1:
+            elapsed = time.perf_counter() - self.started
+            self.stdout.write(f'{message} ({elapsed:.2f} s)')
+
+    def sync_numbers(self, values):
+        """Create the missing numbers, and return the ids by value."""
+        existing = {}
+        self.duplicate_number_ids = []
+        for number_id, value, name in NumberModel.objects.filter(
+            value__gte=values.start, value__lt=values.stop,
+        ).order_by('id').values_list('id', 'value', 'name'):
+            if value in existing:
+                self.duplicate_number_ids.append(number_id)
+            else:
+                existing[value] = (number_id, name)
+
+        missing = [value for value in values if value not in existing]
+        created = insert_columns(
+            NumberModel,
+            ['value', 'name'],
+            [missing, NumberToWords.convert_many(missing)],
+            returning=['id', 'value'],
+        )
+        renamed = [
+            NumberModel(id=number_id, name=words)
+            for (number_id, name), words in zip(
+                existing.values(), NumberToWords.convert_many(existing),
             )
-            for number in arth['numbers']:
-                ac.add_number(NumberModel.objects.get(value=number))
-            ac.save()
+            if name != words
+        ]
+        NumberModel.objects.bulk_update(renamed, ['name'], BATCH_SIZE)
+        self.report(
+            f'Numbers: {len(created)} created, {len(renamed)} renamed.'
+        )
+
+        number_ids = {
+            value: number_id for value, (number_id, _) in existing.items()
+        }
+        number_ids.update({value: number_id for number_id, value in created})
+        return number_ids
+
+    def sync_concepts(self, concepts):
+        """Create or update the concepts, and return the ids by name."""
+        existing = {}
+        for arith in ArithmeticalConceptModel.objects.filter(
+            name__in=[arth['name'] for arth in concepts],
+        ).order_by('id'):
+            existing.setdefault(arith.name, arith)
+
+        fields = ['description', 'count', 'rule_kind', 'rule_params']
+        created, updated = [], []
+        for arth in concepts:
+            arith = existing.get(arth['name'])
+            if arith is None:
+                created.append(ArithmeticalConceptModel(
+                    name=arth['name'],
+                    **{field: arth[field] for field in fields},
+                ))
+            elif any(getattr(arith, field) != arth[field]
+                     for field in fields):
+                for field in fields:
+                    setattr(arith, field, arth[field])
+                updated.append(arith)
+        ArithmeticalConceptModel.objects.bulk_create(created)
+        ArithmeticalConceptModel.objects.bulk_update(updated, fields)
+        self.report(
+            f'Concepts: {len(created)} created, {len(updated)} updated.'
+        )
+
+        concept_ids = {name: arith.id for name, arith in existing.items()}
+        concept_ids.update({arith.name: arith.id for arith in created})
+        return concept_ids
+
+    def sync_memberships(self, concepts, concept_ids, number_ids):
+        """Add and remove the numbers of the concepts."""
+        through = ArithmeticalConceptModel.numbers.through
+        added = removed = 0
+        for arth in concepts:
+            concept_id = concept_ids[arth['name']]
+            wanted = {number_ids[number] for number in arth['numbers']}
+            existing = dict(through.objects.filter(
+                arithmeticalconceptmodel_id=concept_id,
+            ).values_list('numbermodel_id', 'id'))
+
+            new = [
+                number_id for number_id in wanted if number_id not in existing
+            ]
+            rows = insert_columns(
+                through,
+                ['arithmeticalconceptmodel', 'numbermodel'],
+                [[concept_id] * len(new), new],
+            )
+            added += len(rows)
+            stale = [
+                row_id for number_id, row_id in existing.items()
+                if number_id not in wanted
+            ]
+            for start in range(0, len(stale), BATCH_SIZE):
+                through.objects.filter(
+                    id__in=stale[start:start + BATCH_SIZE],
+                ).delete()
+            removed += len(stale)
+        self.report(f'Memberships: {added} added, {removed} removed.')
+
+    def prune(self, values, concept_ids):
+        """Delete the numbers and concepts outside the defaults."""
+        numbers, _ = NumberModel.objects.exclude(
+            value__gte=values.start, value__lt=values.stop,
+        ).delete()
+        for start in range(0, len(self.duplicate_number_ids), BATCH_SIZE):
+            deleted, _ = NumberModel.objects.filter(
+                id__in=self.duplicate_number_ids[start:start + BATCH_SIZE],
+            ).delete()
+            numbers += deleted
+        concepts, _ = ArithmeticalConceptModel.objects.exclude(
+            id__in=concept_ids.values(),
+        ).delete()
+        self.report(f'Pruned: {numbers} rows of numbers, '
+                    f'{concepts} rows of concepts.')
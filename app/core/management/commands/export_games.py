@@ -0,0 +1,53 @@
+"""
+Django command to export the games and their moves as NDJSON.
+
+Each line holds a game, its user, its hidden concept, its state and its
+moves in order (see core.export). With --since, only the games created
+or moved on since then are exported, for incremental exports.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.export import (
+    CHUNK_SIZE,
+    export_ndjson,
+    parse_since,
+)
+
+
+class Command(BaseCommand):
+    """Django command to export the games."""
+
+    help = 'Export the games and their moves as newline-delimited JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            help='Only export the games created or moved on since this '
+                 'ISO 8601 datetime.',
+        )
+        parser.add_argument(
+            '--output', '-o',
+            help='File to write to, instead of the standard output.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Games read per round trip.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        since = None
+        if options['since']:
+            since = parse_since(options['since'])
+            if since is None:
+                raise CommandError('The --since datetime is not valid.')
+        if options['chunk_size'] < 1:
+            raise CommandError('The chunk size must be positive.')
+
+        lines = export_ndjson(since, options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
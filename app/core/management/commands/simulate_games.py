@@ -0,0 +1,152 @@
+"""
+Django command to play games end to end and measure the game engine.
+
+Games are created with GameModel.objects.create and played with
+GameMoveModel.objects.create, as the API does, by a pluggable strategy
+picking the number of each move.
+"""
+import random
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import Phase
+from core.catalog import get_catalog
+from core.hints import best_split
+from core.models import (
+    GameModel,
+    GameState,
+    GameMoveModel,
+)
+
+
+def random_strategy(game, played, catalog, rng):
+    """Play a random possible number not played yet."""
+    numbers = [
+        value for value in game.get_possible_numbers()
+        if value not in played
+    ]
+    if not numbers:
+        return None
+    return rng.choice(numbers)
+
+
+def greedy_split_strategy(game, played, catalog, rng):
+    """Play the number splitting the possible ariths best."""
+    hint = best_split(catalog, game.get_possible_ariths())
+    if hint is None:
+        return None
+    return hint.value
+
+
+STRATEGIES = {
+    'random': random_strategy,
+    'greedy-split': greedy_split_strategy,
+}
+
+
+class Command(BaseCommand):
+    """Django command to simulate games."""
+
+    help = 'Play games end to end and report the engine throughput.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--games', type=int, default=1000,
+            help='Number of games to play.',
+        )
+        parser.add_argument(
+            '--users', type=int, default=10,
+            help='Number of users playing the games.',
+        )
+        parser.add_argument(
+            '--strategy', choices=sorted(STRATEGIES), default='random',
+            help='Strategy picking the number of each move.',
+        )
+        parser.add_argument(
+            '--max-moves', type=int, default=100,
+            help='Give up a game after this many moves.',
+        )
+        parser.add_argument(
+            '--seed', type=int, default=None,
+            help='Seed of the random strategy.',
+        )
+        parser.add_argument(
+            '--keep', action='store_true',
+            help='Keep the simulated users and games.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if not get_catalog().concept_ids:
+            raise CommandError(
+                'No arithmetical concept, run '
+                'create_default_arithmetical_concept first.'
+            )
+        rng = random.Random(options['seed'])
+        strategy = STRATEGIES[options['strategy']]
+
+        users_phase = Phase('create users')
+        games_phase = Phase('create games')
+        moves_phase = Phase('moves')
+        with users_phase.measure():
+            users = self.create_users(options['users'])
+
+        won = 0
+        start = time.perf_counter()
+        try:
+            for i in range(options['games']):
+                with games_phase.measure():
+                    game = GameModel.objects.create(user=users[i % len(users)])
+                won += self.play(
+                    game, strategy, rng, options['max_moves'], moves_phase,
+                )
+        finally:
+            elapsed = time.perf_counter() - start
+            if not options['keep']:
+                get_user_model().objects.filter(
+                    id__in=[user.id for user in users],
+                ).delete()
+
+        games = len(games_phase.timings)
+        moves = len(moves_phase.timings)
+        for phase in [users_phase, games_phase, moves_phase]:
+            self.stdout.write(phase.summary())
+        self.stdout.write(
+            f'{games} games ({won} won) and {moves} moves in {elapsed:.2f} s: '
+            f'{games / elapsed:.1f} games/s, {moves / elapsed:.1f} moves/s, '
+            f'{moves / max(games, 1):.2f} moves/game'
+        )
+
+    def create_users(self, count):
+        """Create the users playing the games."""
+        run = uuid.uuid4().hex[:6]
+        users = []
+        for i in range(count):
+            user = get_user_model()(
+                user_name=f'sim{run}{i}',
+                nick_name=f'sim{run}{i}',
+                email=f'sim{run}{i}@simulation.local',
+            )
+            # hashing a real password would dominate the phase.
+            user.set_unusable_password()
+            users.append(user)
+        return get_user_model().objects.bulk_create(users)
+
+    def play(self, game, strategy, rng, max_moves, moves_phase):
+        """Play a game until it is won, and return True if it was."""
+        catalog = get_catalog()
+        played = set()
+        for _ in range(max_moves):
+            if game.game_state == GameState.WON:
+                return True
+            value = strategy(game, played, catalog, rng)
+            if value is None:
+                return False
+            played.add(value)
+            number = catalog.number_instance(value)
+            with moves_phase.measure():
+                GameMoveModel.objects.create(game=game, number=number)
+        return game.game_state == GameState.WON
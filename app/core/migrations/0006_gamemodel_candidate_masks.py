@@ -0,0 +1,108 @@
+# Generated by Django 3.2.25 on 2026-10-18 05:31
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+BATCH_SIZE = 1000
+
+
+def to_bytes(mask):
+    return mask.to_bytes((mask.bit_length() + 7) // 8, 'little')
+
+
+def from_bytes(data):
+    return int.from_bytes(bytes(data), 'little')
+
+
+def bits(mask):
+    return [i for i, bit in enumerate(bin(mask)[:1:-1]) if bit == '1']
+
+
+def game_batches(GameModel):
+    last_id = 0
+    while True:
+        games = list(
+            GameModel.objects.filter(id__gt=last_id).order_by('id')[:BATCH_SIZE]
+        )
+        if not games:
+            return
+        yield games
+        last_id = games[-1].id
+
+
+def fill_masks(apps, schema_editor):
+    GameModel = apps.get_model('core', 'GameModel')
+    ariths_through = GameModel.possible_ariths.through
+    numbers_through = GameModel.possible_numbers.through
+    for games in game_batches(GameModel):
+        ids = [game.id for game in games]
+        ariths = defaultdict(int)
+        numbers = defaultdict(int)
+        rows = ariths_through.objects.filter(gamemodel_id__in=ids).values_list(
+            'gamemodel_id', 'arithmeticalconceptmodel_id',
+        )
+        for game_id, arith_id in rows:
+            ariths[game_id] |= 1 << arith_id
+        rows = numbers_through.objects.filter(gamemodel_id__in=ids).values_list(
+            'gamemodel_id', 'numbermodel__value',
+        )
+        for game_id, value in rows:
+            numbers[game_id] |= 1 << value
+        for game in games:
+            game.possible_ariths_mask = to_bytes(ariths[game.id])
+            game.possible_numbers_mask = to_bytes(numbers[game.id])
+        GameModel.objects.bulk_update(
+            games,
+            ['possible_ariths_mask', 'possible_numbers_mask'],
+        )
+
+
+def fill_through_tables(apps, schema_editor):
+    GameModel = apps.get_model('core', 'GameModel')
+    NumberModel = apps.get_model('core', 'NumberModel')
+    ariths_through = GameModel.possible_ariths.through
+    numbers_through = GameModel.possible_numbers.through
+    number_ids = dict(NumberModel.objects.values_list('value', 'id'))
+    for games in game_batches(GameModel):
+        ariths_through.objects.bulk_create([
+            ariths_through(gamemodel_id=game.id, arithmeticalconceptmodel_id=id)
+            for game in games
+            for id in bits(from_bytes(game.possible_ariths_mask))
+        ])
+        numbers_through.objects.bulk_create([
+            numbers_through(gamemodel_id=game.id, numbermodel_id=number_ids[value])
+            for game in games
+            for value in bits(from_bytes(game.possible_numbers_mask))
+            if value in number_ids
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_gamemodel_game_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gamemodel',
+            name='possible_ariths_mask',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AddField(
+            model_name='gamemodel',
+            name='possible_numbers_mask',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.RunPython(fill_masks, fill_through_tables),
+        migrations.RemoveField(
+            model_name='gamemodel',
+            name='possible_ariths',
+        ),
+        migrations.RemoveField(
+            model_name='gamemodel',
+            name='possible_numbers',
+        ),
+    ]
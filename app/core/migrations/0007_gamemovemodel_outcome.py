@@ -0,0 +1,67 @@
+# Generated by Django 3.2.25 on 2026-10-18 05:36
+
+from django.db import migrations, models
+
+
+BATCH_SIZE = 1000
+
+
+def fill_outcomes(apps, schema_editor):
+    GameMoveModel = apps.get_model('core', 'GameMoveModel')
+    ArithmeticalConceptModel = apps.get_model(
+        'core', 'ArithmeticalConceptModel',
+    )
+    memberships = set(
+        ArithmeticalConceptModel.numbers.through.objects.values_list(
+            'arithmeticalconceptmodel_id', 'numbermodel_id',
+        )
+    )
+    last_id = 0
+    while True:
+        moves = list(
+            GameMoveModel.objects.filter(id__gt=last_id).order_by('id')
+            .select_related('number', 'game')
+            .only(
+                'id', 'number', 'game',
+                'number__value', 'game__hidden_arith_concept_id',
+            )
+            [:BATCH_SIZE]
+        )
+        if not moves:
+            return
+        for move in moves:
+            move.number_value = move.number.value
+            move.in_hidden = (
+                move.game.hidden_arith_concept_id,
+                move.number_id,
+            ) in memberships
+        GameMoveModel.objects.bulk_update(
+            moves,
+            ['number_value', 'in_hidden'],
+        )
+        last_id = moves[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_gamemodel_candidate_masks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gamemovemodel',
+            name='in_hidden',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='gamemovemodel',
+            name='number_value',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(fill_outcomes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='gamemovemodel',
+            index=models.Index(fields=['game', 'created_on'], name='core_gamemo_game_id_618776_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 06:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_gamemovemodel_outcome'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gamemodel',
+            index=models.Index(fields=['created_on', 'id'], name='core_gamemo_created_a8c9fc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gamemodel',
+            index=models.Index(fields=['user', 'created_on', 'id'], name='core_gamemo_user_id_655c13_idx'),
+        ),
+    ]
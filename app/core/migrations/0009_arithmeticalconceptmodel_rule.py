@@ -0,0 +1,23 @@
+# Generated by Django 3.2.25 on 2026-10-18 07:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_gamemodel_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='arithmeticalconceptmodel',
+            name='rule_kind',
+            field=models.CharField(choices=[('list', 'Explicit list of numbers'), ('residue', 'Numbers with a given remainder'), ('power', 'Powers of a base, plus an offset'), ('square', 'Square numbers')], default='list', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='arithmeticalconceptmodel',
+            name='rule_params',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 3.2.25 on 2026-10-18 07:25
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+BATCH_SIZE = 1000
+
+
+def fill_stats(apps, schema_editor):
+    GameModel = apps.get_model('core', 'GameModel')
+    GameMoveModel = apps.get_model('core', 'GameMoveModel')
+    UserStatsModel = apps.get_model('core', 'UserStatsModel')
+    moves = GameMoveModel.objects.filter(
+        game=OuterRef('pk'),
+    ).order_by().values('game').annotate(count=Count('id')).values('count')
+    GameModel.objects.update(moves_count=Coalesce(Subquery(moves), 0))
+
+    won = Q(game_state='Win.')
+    stats = {
+        row['user']: row
+        for row in GameModel.objects.filter(moves_count__gt=0).order_by()
+        .values('user').annotate(
+            played=Count('id'),
+            won=Count('id', filter=won),
+            win_moves=Coalesce(Sum('moves_count', filter=won), 0),
+        )
+    }
+    User = apps.get_model('core', 'User')
+    empty = {'played': 0, 'won': 0, 'win_moves': 0}
+    UserStatsModel.objects.bulk_create(
+        [
+            UserStatsModel(
+                user_id=user_id,
+                games_played=stats.get(user_id, empty)['played'],
+                games_won=stats.get(user_id, empty)['won'],
+                win_moves=stats.get(user_id, empty)['win_moves'],
+            )
+            for user_id in User.objects.values_list('id', flat=True)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_user_email_lower_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStatsModel',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='core.user')),
+                ('games_played', models.IntegerField(default=0)),
+                ('games_won', models.IntegerField(default=0)),
+                ('win_moves', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='gamemodel',
+            name='moves_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='userstatsmodel',
+            index=models.Index(fields=['-games_won', 'win_moves', 'user'], name='core_userstats_ranking_idx'),
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
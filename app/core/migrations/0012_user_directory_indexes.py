@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 07:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_user_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['created_on', 'id'], name='core_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['user_name'], name='core_user_name_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
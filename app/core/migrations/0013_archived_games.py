@@ -0,0 +1,32 @@
+# Generated by Django 3.2.25 on 2026-10-18 07:44
+
+import core.models
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_user_directory_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedGameModel',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('created_on', models.DateTimeField()),
+                ('archived_on', models.DateTimeField(auto_now_add=True)),
+                ('possible_ariths_mask', models.BinaryField(default=b'')),
+                ('possible_numbers_mask', models.BinaryField(default=b'')),
+                ('game_state', models.CharField(max_length=10)),
+                ('moves_count', models.IntegerField(default=0)),
+                ('moves', models.BinaryField(default=b'')),
+                ('hidden_arith_concept', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.arithmeticalconceptmodel')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            bases=(core.models.GameStateMixin, models.Model),
+        ),
+    ]
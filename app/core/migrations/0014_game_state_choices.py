@@ -0,0 +1,55 @@
+# Generated by Django 3.2.25 on 2026-10-18 07:46
+
+from django.db import migrations, models
+from django.db.models import Case, Value, When
+
+
+# labels stored before the states were integers, by state value.
+LABELS = {'0': 'Runing...', '1': 'Win.'}
+
+
+def labels_to_values(apps, schema_editor):
+    for model_name in ['GameModel', 'ArchivedGameModel']:
+        model = apps.get_model('core', model_name)
+        model.objects.update(game_state=Case(
+            When(game_state=LABELS['1'], then=Value('1')),
+            default=Value('0'),
+        ))
+
+
+def values_to_labels(apps, schema_editor):
+    for model_name in ['GameModel', 'ArchivedGameModel']:
+        model = apps.get_model('core', model_name)
+        model.objects.update(game_state=Case(
+            When(game_state='1', then=Value(LABELS['1'])),
+            default=Value(LABELS['0']),
+        ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_archived_games'),
+    ]
+
+    operations = [
+        migrations.RunPython(labels_to_values, values_to_labels),
+        migrations.AlterField(
+            model_name='archivedgamemodel',
+            name='game_state',
+            field=models.SmallIntegerField(choices=[(0, 'Runing...'), (1, 'Win.')]),
+        ),
+        migrations.AlterField(
+            model_name='gamemodel',
+            name='game_state',
+            field=models.SmallIntegerField(choices=[(0, 'Runing...'), (1, 'Win.')], default=0),
+        ),
+        migrations.AddIndex(
+            model_name='gamemodel',
+            index=models.Index(fields=['game_state', 'created_on', 'id'], name='core_game_state_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gamemodel',
+            index=models.Index(condition=models.Q(('game_state', 0)), fields=['user', 'created_on', 'id'], name='core_game_running_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 3.2.25 on 2026-10-18 07:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_game_state_choices'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogVersionModel',
+            fields=[
+                ('id', models.IntegerField(default=1, primary_key=True, serialize=False)),
+                ('version', models.CharField(max_length=32)),
+            ],
+        ),
+    ]
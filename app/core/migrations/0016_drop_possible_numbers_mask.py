@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:26
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_catalog_version'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='archivedgamemodel',
+            name='possible_numbers_mask',
+        ),
+        migrations.RemoveField(
+            model_name='gamemodel',
+            name='possible_numbers_mask',
+        ),
+    ]
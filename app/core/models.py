@@ -1,16 +1,25 @@
 """
 Database models.
 """
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Lower, Mod
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
     PermissionsMixin,
 )
 from django.conf import settings
+from django.core.exceptions import ValidationError
 
 from core.utils import NumberToWords
+from core import engine
+from core import catalog
+from core import events
+from core import rules
+import datetime
 import random
+import struct
+from collections import defaultdict
 
 
 def is_email_valid(email):
@@ -65,6 +74,22 @@ class UserManager(BaseUserManager):
 
         return user
 
+    def get_for_login(self, login):
+        """Return the user with the given user name or email, or None.
+
+        User names are stored lowercase and emails are compared ignoring
+        case, so a single query resolves both through their indexes. A
+        user name match wins over an email match.
+        """
+        login = login.lower()
+        users = list(self.annotate(email_lower=Lower('email')).filter(
+            models.Q(user_name=login) | models.Q(email_lower=login),
+        ).order_by('id'))
+        for user in users:
+            if user.user_name == login:
+                return user
+        return users[0] if users else None
+
     def create_superuser(self, user_name, email, password, **extra_fields):
         """Create, save and return a superuser."""
         user = self.create_user(user_name, email, password, **extra_fields)
@@ -87,6 +112,17 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     USERNAME_FIELD = 'user_name'
 
+    class Meta:
+        indexes = [
+            models.Index(Lower('email'), name='core_user_email_lower_idx'),
+            models.Index(fields=['created_on', 'id'],
+                         name='core_user_created_idx'),
+            # serves the prefix searches (LIKE 'prefix%') of user names.
+            models.Index(fields=['user_name'],
+                         opclasses=['varchar_pattern_ops'],
+                         name='core_user_name_prefix_idx'),
+        ]
+
 
 class NumberModel(models.Model):
     """Number object."""
@@ -97,17 +133,33 @@ class NumberModel(models.Model):
         self.name = NumberToWords.convert(self.value)
         return super().save(*args, **kwargs)
 
+    def get_arithmetical_concepts(self):
+        """Return the concepts holding the number, listed or by rule."""
+        ariths = list(self.arithmetical_concepts.all())
+        ariths += [
+            arith for arith in ArithmeticalConceptModel.objects.exclude(
+                rule_kind=rules.LIST,
+            ).order_by('id')
+            if arith.get_rule().contains(self.value)
+        ]
+        return ariths
+
     def __str__(self):
         ret = f"{self.name} :({self.value}), found in:"
         ret += "{\n"
-        for arith in self.arithmetical_concepts.all():
+        for arith in self.get_arithmetical_concepts():
             ret += "    " + arith.name + ',\n'
         ret += "}\n"
         return ret
 
 
 class ArithmeticalConceptModel(models.Model):
-    """Arithmetical Concept object."""
+    """Arithmetical Concept object.
+
+    The numbers of a concept are either listed in `numbers` (the `list`
+    rule kind), or selected by a rule evaluated on demand (see
+    core.rules), in which case `numbers` stays empty.
+    """
     name = models.CharField(max_length=255)
     description = models.TextField(blank=False)
     count = models.IntegerField(default=0)
@@ -116,42 +168,162 @@ class ArithmeticalConceptModel(models.Model):
         related_name='arithmetical_concepts',
         blank=True
     )
+    rule_kind = models.CharField(
+        max_length=16,
+        choices=rules.RULE_CHOICES,
+        default=rules.LIST,
+    )
+    rule_params = models.JSONField(default=dict, blank=True)
+
+    def is_rule(self):
+        return self.rule_kind != rules.LIST
+
+    def get_rule(self):
+        """Return the rule selecting the numbers of a rule concept."""
+        return rules.get_rule(self.rule_kind, self.rule_params)
+
+    def clean(self):
+        if self.is_rule():
+            try:
+                self.get_rule()
+            except ValueError as error:
+                raise ValidationError({'rule_params': str(error)})
 
     def add_number(self, number):
+        if self.is_rule():
+            raise ValueError('The numbers of a rule concept are not listed.')
         self.numbers.add(number)
         self.count = self.numbers.all().count()
         self.save()
         return self
 
     def has_number(self, number):
+        if self.is_rule():
+            return self.get_rule().contains(number.value)
         num_exists = self.numbers.all().filter(
             value=number.value
         ).exists()
         return num_exists
 
+    def iter_values(self, low, high):
+        """Generate the values of the numbers between low and high.
+
+        The values of a rule concept are generated without a query, so
+        they are not checked against the stored numbers.
+        """
+        if self.is_rule():
+            return self.get_rule().values(low, high)
+        return self.numbers.filter(
+            value__gte=low, value__lte=high,
+        ).order_by('value').values_list('value', flat=True).iterator()
+
+    def get_numbers(self):
+        """Return the queryset of the numbers of the concept."""
+        if not self.is_rule():
+            return self.numbers.all()
+        rule = self.get_rule()
+        numbers = NumberModel.objects.all()
+        if rule.min is not None:
+            numbers = numbers.filter(value__gte=rule.min)
+        if rule.max is not None:
+            numbers = numbers.filter(value__lte=rule.max)
+        if isinstance(rule, rules.ResidueRule):
+            # the remainder of a negative value is negative in SQL.
+            return numbers.annotate(
+                remainder=Mod('value', rule.modulus),
+            ).filter(remainder__in={
+                rule.remainder, rule.remainder - rule.modulus,
+            })
+        # the other rules select few numbers, which are generated.
+        high = numbers.aggregate(high=models.Max('value'))['high']
+        if high is None:
+            return numbers.none()
+        return numbers.filter(value__in=list(rule.values(0, high)))
+
     def __str__(self):
         ret = f"{self.name} has {self.count} numbers."
         ret += "\n Numbers = {"
-        for num in self.numbers.all():
+        for num in self.get_numbers().order_by('value'):
             ret += f"{num.value}, "
         ret += "}\n"
         return ret
 
 
+class CatalogVersionModel(models.Model):
+    """Version token of the numbers and concepts, in a single row.
+
+    The token is replaced in the transaction changing the catalog, and
+    tags the snapshots of the workers (see core.catalog).
+    """
+    ID = 1
+
+    id = models.IntegerField(primary_key=True, default=ID)
+    version = models.CharField(max_length=32)
+
+
 class GameMoveManager(models.Manager):
     """ Manager for game move."""
     def create(self, game, number):
-        "create game move."
-        num_exists = game.possible_numbers.all().filter(
-            value=number.value,
-        ).exists()
-        if not num_exists:
-            return None
-        move = super().create(game=game, number=number)
-        game.update_state_with_move(move)
-        game.save()
+        """create game move.
+
+        The game row stays locked until the move is saved, so parallel
+        moves on the same game are applied one after the other.
+        """
+        with transaction.atomic(using=self.db):
+            GameModel.objects.refresh_for_update(game)
+            snapshot = catalog.get_catalog()
+            if not game.is_possible_number(number.value, snapshot):
+                return None
+            outcome = game.move_outcome(number.value, snapshot)
+            move = super().create(
+                game=game,
+                number=number,
+                number_value=number.value,
+                in_hidden=outcome.in_hidden,
+            )
+            won = game.update_state_with_move(move, outcome)
+            game.save(update_fields=GameModel.STATE_FIELDS)
+            # the row lock makes the first move and the win happen once.
+            UserStatsModel.objects.record_moves(game, 1, won)
+            events.publish_moves(game, [move], using=self.db)
         return move
 
+    def create_many(self, game, numbers):
+        """Play a sequence of numbers on a game in one transaction.
+
+        The numbers are played in order while the game row is locked, and
+        the sequence stops once the game is won. Numbers that are not
+        possible any more are skipped. Returns a (number, outcome) pair
+        for each number tried, with a None outcome when it was skipped.
+        """
+        snapshot = catalog.get_catalog()
+        results, moves = [], []
+        won = False
+        with transaction.atomic(using=self.db):
+            GameModel.objects.refresh_for_update(game)
+            for number in numbers:
+                if game.game_state == GameState.WON:
+                    break
+                if not game.is_possible_number(number.value, snapshot):
+                    results.append((number, None))
+                    continue
+                outcome = game.move_outcome(number.value, snapshot)
+                move = self.model(
+                    game=game,
+                    number=number,
+                    number_value=number.value,
+                    in_hidden=outcome.in_hidden,
+                )
+                won = game.update_state_with_move(move, outcome)
+                moves.append(move)
+                results.append((number, outcome))
+            if moves:
+                self.bulk_create(moves)
+                game.save(update_fields=GameModel.STATE_FIELDS)
+                UserStatsModel.objects.record_moves(game, len(moves), won)
+                events.publish_moves(game, moves, using=self.db)
+        return results
+
 
 class GameMoveModel(models.Model):
     """Game move object."""
@@ -166,53 +338,87 @@ class GameMoveModel(models.Model):
         on_delete=models.CASCADE,
         related_name='+',
     )
+    number_value = models.IntegerField(default=0)
+    in_hidden = models.BooleanField(default=False)
     objects = GameMoveManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['game', 'created_on']),
+        ]
+
 
 class GameManager(models.Manager):
     """Manager for games."""
     def create(self, **game_data):
-        game = super().create(**game_data)
-        game = self.set_hidden_arith(game)
-        game = self.add_possible_ariths(game)
-        game.save()
+        game = self.model(**game_data)
+        self.create_games([game])
         return game
 
-    def set_hidden_arith(self, game):
-        arith_count = ArithmeticalConceptModel.objects.all().count()
-        arith_index = random.randint(0, arith_count-1)
-        hidden_arith = ArithmeticalConceptModel.objects.all()[arith_index]
-        game.hidden_arith_concept = hidden_arith
-        game = self.add_possible_arith(game, hidden_arith)
-        game.save()
+    def create_games(self, games):
+        """Set up and save the given new games with a single bulk insert."""
+        snapshot = catalog.get_catalog()
+        for game in games:
+            self.set_hidden_arith(game, snapshot)
+        return self.bulk_create(games)
+
+    def refresh_for_update(self, game):
+        """Lock the row of a game until the end of the transaction, and
+        reload its state from it."""
+        locked = self.select_for_update().only(
+            *self.model.STATE_FIELDS
+        ).get(pk=game.pk)
+        for field in self.model.STATE_FIELDS:
+            setattr(game, field, getattr(locked, field))
         return game
 
-    def add_possible_ariths(self, game):
-        arith_count = ArithmeticalConceptModel.objects.all().count()
-        arith_ids = list(range(0, arith_count))
-        possible_ariths_ids = random.sample(arith_ids, 7)
-        for possible_ariths_id in possible_ariths_ids:
-            arith_model = ArithmeticalConceptModel.objects.all()
-            possible_arith = arith_model[possible_ariths_id]
-            game = self.add_possible_arith(game, possible_arith)
-        game.save()
+    def set_hidden_arith(self, game, snapshot):
+        """Pick the hidden arith and the possible ariths of a game."""
+        hidden_arith_id = random.choice(snapshot.concept_ids)
+        game.hidden_arith_concept_id = hidden_arith_id
+        possible_ariths = set(random.sample(snapshot.concept_ids, 7))
+        possible_ariths.add(hidden_arith_id)
+        game.set_possible_ariths(possible_ariths)
         return game
 
-    def add_possible_arith(self, game, arith):
-        game.possible_ariths.add(arith)
-        for number in arith.numbers.all():
-            game = self.add_possible_number(game, number)
-        game.save()
-        return game
 
-    def add_possible_number(self, game, number):
-        game.possible_numbers.add(number)
-        game.save()
-        return game
+class GameState(models.IntegerChoices):
+    """State of a game, labelled as the API shows it."""
+    RUNNING = 0, 'Runing...'
+    WON = 1, 'Win.'
+
+
+class GameStateMixin:
+    """Read the possible ariths stored as a mask, and the possible numbers
+    derived from them."""
+
+    def get_possible_ariths(self):
+        """Return the ids of the possible ariths."""
+        return engine.values_from_mask(
+            engine.mask_from_bytes(self.possible_ariths_mask)
+        )
 
+    def get_possible_numbers(self, limit=None, snapshot=None):
+        """Return the values of the possible numbers, in increasing order,
+        at most limit of them."""
+        if snapshot is None:
+            snapshot = catalog.get_catalog()
+        return snapshot.possible_values(self.get_possible_ariths(), limit)
 
-class GameModel(models.Model):
-    """Game object."""
+    def is_possible_number(self, value, snapshot=None):
+        """Return True if the number can be played."""
+        if snapshot is None:
+            snapshot = catalog.get_catalog()
+        return snapshot.is_possible(self.get_possible_ariths(), value)
+
+
+class GameModel(GameStateMixin, models.Model):
+    """Game object.
+
+    The possible ariths are kept as a mask of concept ids (see
+    core.engine). The possible numbers are the numbers of the possible
+    ariths, read from the catalog rather than stored.
+    """
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -224,39 +430,246 @@ class GameModel(models.Model):
         related_name='+',
         null=True,
     )
-    possible_ariths = models.ManyToManyField(
-        'ArithmeticalConceptModel',
+    possible_ariths_mask = models.BinaryField(default=b'')
+    game_state = models.SmallIntegerField(
+        choices=GameState.choices,
+        default=GameState.RUNNING,
+    )
+    moves_count = models.IntegerField(default=0)
+    objects = GameManager()
+
+    STATE_FIELDS = [
+        'possible_ariths_mask',
+        'game_state',
+        'moves_count',
+    ]
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_on', 'id']),
+            models.Index(fields=['user', 'created_on', 'id']),
+            models.Index(
+                fields=['game_state', 'created_on', 'id'],
+                name='core_game_state_created_idx',
+            ),
+            # the running games are few, and the ones played on.
+            models.Index(
+                fields=['user', 'created_on', 'id'],
+                condition=models.Q(game_state=GameState.RUNNING),
+                name='core_game_running_idx',
+            ),
+        ]
+
+    def set_possible_ariths(self, arith_ids):
+        """Store the possible ariths."""
+        self.possible_ariths_mask = engine.mask_to_bytes(
+            engine.mask_from_values(arith_ids)
+        )
+
+    def move_outcome(self, value, snapshot=None):
+        """Return the outcome of playing the given number."""
+        if snapshot is None:
+            snapshot = catalog.get_catalog()
+        return engine.apply_move(
+            snapshot.contains,
+            self.hidden_arith_concept_id,
+            self.get_possible_ariths(),
+            value,
+        )
+
+    def update_state_with_move(self, move, outcome=None):
+        """Apply a move to the state, and return True if it wins."""
+        if outcome is None:
+            outcome = self.move_outcome(move.number_value)
+        self.set_possible_ariths(outcome.possible_ariths)
+        self.moves_count += 1
+        return self.update_game_state()
+
+    def update_game_state(self):
+        """Update the state, and return True if the game was just won."""
+        if (self.game_state != GameState.WON
+                and len(self.get_possible_ariths()) == 1):
+            self.game_state = GameState.WON
+            return True
+        return False
+
+
+class ArchivedGameManager(models.Manager):
+    """Manager for archived games."""
+    def archive(self, before, batch_size):
+        """Move a batch of the games won before a datetime to the archive,
+        and return the number of games moved.
+
+        Games locked by a move in progress are left for a later batch.
+        """
+        with transaction.atomic(using=self.db):
+            games = list(GameModel.objects.filter(
+                game_state=GameState.WON,
+                created_on__lt=before,
+            ).order_by('id').select_for_update(skip_locked=True)[:batch_size])
+            if not games:
+                return 0
+            ids = [game.id for game in games]
+            moves = defaultdict(list)
+            for game_id, *move in GameMoveModel.objects.filter(
+                game_id__in=ids,
+            ).order_by('game_id', 'created_on', 'id').values_list(
+                'game_id', 'number_value', 'in_hidden', 'created_on',
+            ):
+                moves[game_id].append(move)
+            self.bulk_create([
+                self.model.from_game(game, moves[game.id]) for game in games
+            ])
+            # the moves of the games are deleted with them.
+            GameModel.objects.filter(id__in=ids).delete()
+        return len(games)
+
+
+class ArchivedGameModel(GameStateMixin, models.Model):
+    """Finished game moved out of the game tables, under its own id.
+
+    The final state is kept as in GameModel, and the moves are packed in
+    order into a single binary column (see pack_moves).
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
         related_name='+',
-        blank=True,
     )
-    possible_numbers = models.ManyToManyField(
-        'NumberModel',
+    created_on = models.DateTimeField()
+    archived_on = models.DateTimeField(auto_now_add=True)
+    hidden_arith_concept = models.ForeignKey(
+        'ArithmeticalConceptModel',
+        on_delete=models.CASCADE,
         related_name='+',
-        blank=True,
+        null=True,
     )
-    game_state = models.CharField(max_length=10, default="Runing...")
-    objects = GameManager()
+    possible_ariths_mask = models.BinaryField(default=b'')
+    game_state = models.SmallIntegerField(choices=GameState.choices)
+    moves_count = models.IntegerField(default=0)
+    moves = models.BinaryField(default=b'')
+    objects = ArchivedGameManager()
+
+    # a move: microseconds since the epoch, number value and in hidden.
+    MOVE = struct.Struct('<qi?')
+    EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+    @classmethod
+    def pack_moves(cls, moves):
+        """Pack (number value, in hidden, created on) moves."""
+        tick = datetime.timedelta(microseconds=1)
+        return b''.join(
+            cls.MOVE.pack((created_on - cls.EPOCH) // tick, value, in_hidden)
+            for value, in_hidden, created_on in moves
+        )
 
-    def update_state_with_move(self, move):
-        valid_num = self.hidden_arith_concept.has_number(move.number)
-        to_delete = []
-        for arith in self.possible_ariths.all():
-            if valid_num and not arith.has_number(move.number):
-                to_delete.append(arith)
-            if not valid_num and arith.has_number(move.number):
-                to_delete.append(arith)
-
-        for arith in to_delete:
-            self.possible_ariths.remove(arith)
-        self.save()
-        self.possible_numbers.clear()
-        for arith in self.possible_ariths.all():
-            for number in arith.numbers.all():
-                self.possible_numbers.add(number)
-        self.save()
-        self.update_game_state()
+    def get_moves(self):
+        """Return the (number value, in hidden, created on) moves."""
+        return [
+            (
+                value,
+                in_hidden,
+                self.EPOCH + datetime.timedelta(microseconds=micros),
+            )
+            for micros, value, in_hidden in self.MOVE.iter_unpack(
+                bytes(self.moves),
+            )
+        ]
+
+    @classmethod
+    def from_game(cls, game, moves):
+        """Return the archive of a game and its moves."""
+        return cls(
+            id=game.id,
+            user_id=game.user_id,
+            created_on=game.created_on,
+            hidden_arith_concept_id=game.hidden_arith_concept_id,
+            possible_ariths_mask=game.possible_ariths_mask,
+            game_state=game.game_state,
+            moves_count=game.moves_count,
+            moves=cls.pack_moves(moves),
+        )
 
-    def update_game_state(self):
-        if self.possible_ariths.all().count() == 1:
-            self.game_state = 'Win.'
-            self.save()
+
+class UserStatsManager(models.Manager):
+    """Manager for user stats."""
+
+    def add(self, user_id, **deltas):
+        """Add the given deltas to the counters of a user.
+
+        The counters are updated with F() expressions, so concurrent
+        updates add up. The row is created with the user (see
+        core.signals), or here if it is missing.
+        """
+        values = {
+            field: models.F(field) + delta for field, delta in deltas.items()
+        }
+        if not self.filter(user_id=user_id).update(**values):
+            self.bulk_create([self.model(user_id=user_id)],
+                             ignore_conflicts=True)
+            self.filter(user_id=user_id).update(**values)
+
+    def record_moves(self, game, count, won):
+        """Count the last moves played on a game.
+
+        A game is counted on its first move, and its moves once it is won.
+        """
+        deltas = {}
+        if game.moves_count == count:
+            deltas['games_played'] = 1
+        if won:
+            deltas['games_won'] = 1
+            deltas['win_moves'] = game.moves_count
+        if deltas:
+            self.add(game.user_id, **deltas)
+
+    def leaderboard(self):
+        """Return the stats of the winners, best first."""
+        return self.filter(games_won__gt=0).order_by(*self.model.RANKING)
+
+    def rank(self, stats):
+        """Return the rank of the stats in the leaderboard, or None."""
+        if not stats.games_won:
+            return None
+        ahead = self.filter(games_won__gte=stats.games_won).filter(
+            models.Q(games_won__gt=stats.games_won)
+            | models.Q(win_moves__lt=stats.win_moves)
+            | models.Q(win_moves=stats.win_moves, user_id__lt=stats.user_id)
+        )
+        return ahead.count() + 1
+
+
+class UserStatsModel(models.Model):
+    """Game counters of a user, kept up to date by the moves.
+
+    A game is played once it has a move. Winners are ranked by games
+    won, then by total moves in won games (the lowest average moves to
+    win first), then by user id.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+    )
+    games_played = models.IntegerField(default=0)
+    games_won = models.IntegerField(default=0)
+    win_moves = models.IntegerField(default=0)
+    objects = UserStatsManager()
+
+    RANKING = ['-games_won', 'win_moves', 'user_id']
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['-games_won', 'win_moves', 'user'],
+                name='core_userstats_ranking_idx',
+            ),
+        ]
+
+    @property
+    def average_moves_to_win(self):
+        if not self.games_won:
+            return None
+        return self.win_moves / self.games_won
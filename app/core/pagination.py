@@ -0,0 +1,106 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A page is read by comparing the ordering fields with the values of the
+last row of the previous page, instead of skipping rows with OFFSET, so
+every page costs one index range scan whatever its depth. The cursor is
+an opaque token holding those values.
+"""
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+class InvalidPage(ValueError):
+    """Raised for a malformed cursor or limit."""
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """JSON encoder keeping the microseconds of datetimes, which
+    DjangoJSONEncoder drops, so that the cursor compares exactly."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values):
+    """Return the opaque cursor holding the given values."""
+    data = json.dumps(values, cls=CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return the values held by a cursor."""
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(data)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidPage('Invalid cursor.')
+    if not isinstance(values, list):
+        raise InvalidPage('Invalid cursor.')
+    return values
+
+
+def parse_limit(limit, maximum=MAX_LIMIT):
+    """Return the page size requested by the limit parameter."""
+    if limit in (None, ''):
+        return DEFAULT_LIMIT
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise InvalidPage('Invalid limit.')
+    if limit < 1:
+        raise InvalidPage('Invalid limit.')
+    return min(limit, maximum)
+
+
+def _after(queryset, fields, cursor):
+    """Filter the rows coming after the cursor in descending order."""
+    values = decode_cursor(cursor)
+    if len(values) != len(fields):
+        raise InvalidPage('Invalid cursor.')
+    try:
+        values = [
+            queryset.model._meta.get_field(field).to_python(value)
+            for field, value in zip(fields, values)
+        ]
+    except ValidationError:
+        raise InvalidPage('Invalid cursor.')
+    # (a, b) < (x, y)  <=>  a < x OR (a = x AND b < y)
+    condition = Q()
+    for i, field in enumerate(fields):
+        equal = {prefix: values[j] for j, prefix in enumerate(fields[:i])}
+        condition |= Q(**equal, **{f'{field}__lt': values[i]})
+    # the OR alone does not bound the index scan: a <= x does.
+    bound = Q(**{f'{fields[0]}__lte': values[0]})
+    return queryset.filter(bound & condition)
+
+
+def keyset_page(queryset, fields, cursor=None, limit=None,
+                max_limit=MAX_LIMIT):
+    """Return a page of rows in descending order of the fields.
+
+    Returns the rows and the cursor of the next page, which is None on
+    the last page. The last field must be unique.
+    """
+    limit = parse_limit(limit, max_limit)
+    if cursor:
+        queryset = _after(queryset, fields, cursor)
+    queryset = queryset.order_by(*[f'-{field}' for field in fields])
+    rows = list(queryset[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, field) for field in fields])
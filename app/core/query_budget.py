@@ -0,0 +1,169 @@
+"""
+SQL budget of the requests.
+
+QueryBudgetMiddleware, enabled by the QUERY_BUDGET_ENABLED setting,
+records the queries of each request: their count, their total time and
+the slowest one. It adds them to the response as the X-DB-Query-Count,
+X-DB-Time-Ms and X-DB-Slowest-Ms headers, and logs them on the
+core.query_budget logger.
+
+The middleware runs in both sync and async mode, so it does not pin
+the requests of an ASGI worker to one thread. The recorder of a request
+is held in a context variable, and every connection records the queries
+run in the context of a recorder: the queries of the request thread, of
+the sync views run by sync_to_async and of the thread pool of
+core.async_utils (run_db copies the context) are all counted. The
+queries of streamed bodies, run after the headers are sent, are not.
+
+QueryBudgetTestMixin pins the maximum number of queries of an endpoint
+in tests.
+"""
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+from django.test.utils import CaptureQueriesContext
+
+
+logger = logging.getLogger(__name__)
+
+_recorder = contextvars.ContextVar('query_recorder', default=None)
+
+
+class QueryRecorder:
+    """Execute wrapper recording the count and duration of queries."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest = 0.0
+        self.slowest_sql = ''
+        # queries of a request may run in several threads.
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add(sql, time.perf_counter() - start)
+
+    def add(self, sql, elapsed):
+        with self._lock:
+            self.count += 1
+            self.duration += elapsed
+            if elapsed >= self.slowest:
+                self.slowest = elapsed
+                self.slowest_sql = sql
+
+    @contextmanager
+    def record_context(self):
+        """Record the queries run in the current context, in any thread."""
+        token = _recorder.set(self)
+        try:
+            yield self
+        finally:
+            _recorder.reset(token)
+
+
+def record_context_queries(execute, sql, params, many, context):
+    """Execute wrapper recording a query with the recorder of the context,
+    if any."""
+    recorder = _recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_context_recording(connection, **kwargs):
+    """Add record_context_queries to the wrappers of a connection."""
+    if record_context_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_context_queries)
+
+
+class QueryBudgetMiddleware:
+    """Report the queries of each request in headers and logs."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.QUERY_BUDGET_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # mark the instance as a coroutine function, as Django's
+            # MiddlewareMixin does, so that the handler awaits it.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+        connection_created.connect(
+            install_context_recording,
+            dispatch_uid='query_budget',
+        )
+        for connection in connections.all():
+            install_context_recording(connection)
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        with recorder.record_context():
+            install_context_recording(connections[DEFAULT_DB_ALIAS])
+            response = self.get_response(request)
+        return self.report(request, response, recorder)
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        with recorder.record_context():
+            response = await self.get_response(request)
+        return self.report(request, response, recorder)
+
+    def report(self, request, response, recorder):
+        """Add the queries of a request to its response, and log them."""
+        response['X-DB-Query-Count'] = str(recorder.count)
+        response['X-DB-Time-Ms'] = f'{recorder.duration * 1000:.2f}'
+        response['X-DB-Slowest-Ms'] = f'{recorder.slowest * 1000:.2f}'
+        logger.info(
+            '%s %s %s queries=%d db_ms=%.2f slowest_ms=%.2f',
+            request.method,
+            request.path,
+            response.status_code,
+            recorder.count,
+            recorder.duration * 1000,
+            recorder.slowest * 1000,
+            extra={
+                'method': request.method,
+                'path': request.path,
+                'status_code': response.status_code,
+                'db_queries': recorder.count,
+                'db_time_ms': recorder.duration * 1000,
+                'db_slowest_ms': recorder.slowest * 1000,
+                'db_slowest_sql': recorder.slowest_sql,
+            },
+        )
+        return response
+
+
+class QueryBudgetTestMixin:
+    """TestCase mixin asserting a maximum number of queries."""
+
+    @contextmanager
+    def assertMaxQueries(self, maximum, using=DEFAULT_DB_ALIAS):
+        """Fail if the block runs more than the given number of queries."""
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+        queries = context.captured_queries
+        if len(queries) > maximum:
+            self.fail('%d queries executed, at most %d expected:\n%s' % (
+                len(queries),
+                maximum,
+                '\n'.join(
+                    '%d. %s' % (i, query['sql'])
+                    for i, query in enumerate(queries, start=1)
+                ),
+            ))
@@ -0,0 +1,166 @@
+"""
+Membership rules of the arithmetical concepts.
+
+A concept either lists its numbers explicitly (the `list` kind, stored
+as rows of ArithmeticalConceptModel.numbers) or is defined by a rule
+kind and its parameters, evaluated on demand: testing a number is a bit
+of arithmetic and the numbers of a range are generated, so a rule costs
+no row whatever the size of the number universe.
+
+Every rule accepts optional `min` and `max` parameters bounding it.
+ListRule gives the listed numbers of a concept the interface of a rule,
+so the catalog tests and generates the numbers of every concept alike.
+"""
+from bisect import bisect_left, bisect_right
+from math import isqrt
+
+
+LIST = 'list'
+RESIDUE = 'residue'
+POWER = 'power'
+SQUARE = 'square'
+
+RULE_CHOICES = [
+    (LIST, 'Explicit list of numbers'),
+    (RESIDUE, 'Numbers with a given remainder'),
+    (POWER, 'Powers of a base, plus an offset'),
+    (SQUARE, 'Square numbers'),
+]
+
+
+class Rule:
+    """Rule selecting numbers, within optional bounds."""
+
+    def __init__(self, min=None, max=None):
+        self.min = min
+        self.max = max
+
+    def bounds(self, low, high):
+        """Return the range to scan, narrowed by the rule bounds."""
+        if self.min is not None:
+            low = max(low, self.min)
+        if self.max is not None:
+            high = min(high, self.max)
+        return low, high
+
+    def contains(self, value):
+        """Return True if the rule selects the number."""
+        low, high = self.bounds(value, value)
+        return low <= high and self.matches(value)
+
+    def matches(self, value):
+        raise NotImplementedError
+
+    def values(self, low, high):
+        """Generate the numbers selected between low and high."""
+        raise NotImplementedError
+
+    def count(self, low, high):
+        """Return the count of numbers selected between low and high."""
+        return sum(1 for _ in self.values(low, high))
+
+
+class ListRule(Rule):
+    """Numbers listed explicitly."""
+
+    def __init__(self, values, **bounds):
+        super().__init__(**bounds)
+        self.sorted_values = sorted(set(values))
+        self.value_set = frozenset(self.sorted_values)
+
+    def matches(self, value):
+        return value in self.value_set
+
+    def values(self, low, high):
+        low, high = self.bounds(low, high)
+        return iter(self.sorted_values[
+            bisect_left(self.sorted_values, low):
+            bisect_right(self.sorted_values, high)
+        ])
+
+
+class ResidueRule(Rule):
+    """Numbers n such that n % modulus == remainder."""
+
+    def __init__(self, modulus, remainder=0, **bounds):
+        super().__init__(**bounds)
+        if modulus < 1:
+            raise ValueError('The modulus must be positive.')
+        self.modulus = modulus
+        self.remainder = remainder % modulus
+
+    def matches(self, value):
+        return value % self.modulus == self.remainder
+
+    def _range(self, low, high):
+        low, high = self.bounds(low, high)
+        first = low + (self.remainder - low) % self.modulus
+        return range(first, high + 1, self.modulus)
+
+    def values(self, low, high):
+        return iter(self._range(low, high))
+
+    def count(self, low, high):
+        return len(self._range(low, high))
+
+
+class PowerRule(Rule):
+    """Numbers n such that n == offset + base ** i, for i >= 0."""
+
+    def __init__(self, base, offset=0, **bounds):
+        super().__init__(**bounds)
+        if base < 2:
+            raise ValueError('The base must be at least 2.')
+        self.base = base
+        self.offset = offset
+
+    def matches(self, value):
+        power = value - self.offset
+        if power < 1:
+            return False
+        while power % self.base == 0:
+            power //= self.base
+        return power == 1
+
+    def values(self, low, high):
+        low, high = self.bounds(low, high)
+        power = 1
+        while self.offset + power <= high:
+            if self.offset + power >= low:
+                yield self.offset + power
+            power *= self.base
+
+
+class SquareRule(Rule):
+    """Numbers n such that n == i * i, for i >= 1."""
+
+    def matches(self, value):
+        return value >= 1 and isqrt(value) ** 2 == value
+
+    def values(self, low, high):
+        low, high = self.bounds(low, high)
+        root = max(1, isqrt(max(low, 1) - 1) + 1)
+        while root * root <= high:
+            yield root * root
+            root += 1
+
+
+RULES = {
+    RESIDUE: ResidueRule,
+    POWER: PowerRule,
+    SQUARE: SquareRule,
+}
+
+
+def get_rule(kind, params):
+    """Return the rule of the given kind and parameters.
+
+    Raises ValueError for the `list` kind, an unknown kind or invalid
+    parameters.
+    """
+    if kind not in RULES:
+        raise ValueError(f'No rule of kind "{kind}".')
+    try:
+        return RULES[kind](**(params or {}))
+    except TypeError as error:
+        raise ValueError(f'Invalid parameters for "{kind}": {error}')
@@ -0,0 +1,59 @@
+"""
+Signal handlers for core app.
+"""
+from django.db.models.signals import (
+    post_save,
+    post_delete,
+    m2m_changed,
+)
+from django.contrib.auth import get_user_model
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from core import authentication
+from core import catalog
+from core.models import (
+    NumberModel,
+    ArithmeticalConceptModel,
+    UserStatsModel,
+)
+
+
+@receiver(post_save, sender=NumberModel)
+@receiver(post_delete, sender=NumberModel)
+@receiver(post_save, sender=ArithmeticalConceptModel)
+@receiver(post_delete, sender=ArithmeticalConceptModel)
+def invalidate_catalog(sender, **kwargs):
+    """Invalidate the catalog when a number or a concept changes."""
+    catalog.invalidate()
+
+
+@receiver(m2m_changed, sender=ArithmeticalConceptModel.numbers.through)
+def invalidate_catalog_memberships(sender, action, **kwargs):
+    """Invalidate the catalog when the numbers of a concept change."""
+    if action.startswith('post_'):
+        catalog.invalidate()
+
+
+@receiver(post_delete, sender=Token)
+def evict_token(sender, instance, **kwargs):
+    """Evict a deleted token from the authentication cache."""
+    authentication.evict_tokens([instance.key])
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def evict_user_tokens(sender, instance, created=False, **kwargs):
+    """Evict the tokens of a user from the authentication cache."""
+    if not created:
+        authentication.evict_user(instance.pk)
+
+
+@receiver(post_save, sender=get_user_model())
+def create_user_stats(sender, instance, created, raw=False, **kwargs):
+    """Create the stats of a new user, so moves only update them."""
+    if created and not raw:
+        UserStatsModel.objects.bulk_create(
+            [UserStatsModel(user=instance)], ignore_conflicts=True,
+        )
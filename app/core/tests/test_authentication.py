@@ -0,0 +1,144 @@
+"""
+Tests for the cached token authentication.
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIRequestFactory
+
+from core import authentication
+from core.authentication import CachedTokenAuthentication
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    default_user_sign_up_details = {
+            'user_name': 'testuser123',
+            'email': 'test@example.com',
+            'password': 'testpass123',
+        }
+    default_user_sign_up_details.update(params)
+    user = get_user_model().objects.create_user(**default_user_sign_up_details)
+    return user
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test authenticating by token through the cache."""
+
+    def setUp(self):
+        authentication.clear()
+        cache.clear()
+        self.user = create_user()
+        self.token = Token.objects.create(user=self.user)
+
+    def authenticate(self, key=None):
+        request = APIRequestFactory().get(
+            '/', HTTP_AUTHORIZATION=f'Token {key or self.token.key}',
+        )
+        return CachedTokenAuthentication().authenticate(request)
+
+    def test_authenticate_cached(self):
+        """Test a token is looked up once."""
+        with self.assertNumQueries(1):
+            user, token = self.authenticate()
+        self.assertEqual(user, self.user)
+        self.assertEqual(token.key, self.token.key)
+        with self.assertNumQueries(0):
+            user, _ = self.authenticate()
+        self.assertEqual(user, self.user)
+
+    def test_authenticate_returns_copies(self):
+        """Test changing the authenticated user leaves the cache as is."""
+        user, _ = self.authenticate()
+        user.nick_name = 'changed'
+        user, _ = self.authenticate()
+        self.assertEqual(user.nick_name, self.user.nick_name)
+
+    def test_invalid_token(self):
+        """Test an unknown token fails and is not cached."""
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                with self.assertRaises(AuthenticationFailed):
+                    self.authenticate('unknown')
+
+    def test_token_deleted(self):
+        """Test a deleted token no longer authenticates."""
+        self.authenticate()
+        self.token.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_user_deactivated(self):
+        """Test the token of a deactivated user no longer authenticates."""
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_user_updated(self):
+        """Test the cached user follows updates."""
+        self.authenticate()
+        self.user.nick_name = 'nick'
+        self.user.save()
+        user, _ = self.authenticate()
+        self.assertEqual(user.nick_name, 'nick')
+
+    @override_settings(TOKEN_AUTH_CACHE_TTL=0)
+    def test_expired(self):
+        """Test expired entries are looked up again."""
+        self.authenticate()
+        with self.assertNumQueries(1):
+            self.authenticate()
+
+    @override_settings(TOKEN_AUTH_CACHE_SIZE=1)
+    def test_size_bounded(self):
+        """Test the least recently used entries are evicted."""
+        other = Token.objects.create(user=create_user(
+            user_name='otheruser', email='other@example.com',
+        ))
+        self.authenticate()
+        self.authenticate(other.key)
+        with self.assertNumQueries(1):
+            self.authenticate()
+
+    @override_settings(TOKEN_AUTH_CACHE_ALIAS='default')
+    def test_shared_cache(self):
+        """Test workers share the entries through the Django cache."""
+        self.authenticate()
+        authentication.clear()
+        with self.assertNumQueries(0):
+            user, _ = self.authenticate()
+        self.assertEqual(user, self.user)
+
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    @override_settings(TOKEN_AUTH_CACHE_ALIAS='default')
+    def test_shared_cache_revoked_in_every_worker(self):
+        """Test revoking a token in a worker applies to the others."""
+        workers = [authentication.TTLCache(), authentication.TTLCache()]
+        other = Token.objects.create(user=create_user(
+            user_name='otheruser', email='other@example.com',
+        ))
+        for worker in workers:
+            with patch('core.authentication._local', worker):
+                self.authenticate()
+                self.authenticate(other.key)
+
+        with patch('core.authentication._local', workers[0]):
+            self.token.delete()
+            other.user.is_active = False
+            other.user.save()
+        with patch('core.authentication._local', workers[1]):
+            with self.assertRaises(AuthenticationFailed):
+                self.authenticate()
+            with self.assertRaises(AuthenticationFailed):
+                self.authenticate(other.key)
@@ -0,0 +1,169 @@
+"""
+Tests for the catalog snapshot.
+"""
+from django.test import TestCase, override_settings
+
+from core import catalog
+from core import rules
+from core.hints import get_membership
+from core.models import (
+    CatalogVersionModel,
+    NumberModel,
+    ArithmeticalConceptModel,
+)
+
+
+class CatalogTests(TestCase):
+    """Test the catalog snapshot."""
+
+    def setUp(self):
+        self.two = NumberModel.objects.create(value=2)
+        self.three = NumberModel.objects.create(value=3)
+        self.four = NumberModel.objects.create(value=4)
+        self.even = ArithmeticalConceptModel.objects.create(
+            name='Even Numbers',
+            description='Numbers that are divisible by 2.',
+        )
+        self.even.add_number(self.two)
+        self.even.add_number(self.four)
+
+    def test_catalog_maps(self):
+        """Test the catalog maps concepts and numbers both ways."""
+        snapshot = catalog.get_catalog()
+
+        self.assertEqual(snapshot.concept_ids, [self.even.id])
+        self.assertEqual(list(snapshot.concept_values(self.even.id)), [2, 4])
+        self.assertEqual(snapshot.number_concept_ids(2), [self.even.id])
+        self.assertEqual(snapshot.number_concept_ids(3), [])
+        self.assertTrue(snapshot.contains(self.even.id, 4))
+        self.assertFalse(snapshot.contains(self.even.id, 3))
+        self.assertIsNone(snapshot.contains(self.even.id + 1, 4))
+        self.assertEqual(snapshot.number(3).name, 'Three')
+        self.assertIsNone(snapshot.number(5))
+        self.assertEqual(snapshot.possible_values([self.even.id]), [2, 4])
+
+    def test_catalog_rules_lazy(self):
+        """Test rule concepts are evaluated against the stored numbers."""
+        NumberModel.objects.bulk_create(
+            [NumberModel(name=str(value), value=value)
+             for value in range(5, 101)],
+        )
+        catalog.invalidate()
+        multiples = ArithmeticalConceptModel.objects.create(
+            name='Multiples of 3',
+            description='Numbers divisible by 3.',
+            rule_kind=rules.RESIDUE,
+            rule_params={'modulus': 3},
+        )
+        squares = ArithmeticalConceptModel.objects.create(
+            name='Squares',
+            description='Squares.',
+            rule_kind=rules.SQUARE,
+        )
+        snapshot = catalog.get_catalog()
+
+        self.assertTrue(snapshot.contains(multiples.id, 99))
+        self.assertFalse(snapshot.contains(multiples.id, 102))
+        self.assertEqual(
+            list(snapshot.concept_values(squares.id)),
+            [4, 9, 16, 25, 36, 49, 64, 81, 100],
+        )
+        self.assertEqual(
+            snapshot.possible_values([multiples.id, squares.id], limit=5),
+            [3, 4, 6, 9, 12],
+        )
+        self.assertTrue(snapshot.is_possible([squares.id], 64))
+        self.assertFalse(snapshot.is_possible([squares.id], 65))
+
+    def test_catalog_negative_numbers(self):
+        """Test numbers below 0 are listed but can not be played."""
+        minus_two = NumberModel.objects.create(value=-2)
+        self.even.add_number(minus_two)
+        snapshot = catalog.get_catalog()
+
+        self.assertEqual(list(snapshot.concept_values(self.even.id)),
+                         [-2, 2, 4])
+        self.assertEqual(snapshot.number(-2).id, minus_two.id)
+        self.assertEqual(snapshot.possible_values([self.even.id]), [2, 4])
+        self.assertFalse(snapshot.is_possible([self.even.id], -2))
+        self.assertNotIn(-2, get_membership(snapshot).values)
+
+    def test_catalog_loaded_once(self):
+        """Test the catalog is not reloaded while it is unchanged."""
+        snapshot = catalog.get_catalog()
+        with self.assertNumQueries(0):
+            self.assertIs(catalog.get_catalog(), snapshot)
+
+    def test_catalog_invalidated_on_change(self):
+        """Test changing a number or a concept reloads the catalog."""
+        snapshot = catalog.get_catalog()
+        five = NumberModel.objects.create(value=5)
+        self.assertIsNot(catalog.get_catalog(), snapshot)
+        self.assertEqual(catalog.get_catalog().number(5).id, five.id)
+
+        self.even.numbers.remove(self.four)
+        self.assertEqual(
+            list(catalog.get_catalog().concept_values(self.even.id)),
+            [2],
+        )
+
+    @override_settings(CATALOG_VERSION_TTL=0)
+    def test_catalog_changed_by_another_process(self):
+        """Test a version replaced in the database reloads the catalog."""
+        snapshot = catalog.get_catalog()
+        # another process changes the rows and the version, without
+        # signals in this one.
+        NumberModel.objects.filter(id=self.two.id).update(name='Deux')
+        CatalogVersionModel.objects.update(version='other')
+
+        self.assertIsNot(catalog.get_catalog(), snapshot)
+        self.assertEqual(catalog.get_catalog().number(2).name, 'Deux')
+        self.assertEqual(catalog.get_catalog().version, 'other')
+
+    def test_catalog_version_checked_after_ttl(self):
+        """Test the version is not read again before CATALOG_VERSION_TTL."""
+        snapshot = catalog.get_catalog()
+        CatalogVersionModel.objects.update(version='other')
+        with self.assertNumQueries(0):
+            self.assertIs(catalog.get_catalog(), snapshot)
+
+    def test_catalog_served_while_reloading(self):
+        """Test reads do not wait for a reload in another thread."""
+        snapshot = catalog.get_catalog()
+        catalog.bump_version()
+        # another thread holds the lock while it reloads.
+        with catalog._lock:
+            with self.assertNumQueries(0):
+                self.assertIs(catalog.get_catalog(), snapshot)
+        self.assertIsNot(catalog.get_catalog(), snapshot)
+
+    def test_number_instance(self):
+        """Test building a number for foreign keys from the catalog."""
+        number = catalog.get_catalog().number_instance(4)
+        self.assertEqual(number.pk, self.four.id)
+        self.assertEqual(number.value, 4)
+        self.assertIsNone(catalog.get_catalog().number_instance(7))
+
+    def test_catalog_digest(self):
+        """Test the digest follows the content, not the version token."""
+        snapshot = catalog.get_catalog()
+        catalog.bump_version()
+        self.assertEqual(catalog.get_catalog().digest, snapshot.digest)
+
+        self.even.add_number(self.three)
+        self.assertNotEqual(catalog.get_catalog().digest, snapshot.digest)
+
+    def test_catalog_memoize(self):
+        """Test derived data is computed once per snapshot."""
+        snapshot = catalog.get_catalog()
+        calls = []
+
+        def build(snapshot):
+            calls.append(snapshot)
+            return len(snapshot.numbers)
+
+        self.assertEqual(snapshot.memoize('count', build), 3)
+        self.assertEqual(snapshot.memoize('count', build), 3)
+        self.assertEqual(calls, [snapshot])
+        self.assertIsNone(snapshot.memoize('missing', lambda s: None))
+        self.assertNotIn('missing', snapshot._memo)
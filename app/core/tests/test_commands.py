@@ -1,13 +1,30 @@
 """
 Test custom Django management commands.
 """
+import datetime
+import json
+import os
+import tempfile
+from io import StringIO
 from unittest.mock import patch
 
 from psycopg2 import OperationalError as Psycopg2OpError
 
-from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.core.management import call_command, CommandError
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from core import rules
+from core.models import (
+    ArchivedGameModel,
+    ArithmeticalConceptModel,
+    NumberModel,
+    GameModel,
+    GameState,
+    GameMoveModel,
+)
 
 
 @patch('core.management.commands.wait_for_db.Command.check')
@@ -32,3 +49,350 @@ class CommandTests(SimpleTestCase):
 
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=['default'])
+
+
+class SimulateGamesCommandTests(TestCase):
+    """Test the simulate_games command."""
+
+    def setUp(self):
+        call_command('create_default_arithmetical_concept')
+
+    def test_simulate_games(self):
+        """Test games are played and the simulated data is removed."""
+        for strategy in ['random', 'greedy-split']:
+            out = StringIO()
+            call_command(
+                'simulate_games',
+                games=5,
+                users=2,
+                strategy=strategy,
+                seed=1,
+                stdout=out,
+            )
+            self.assertIn('5 games', out.getvalue())
+            self.assertIn('moves:', out.getvalue())
+        self.assertFalse(GameModel.objects.exists())
+        self.assertFalse(get_user_model().objects.exists())
+
+    def test_simulate_games_keep(self):
+        """Test the simulated games can be kept."""
+        call_command('simulate_games', games=3, users=1, keep=True,
+                     stdout=StringIO())
+        self.assertEqual(GameModel.objects.count(), 3)
+        self.assertTrue(GameMoveModel.objects.exists())
+
+
+class BenchmarkNumberWordsCommandTests(SimpleTestCase):
+    """Test the benchmark_number_words command."""
+
+    def test_benchmark(self):
+        """Test the conversions are measured."""
+        out = StringIO()
+        call_command('benchmark_number_words', count=10, stdout=out)
+        self.assertIn('convert_many speedup', out.getvalue())
+
+    def test_invalid_range(self):
+        """Test numbers the legacy conversion does not support fail."""
+        for options in [{'start': -1}, {'count': 0}, {'count': -5},
+                        {'start': 1000 ** 12}]:
+            with self.assertRaises(CommandError):
+                call_command('benchmark_number_words', stdout=StringIO(),
+                             **options)
+
+
+class ExportGamesCommandTests(TestCase):
+    """Test the export_games command."""
+
+    def setUp(self):
+        call_command('create_default_arithmetical_concept')
+        call_command('simulate_games', games=5, users=2, keep=True,
+                     stdout=StringIO())
+
+    def export(self, **options):
+        out = StringIO()
+        call_command('export_games', stdout=out, **options)
+        return [json.loads(line) for line in out.getvalue().splitlines()]
+
+    def test_export_games(self):
+        """Test every game is exported with its moves in order, with three
+        queries per chunk."""
+        with self.assertNumQueries(6):
+            records = self.export(chunk_size=3)
+        games = GameModel.objects.order_by('id')
+        self.assertEqual([record['id'] for record in records],
+                         [game.id for game in games])
+        for record, game in zip(records, games):
+            self.assertEqual(record['user'], game.user.user_name)
+            self.assertEqual(record['state'], game.get_game_state_display())
+            self.assertEqual(record['hidden_arith_concept']['name'],
+                             game.hidden_arith_concept.name)
+            moves = GameMoveModel.objects.filter(game=game).order_by(
+                'created_on', 'id',
+            )
+            self.assertEqual(
+                [(move['number'], move['in_hidden'])
+                 for move in record['moves']],
+                [(move.number_value, move.in_hidden) for move in moves],
+            )
+
+    def test_export_games_since(self):
+        """Test exporting the games created or moved on since a date."""
+        since = timezone.now()
+        old = GameModel.objects.order_by('id').first()
+        new = GameModel.objects.create(user=old.user)
+        number = NumberModel.objects.get(value=new.get_possible_numbers()[0])
+        records = self.export(since=since.isoformat())
+        self.assertEqual([record['id'] for record in records], [new.id])
+
+        GameMoveModel.objects.create(
+            game=old,
+            number=NumberModel.objects.get(
+                value=old.get_possible_numbers()[0],
+            ),
+        )
+        GameMoveModel.objects.create(game=new, number=number)
+        records = self.export(since=since.isoformat())
+        self.assertEqual(
+            [record['id'] for record in records],
+            [old.id, new.id],
+        )
+
+    def test_export_archived_games(self):
+        """Test the archived games are still exported, with their moves."""
+        GameModel.objects.update(
+            created_on=timezone.now() - datetime.timedelta(days=40),
+        )
+        games = list(GameModel.objects.order_by('id'))
+        moves = {
+            game.id: [
+                (move.number_value, move.in_hidden, move.created_on)
+                for move in GameMoveModel.objects.filter(
+                    game=game,
+                ).order_by('created_on', 'id')
+            ]
+            for game in games
+        }
+        ArchivedGameModel.objects.archive(timezone.now(), batch_size=100)
+        self.assertTrue(ArchivedGameModel.objects.exists())
+
+        records = self.export(chunk_size=2)
+        self.assertEqual([record['id'] for record in records],
+                         [game.id for game in games])
+        for record, game in zip(records, games):
+            self.assertEqual(record['state'], game.get_game_state_display())
+            self.assertEqual(
+                [(move['number'], move['in_hidden'], move['created_on'])
+                 for move in record['moves']],
+                [(number, in_hidden, created_on.isoformat())
+                 for number, in_hidden, created_on in moves[game.id]],
+            )
+
+        # only the games moved on since the last move of the first one.
+        since = moves[games[0].id][-1][2]
+        records = self.export(since=since.isoformat(), chunk_size=2)
+        self.assertEqual(
+            [record['id'] for record in records],
+            [game.id for game in games
+             if any(move[2] >= since for move in moves[game.id])],
+        )
+        records = self.export(since=timezone.now().isoformat())
+        self.assertEqual(records, [])
+
+    def test_export_games_output(self):
+        """Test exporting the games to a file."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'games.ndjson')
+            call_command('export_games', output=path)
+            with open(path) as output:
+                self.assertEqual(len(output.readlines()), 5)
+
+    def test_export_games_invalid_since(self):
+        """Test an invalid --since fails."""
+        with self.assertRaises(CommandError):
+            call_command('export_games', since='yesterday')
+
+
+class ArchiveGamesCommandTests(TestCase):
+    """Test the archive_games command."""
+
+    def setUp(self):
+        call_command('create_default_arithmetical_concept')
+        call_command('simulate_games', games=6, users=2, keep=True,
+                     strategy='greedy-split', stdout=StringIO())
+        self.old = timezone.now() - datetime.timedelta(days=40)
+        GameModel.objects.update(created_on=self.old)
+        self.running = GameModel.objects.create(
+            user=GameModel.objects.first().user,
+        )
+        GameModel.objects.filter(id=self.running.id).update(
+            created_on=self.old,
+        )
+
+    def archive(self, **options):
+        out = StringIO()
+        call_command('archive_games', stdout=out, **options)
+        return out.getvalue()
+
+    def test_archive_games(self):
+        """Test the old won games are moved to the archive with their moves."""
+        won = list(GameModel.objects.filter(
+            game_state=GameState.WON,
+        ).order_by('id'))
+        self.assertGreater(len(won), 2)
+        moves = {
+            game.id: [
+                (move.number_value, move.in_hidden, move.created_on)
+                for move in GameMoveModel.objects.filter(
+                    game=game,
+                ).order_by('created_on', 'id')
+            ]
+            for game in won
+        }
+
+        out = self.archive(batch_size=2)
+        self.assertIn(f'Archived {len(won)} games.', out)
+        self.assertFalse(GameModel.objects.filter(
+            game_state=GameState.WON,
+        ).exists())
+        self.assertTrue(GameModel.objects.filter(
+            id=self.running.id,
+        ).exists())
+        self.assertFalse(GameMoveModel.objects.filter(
+            game_id__in=moves,
+        ).exists())
+
+        archived = ArchivedGameModel.objects.order_by('id')
+        self.assertEqual([game.id for game in archived],
+                         [game.id for game in won])
+        for game, archive in zip(won, archived):
+            self.assertEqual(archive.user_id, game.user_id)
+            self.assertEqual(archive.created_on, game.created_on)
+            self.assertEqual(archive.hidden_arith_concept_id,
+                             game.hidden_arith_concept_id)
+            self.assertEqual(archive.get_possible_ariths(),
+                             game.get_possible_ariths())
+            self.assertEqual(archive.moves_count, game.moves_count)
+            self.assertEqual(archive.get_moves(), moves[game.id])
+
+    def test_archive_recent_games_kept(self):
+        """Test the games newer than the threshold are not archived."""
+        out = self.archive(older_than_days=60)
+        self.assertIn('Archived 0 games.', out)
+        self.assertFalse(ArchivedGameModel.objects.exists())
+
+    def test_archive_invalid_options(self):
+        """Test invalid options fail."""
+        for options in [
+            {'older_than_days': -1},
+            {'batch_size': 0},
+            {'loop': 0},
+        ]:
+            with self.assertRaises(CommandError):
+                call_command('archive_games', **options)
+
+
+class CreateDefaultArithmeticalConceptTests(TestCase):
+    """Test the create_default_arithmetical_concept command."""
+
+    def memberships(self):
+        through = ArithmeticalConceptModel.numbers.through
+        return sorted(through.objects.values_list(
+            'arithmeticalconceptmodel__name', 'numbermodel__value',
+        ))
+
+    def test_create_defaults(self):
+        """Test the default numbers and concepts are created."""
+        call_command('create_default_arithmetical_concept')
+        self.assertEqual(
+            list(NumberModel.objects.order_by('value').values_list(
+                'value', flat=True,
+            )),
+            list(range(1, 101)),
+        )
+        self.assertEqual(NumberModel.objects.get(value=42).name,
+                         'Forty Two')
+        squares = ArithmeticalConceptModel.objects.get(name='Squares Numbers')
+        self.assertEqual(squares.count, 10)
+        self.assertEqual(
+            sorted(squares.get_numbers().values_list('value', flat=True)),
+            [i * i for i in range(1, 11)],
+        )
+        power = ArithmeticalConceptModel.objects.get(name='Power of 2 + 37')
+        self.assertEqual(
+            sorted(power.get_numbers().values_list('value', flat=True)),
+            [38, 39, 41, 45, 53, 69],
+        )
+        self.assertEqual(self.memberships(), [])
+
+    def test_create_defaults_idempotent(self):
+        """Test running the command again changes nothing."""
+        call_command('create_default_arithmetical_concept')
+        user = get_user_model().objects.create_user(
+            user_name='player1', email='player@example.com',
+            password='pass123',
+        )
+        game = GameModel.objects.create(user=user)
+        numbers = list(NumberModel.objects.values_list('id', 'value'))
+        concepts = list(ArithmeticalConceptModel.objects.values_list(
+            'id', 'name', 'count',
+        ))
+        memberships = self.memberships()
+
+        call_command('create_default_arithmetical_concept')
+        self.assertEqual(
+            list(NumberModel.objects.values_list('id', 'value')),
+            numbers,
+        )
+        self.assertEqual(
+            list(ArithmeticalConceptModel.objects.values_list(
+                'id', 'name', 'count',
+            )),
+            concepts,
+        )
+        self.assertEqual(self.memberships(), memberships)
+        self.assertTrue(GameModel.objects.filter(id=game.id).exists())
+
+    def test_create_defaults_range(self):
+        """Test extending the range of numbers and pruning it back."""
+        call_command('create_default_arithmetical_concept')
+        even = ArithmeticalConceptModel.objects.get(name='Even Numbers')
+
+        call_command('create_default_arithmetical_concept', max=150)
+        self.assertEqual(NumberModel.objects.count(), 150)
+        even.refresh_from_db()
+        self.assertEqual(even.count, 75)
+        self.assertEqual(even.get_numbers().count(), 75)
+
+        call_command('create_default_arithmetical_concept', min=10, max=50,
+                     prune=True)
+        self.assertEqual(NumberModel.objects.count(), 41)
+        even.refresh_from_db()
+        self.assertEqual(
+            sorted(even.get_numbers().values_list('value', flat=True)),
+            list(range(10, 51, 2)),
+        )
+        self.assertEqual(even.count, 21)
+
+    def test_create_defaults_converts_lists(self):
+        """Test a default concept listing its numbers becomes a rule."""
+        NumberModel.objects.bulk_create(
+            [NumberModel(value=value) for value in range(1, 11)]
+        )
+        even = ArithmeticalConceptModel.objects.create(
+            name='Even Numbers', description='Even.',
+        )
+        even.numbers.set(NumberModel.objects.filter(value__in=[2, 4, 7]))
+
+        call_command('create_default_arithmetical_concept')
+        even.refresh_from_db()
+        self.assertEqual(even.rule_kind, rules.RESIDUE)
+        self.assertEqual(self.memberships(), [])
+        self.assertEqual(
+            sorted(even.get_numbers().values_list('value', flat=True)),
+            list(range(2, 101, 2)),
+        )
+
+    def test_create_defaults_invalid_range(self):
+        """Test an invalid range of numbers fails."""
+        with self.assertRaises(CommandError):
+            call_command('create_default_arithmetical_concept', min=10, max=5)
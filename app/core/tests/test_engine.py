@@ -0,0 +1,71 @@
+"""
+Tests for the bitset game engine.
+"""
+from django.test import SimpleTestCase
+
+from core import engine
+
+
+CONCEPTS = {
+    1: {2, 4, 6},
+    2: {3, 6, 9},
+    3: {1, 3, 5},
+}
+
+
+def contains(concept_id, value):
+    if concept_id not in CONCEPTS:
+        return None
+    return value in CONCEPTS[concept_id]
+
+
+class EngineTests(SimpleTestCase):
+    """Test the game engine."""
+
+    def test_mask_round_trip(self):
+        """Test converting numbers to a mask and back."""
+        values = [1, 7, 64, 65, 100]
+        mask = engine.mask_from_values(values)
+        self.assertEqual(engine.values_from_mask(mask), values)
+        self.assertTrue(engine.has_value(mask, 64))
+        self.assertFalse(engine.has_value(mask, 2))
+
+    def test_negative_values(self):
+        """Test numbers below 0 have no bit."""
+        mask = engine.mask_from_values([4])
+        for values in ([-3, 4], [-30, 4]):
+            with self.assertRaises(ValueError):
+                engine.mask_from_values(values)
+        with self.assertRaises(ValueError):
+            engine.number_bit(-1)
+        self.assertFalse(engine.has_value(mask, -1))
+        self.assertFalse(engine.has_value(mask, 5))
+        self.assertTrue(engine.has_value(mask, 4))
+
+    def test_apply_move_in_hidden(self):
+        """Test a move found in the hidden concept keeps the concepts
+        holding the number."""
+        outcome = engine.apply_move(contains, 1, [1, 2, 3], 6)
+
+        self.assertTrue(outcome.in_hidden)
+        self.assertEqual(outcome.possible_ariths, [1, 2])
+        self.assertEqual(outcome.removed_ariths, [3])
+
+    def test_apply_move_not_in_hidden(self):
+        """Test a move missing from the hidden concept keeps the concepts
+        missing the number."""
+        outcome = engine.apply_move(contains, 1, [1, 2, 3], 3)
+
+        self.assertFalse(outcome.in_hidden)
+        self.assertEqual(outcome.possible_ariths, [1])
+        self.assertEqual(outcome.removed_ariths, [2, 3])
+
+    def test_apply_move_missing_concept(self):
+        """Test concepts missing from the catalog are dropped."""
+        outcome = engine.apply_move(contains, 1, [1, 4], 5)
+
+        self.assertFalse(outcome.in_hidden)
+        self.assertEqual(outcome.possible_ariths, [1])
+        self.assertEqual(outcome.removed_ariths, [4])
+        with self.assertRaises(ValueError):
+            engine.apply_move(contains, 1, [1, 2], -2)
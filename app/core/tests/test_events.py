@@ -0,0 +1,58 @@
+"""
+Tests for the events of the games.
+"""
+import asyncio
+import json
+import threading
+
+from django.test import SimpleTestCase
+
+from core.events import LocalBroker
+
+
+class LocalBrokerTests(SimpleTestCase):
+    """Test the in-process fan-out of the events."""
+
+    async def test_publish_to_subscribers(self):
+        "Test an event reaches every subscriber of its channel only."
+        broker = LocalBroker()
+        viewers = [broker.subscribe('game:1') for _ in range(3)]
+        other = broker.subscribe('game:2')
+        broker.publish('game:1', b'event')
+        for viewer in viewers:
+            event = await asyncio.wait_for(viewer.get(), 1)
+            self.assertEqual(event, b'event')
+        await asyncio.sleep(0)
+        self.assertTrue(other.queue.empty())
+
+    async def test_publish_from_thread(self):
+        "Test events published by other threads are delivered in order."
+        broker = LocalBroker()
+        viewer = broker.subscribe('game:1')
+        thread = threading.Thread(target=lambda: [
+            broker.publish('game:1', json.dumps(i)) for i in range(5)
+        ])
+        thread.start()
+        thread.join()
+        events = [await asyncio.wait_for(viewer.get(), 1) for _ in range(5)]
+        self.assertEqual(events, [json.dumps(i) for i in range(5)])
+
+    async def test_slow_subscriber_drops_oldest(self):
+        "Test a subscriber falling behind keeps the latest events."
+        broker = LocalBroker()
+        viewer = broker.subscribe('game:1', size=2)
+        for i in range(4):
+            broker.publish('game:1', i)
+        await asyncio.sleep(0)
+        self.assertEqual([await viewer.get(), await viewer.get()], [2, 3])
+
+    async def test_unsubscribe(self):
+        "Test unsubscribed viewers get no more events."
+        broker = LocalBroker()
+        viewer = broker.subscribe('game:1')
+        self.assertEqual(broker.subscribers('game:1'), 1)
+        broker.unsubscribe(viewer)
+        self.assertEqual(broker.subscribers('game:1'), 0)
+        broker.publish('game:1', b'event')
+        await asyncio.sleep(0)
+        self.assertTrue(viewer.queue.empty())
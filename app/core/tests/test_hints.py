@@ -0,0 +1,112 @@
+"""
+Tests for the best-guess hints.
+"""
+import random
+
+from django.test import SimpleTestCase
+
+from core import hints
+from core import rules
+from core.catalog import (
+    Catalog,
+    NumberEntry,
+    ConceptEntry,
+)
+
+
+def make_catalog(concept_values):
+    """Return a catalog of numbers 1 to 100 and the given concepts."""
+    numbers = {
+        value: NumberEntry(id=value, name=str(value), value=value)
+        for value in range(1, 101)
+    }
+    concepts = {
+        concept_id: ConceptEntry(
+            id=concept_id,
+            name=f'Concept {concept_id}',
+            description='',
+            count=len(values),
+            rule=rules.ListRule(values),
+        )
+        for concept_id, values in concept_values.items()
+    }
+    return Catalog('test', numbers, concepts)
+
+
+class HintTests(SimpleTestCase):
+    """Test the best-guess hints."""
+
+    def test_best_split_halves(self):
+        """Test the hint picks the number splitting the concepts in half."""
+        catalog = make_catalog({
+            1: {2, 4, 6},
+            2: {2, 3},
+            3: {3, 5},
+            4: {5, 7},
+        })
+        hint = hints.best_split(catalog, [1, 2, 3, 4])
+        # 2, 3 and 5 are held by two of the four concepts each.
+        self.assertEqual(hint.value, 2)
+        self.assertEqual(hint.expected_eliminated, 2.0)
+
+    def test_no_hint(self):
+        """Test there is no hint without concepts left to split."""
+        catalog = make_catalog({1: {2, 4}, 2: {2, 4}})
+        self.assertIsNone(hints.best_split(catalog, [1]))
+        self.assertIsNone(hints.best_split(catalog, [1, 2]))
+
+    def test_matches_pairwise_scores(self):
+        """Test the vectorized scores match scoring every pair."""
+        rng = random.Random(7)
+        concept_values = {
+            concept_id: set(rng.sample(range(1, 101), rng.randint(1, 40)))
+            for concept_id in range(1, 301)
+        }
+        catalog = make_catalog(concept_values)
+        possible = rng.sample(sorted(concept_values), 120)
+
+        n = len(possible)
+        best = None
+        for value in range(1, 101):
+            k = sum(1 for id in possible if value in concept_values[id])
+            score = 2.0 * k * (n - k) / n
+            if best is None or score > best[1]:
+                best = (value, score)
+
+        hint = hints.best_split(catalog, possible)
+        self.assertEqual(hint.value, best[0])
+        self.assertAlmostEqual(hint.expected_eliminated, best[1])
+
+    def test_rule_rows(self):
+        """Test the rows of rule concepts hold the numbers of the rule."""
+        catalog = make_catalog({1: {2, 50}})
+        catalog.concepts[2] = ConceptEntry(
+            id=2, name='Multiples of 3', description='', count=0,
+            rule=rules.ResidueRule(modulus=3, min=10, max=20),
+        )
+        catalog.concepts[3] = ConceptEntry(
+            id=3, name='Squares', description='', count=0,
+            rule=rules.SquareRule(),
+        )
+        catalog.concept_ids = [1, 2, 3]
+        membership = hints.get_membership(catalog)
+        held = {
+            concept_id: [
+                int(value) for value in
+                membership.values[membership.matrix[row] == 1]
+            ]
+            for concept_id, row in membership.rows.items()
+        }
+        self.assertEqual(held, {
+            1: [2, 50],
+            2: [12, 15, 18],
+            3: [1, 4, 9, 16, 25, 36, 49, 64, 81, 100],
+        })
+
+    def test_matrix_built_once(self):
+        """Test the membership matrix is kept with the catalog."""
+        catalog = make_catalog({1: {2}, 2: {3}})
+        self.assertIs(
+            hints.get_membership(catalog),
+            hints.get_membership(catalog),
+        )
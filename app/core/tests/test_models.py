@@ -1,14 +1,26 @@
 """
 Tests for models.
 """
-from django.test import TestCase
+import threading
+from unittest import skipUnless
+
+from django.core.exceptions import ValidationError
+from django.test import TestCase, TransactionTestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from core.models import (
     NumberModel,
     ArithmeticalConceptModel,
     GameModel,
+    GameState,
     GameMoveModel,
+    UserStatsModel,
 )
+from core import catalog
+from core import engine
+from core import rules
+from core.hints import best_split
 
 from django.core.management import call_command
 
@@ -206,6 +218,52 @@ class ModelTests(TestCase):
         self.assertEqual(even_numbers.count, 1)
         self.assertEqual(even_numbers.numbers.all().get(value=2), two)
 
+    def test_rule_arith_concept_numbers(self):
+        """Test the numbers of a rule concept are selected by its rule."""
+        for value in [-3, -2, 1, 2, 3, 4]:
+            NumberModel.objects.create(value=value)
+        even_numbers = ArithmeticalConceptModel.objects.create(
+            name='Even Numbers',
+            description='Numbers that are divisible by 2.',
+            rule_kind=rules.RESIDUE,
+            rule_params={'modulus': 2},
+        )
+        odd_numbers = ArithmeticalConceptModel.objects.create(
+            name='Odd Numbers',
+            description='Numbers that are not divisible by 2.',
+            rule_kind=rules.RESIDUE,
+            rule_params={'modulus': 2, 'remainder': 1},
+        )
+
+        self.assertEqual(
+            sorted(even_numbers.get_numbers().values_list('value', flat=True)),
+            [-2, 2, 4],
+        )
+        self.assertEqual(
+            sorted(odd_numbers.get_numbers().values_list('value', flat=True)),
+            [-3, 1, 3],
+        )
+        self.assertTrue(even_numbers.has_number(NumberModel(value=4)))
+        self.assertFalse(even_numbers.has_number(NumberModel(value=3)))
+        self.assertEqual(list(even_numbers.iter_values(1, 6)), [2, 4, 6])
+        self.assertEqual(
+            NumberModel.objects.get(value=4).get_arithmetical_concepts(),
+            [even_numbers],
+        )
+        with self.assertRaises(ValueError):
+            even_numbers.add_number(NumberModel.objects.get(value=2))
+
+    def test_rule_arith_concept_invalid_params(self):
+        """Test cleaning a rule concept with invalid parameters fails."""
+        arith = ArithmeticalConceptModel(
+            name='Powers',
+            description='Powers.',
+            rule_kind=rules.POWER,
+            rule_params={'base': 1},
+        )
+        with self.assertRaises(ValidationError):
+            arith.full_clean()
+
     def test_create_game_sucessful(self):
         "Test create game sucessful."
         user = create_user()
@@ -214,12 +272,27 @@ class ModelTests(TestCase):
         self.assertEqual(GameModel.objects.all().count(), 1)
         self.assertEqual(game.user.user_name, user.user_name)
 
+    def test_create_game_query_count(self):
+        "Test creating a game runs a constant number of queries."
+        user = create_user()
+        call_command('create_default_arithmetical_concept')
+        GameModel.objects.create(user=user)
+        with self.assertNumQueries(1):
+            game = GameModel.objects.create(user=user)
+        game.refresh_from_db()
+        self.assertIn(
+            game.hidden_arith_concept_id,
+            game.get_possible_ariths(),
+        )
+        for number in game.hidden_arith_concept.get_numbers():
+            self.assertIn(number.value, game.get_possible_numbers())
+
     def test_create_game_move_sucessful(self):
         "Test create game move sucessful."
         user = create_user()
         call_command('create_default_arithmetical_concept')
         game = GameModel.objects.create(user=user)
-        number = game.possible_numbers.all()[0]
+        number = NumberModel.objects.get(value=game.get_possible_numbers()[0])
         move = GameMoveModel.objects.create(game=game, number=number)
         if not move:
             self.assertTrue(False)
@@ -235,21 +308,257 @@ class ModelTests(TestCase):
         taken_numbers = []
         while True:
             game.refresh_from_db()
-            if game.possible_numbers.all().count() == 0:
+            possible_numbers = game.get_possible_numbers()
+            if len(possible_numbers) == 0:
                 break
-            if game.game_state == "Win.":
+            if game.game_state == GameState.WON:
                 break
 
             idx = 0
             number = None
             while True:
-                if idx >= game.possible_numbers.all().count():
+                if idx >= len(possible_numbers):
                     self.assertTrue(False)
-                number = game.possible_numbers.all()[idx]
+                number = NumberModel.objects.get(value=possible_numbers[idx])
                 if number.value not in taken_numbers:
                     break
                 idx = idx + 1
             taken_numbers.append(number.value)
             GameMoveModel.objects.create(game=game, number=number)
             turn = turn + 1
-        self.assertEqual(game.game_state, "Win.")
+        self.assertEqual(game.game_state, GameState.WON)
+
+    def test_game_move_query_count_is_constant(self):
+        "Test a move runs the same number of queries for any game."
+        user = create_user()
+        call_command('create_default_arithmetical_concept')
+        query_counts = set()
+        for _ in range(5):
+            game = GameModel.objects.create(user=user)
+            number = NumberModel.objects.get(
+                value=game.get_possible_numbers()[0],
+            )
+            with CaptureQueriesContext(connection) as queries:
+                GameMoveModel.objects.create(game=game, number=number)
+            query_counts.add(len(queries))
+        self.assertEqual(query_counts, {6})
+
+
+@skipUnless(
+    connection.features.has_select_for_update,
+    'Row locking is not supported by the database.',
+)
+class ConcurrentMoveTests(TransactionTestCase):
+    """Test moves submitted in parallel on the same game."""
+
+    def test_parallel_moves_are_serialized(self):
+        "Test parallel moves leave the game as if played one by one."
+        user = create_user()
+        call_command('create_default_arithmetical_concept')
+        game = GameModel.objects.create(user=user)
+        initial_ariths = game.get_possible_ariths()
+        values = game.get_possible_numbers()[:8]
+        barrier = threading.Barrier(len(values))
+
+        def play(value):
+            try:
+                number = NumberModel.objects.get(value=value)
+                barrier.wait()
+                GameMoveModel.objects.create(
+                    game=GameModel.objects.get(id=game.id),
+                    number=number,
+                )
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=play, args=(value,)) for value in values
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        snapshot = catalog.get_catalog()
+        possible_ariths = initial_ariths
+        moves = GameMoveModel.objects.filter(game=game).order_by('id')
+        self.assertGreater(moves.count(), 0)
+        win_moves = 0
+        for index, move in enumerate(moves, start=1):
+            self.assertTrue(
+                snapshot.is_possible(possible_ariths, move.number_value)
+            )
+            outcome = engine.apply_move(
+                snapshot.contains,
+                game.hidden_arith_concept_id,
+                possible_ariths,
+                move.number_value,
+            )
+            self.assertEqual(move.in_hidden, outcome.in_hidden)
+            possible_ariths = outcome.possible_ariths
+            if len(possible_ariths) == 1 and not win_moves:
+                win_moves = index
+
+        game.refresh_from_db()
+        self.assertEqual(game.get_possible_ariths(), possible_ariths)
+        self.assertEqual(
+            game.get_possible_numbers(),
+            snapshot.possible_values(possible_ariths),
+        )
+        self.assertEqual(game.moves_count, moves.count())
+        stats = UserStatsModel.objects.get(user=user)
+        self.assertEqual(stats.games_played, 1)
+        self.assertEqual(stats.games_won, 1 if win_moves else 0)
+        self.assertEqual(stats.win_moves, win_moves)
+
+
+class UserStatsTests(TestCase):
+    """Test the stats of the users follow their games."""
+
+    def setUp(self):
+        call_command('create_default_arithmetical_concept')
+
+    def play(self, user, moves=None):
+        """Play a game until it is won, or for the given moves."""
+        game = GameModel.objects.create(user=user)
+        while game.game_state != GameState.WON and moves != 0:
+            hint = best_split(catalog.get_catalog(),
+                              game.get_possible_ariths())
+            number = NumberModel.objects.get(value=hint.value)
+            GameMoveModel.objects.create(game=game, number=number)
+            if moves is not None:
+                moves -= 1
+        return game
+
+    def test_stats_follow_moves(self):
+        "Test games count once played, and their moves once won."
+        user = create_user()
+        GameModel.objects.create(user=user)
+        games = [self.play(user, moves=1), self.play(user), self.play(user)]
+        won = [game for game in games if game.game_state == GameState.WON]
+        self.assertGreaterEqual(len(won), 2)
+
+        stats = UserStatsModel.objects.get(user=user)
+        self.assertEqual(stats.games_played, 3)
+        self.assertEqual(stats.games_won, len(won))
+        self.assertEqual(
+            stats.win_moves,
+            sum(game.moves_count for game in won),
+        )
+        self.assertEqual(
+            stats.average_moves_to_win,
+            sum(game.moves_count for game in won) / len(won),
+        )
+        for game in games:
+            self.assertEqual(
+                game.moves_count,
+                GameMoveModel.objects.filter(game=game).count(),
+            )
+
+    def test_create_many(self):
+        "Test numbers are played in order until the game is won."
+        user = create_user()
+        game = GameModel.objects.create(user=user)
+        possible_ariths = game.get_possible_ariths()
+        numbers = list(NumberModel.objects.filter(
+            value__in=game.get_possible_numbers(),
+        ).order_by('value'))
+        results = GameMoveModel.objects.create_many(game, numbers)
+
+        snapshot = catalog.get_catalog()
+        played = []
+        for number, outcome in results:
+            self.assertEqual(
+                outcome is not None,
+                snapshot.is_possible(possible_ariths, number.value),
+            )
+            if outcome is None:
+                continue
+            expected = engine.apply_move(
+                snapshot.contains,
+                game.hidden_arith_concept_id,
+                possible_ariths,
+                number.value,
+            )
+            self.assertEqual(outcome.possible_ariths, expected.possible_ariths)
+            possible_ariths = outcome.possible_ariths
+            played.append(number.value)
+
+        game.refresh_from_db()
+        self.assertEqual(game.get_possible_ariths(), possible_ariths)
+        self.assertEqual(game.moves_count, len(played))
+        self.assertEqual(
+            list(GameMoveModel.objects.filter(
+                game=game,
+            ).order_by('id').values_list('number_value', flat=True)),
+            played,
+        )
+        won = game.game_state == GameState.WON
+        self.assertEqual(won, len(possible_ariths) == 1)
+        if won:
+            self.assertEqual(results[-1][0].value, played[-1])
+            self.assertEqual(
+                GameMoveModel.objects.create_many(game, numbers[:1]),
+                [],
+            )
+        stats = UserStatsModel.objects.get(user=user)
+        self.assertEqual(stats.games_played, 1)
+        self.assertEqual(stats.games_won, int(won))
+        self.assertEqual(stats.win_moves, len(played) if won else 0)
+
+    def test_create_many_skips_impossible(self):
+        "Test numbers out of the possible ones are skipped."
+        # the two smallest concepts leave most numbers out of the game.
+        snapshot = catalog.get_catalog()
+        values = {
+            id: snapshot.possible_values([id]) for id in snapshot.concept_ids
+        }
+        smallest = sorted(
+            (len(held), id) for id, held in values.items() if held
+        )
+        hidden, other = smallest[0][1], next(
+            id for _, id in smallest if values[id] != values[smallest[0][1]]
+        )
+        game = GameModel.objects.create(user=create_user())
+        game.hidden_arith_concept_id = hidden
+        game.set_possible_ariths([hidden, other])
+        game.save()
+        possible = set(game.get_possible_numbers())
+        impossible = NumberModel.objects.exclude(value__in=possible).first()
+        number = NumberModel.objects.get(value=min(possible))
+        results = GameMoveModel.objects.create_many(
+            game,
+            [impossible, number],
+        )
+        self.assertEqual([number for number, _ in results],
+                         [impossible, number])
+        self.assertIsNone(results[0][1])
+        self.assertIsNotNone(results[1][1])
+        game.refresh_from_db()
+        self.assertEqual(game.moves_count, 1)
+
+    def test_leaderboard_rank(self):
+        "Test the leaderboard ranks by games won then moves to win."
+        users = [
+            create_user(user_name=f'player{i}', email=f'p{i}@example.com')
+            for i in range(4)
+        ]
+        UserStatsModel.objects.filter(user=users[0]).update(
+            games_played=3, games_won=2, win_moves=10,
+        )
+        UserStatsModel.objects.filter(user=users[1]).update(
+            games_played=2, games_won=2, win_moves=8,
+        )
+        UserStatsModel.objects.filter(user=users[2]).update(
+            games_played=5, games_won=1, win_moves=2,
+        )
+        leaderboard = list(UserStatsModel.objects.leaderboard())
+        self.assertEqual(
+            [stats.user_id for stats in leaderboard],
+            [users[1].id, users[0].id, users[2].id],
+        )
+        for rank, stats in enumerate(leaderboard, start=1):
+            self.assertEqual(UserStatsModel.objects.rank(stats), rank)
+        self.assertIsNone(UserStatsModel.objects.rank(
+            UserStatsModel.objects.get(user=users[3]),
+        ))
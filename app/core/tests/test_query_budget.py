@@ -0,0 +1,93 @@
+"""
+Tests for the query budget middleware and test helper.
+"""
+import asyncio
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import GameModel, NumberModel
+from core.query_budget import QueryBudgetMiddleware, QueryBudgetTestMixin
+
+
+class QueryBudgetMiddlewareTests(TestCase):
+    """Test the queries of the requests are reported."""
+
+    @override_settings(QUERY_BUDGET_ENABLED=True)
+    def test_headers(self):
+        """Test the responses carry the queries of their request."""
+        client = APIClient()
+        with self.assertLogs('core.query_budget', 'INFO') as logs:
+            res = client.get(reverse('user:users'))
+        self.assertEqual(res['X-DB-Query-Count'], '1')
+        self.assertGreater(float(res['X-DB-Time-Ms']), 0)
+        self.assertLessEqual(float(res['X-DB-Slowest-Ms']),
+                             float(res['X-DB-Time-Ms']))
+        self.assertIn('GET /api/user/users/ 200 queries=1', logs.output[0])
+        self.assertEqual(logs.records[0].db_queries, 1)
+
+    def test_disabled(self):
+        """Test the middleware is off unless enabled."""
+        res = APIClient().get(reverse('user:users'))
+        self.assertNotIn('X-DB-Query-Count', res)
+
+
+@override_settings(QUERY_BUDGET_ENABLED=True, ROOT_URLCONF='app.asgi_urls')
+class AsyncQueryBudgetMiddlewareTests(TransactionTestCase):
+    """Test the queries of the async views are reported."""
+
+    def setUp(self):
+        call_command('create_default_arithmetical_concept')
+        self.game = GameModel.objects.create(
+            user=get_user_model().objects.create_user(
+                user_name='player', email='player@example.com',
+                password='pass123',
+            ),
+        )
+
+    def test_async_mode(self):
+        """Test the middleware does not pin async requests to a thread."""
+        async def get_response(request):
+            return HttpResponse()
+
+        middleware = QueryBudgetMiddleware(get_response)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        self.assertFalse(asyncio.iscoroutinefunction(
+            QueryBudgetMiddleware(lambda request: HttpResponse()),
+        ))
+
+    async def test_thread_pool_queries(self):
+        """Test the queries run in the thread pool count for their
+        request, concurrent requests apart."""
+        url = reverse('game:games', args=[self.game.id])
+        with self.assertLogs('core.query_budget', 'INFO'):
+            res = await self.async_client.get(url)
+            count = int(res['X-DB-Query-Count'])
+            self.assertGreater(count, 0)
+            responses = await asyncio.gather(*(
+                self.async_client.get(url) for _ in range(3)
+            ))
+        for res in responses:
+            self.assertEqual(res.status_code, 200)
+            self.assertLessEqual(int(res['X-DB-Query-Count']), count)
+            self.assertGreater(int(res['X-DB-Query-Count']), 0)
+
+
+class QueryBudgetTestMixinTests(QueryBudgetTestMixin, TestCase):
+    """Test asserting the maximum number of queries."""
+
+    def test_within_budget(self):
+        with self.assertMaxQueries(2):
+            NumberModel.objects.count()
+            NumberModel.objects.exists()
+
+    def test_over_budget(self):
+        with self.assertRaisesMessage(AssertionError, '2 queries executed'):
+            with self.assertMaxQueries(1):
+                NumberModel.objects.count()
+                NumberModel.objects.exists()
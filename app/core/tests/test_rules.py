@@ -0,0 +1,84 @@
+"""
+Tests for the membership rules of the arithmetical concepts.
+"""
+from django.test import SimpleTestCase
+
+from core import rules
+
+
+class RuleTests(SimpleTestCase):
+    """Test the rules agree with their definition."""
+
+    def assertRuleMatches(self, rule, predicate, low=-50, high=500):
+        """Compare a rule with a predicate over a range, and subranges."""
+        expected = [n for n in range(low, high + 1) if predicate(n)]
+        self.assertEqual(
+            [n for n in range(low, high + 1) if rule.contains(n)],
+            expected,
+        )
+        self.assertEqual(list(rule.values(low, high)), expected)
+        self.assertEqual(rule.count(low, high), len(expected))
+        for start, stop in [(1, 1), (7, 93), (100, 99), (250, high)]:
+            self.assertEqual(
+                list(rule.values(start, stop)),
+                [n for n in expected if start <= n <= stop],
+            )
+
+    def test_residue(self):
+        """Test numbers with a given remainder."""
+        self.assertRuleMatches(
+            rules.ResidueRule(7, remainder=3),
+            lambda n: n % 7 == 3,
+        )
+        self.assertRuleMatches(
+            rules.ResidueRule(10, remainder=-1),
+            lambda n: n % 10 == 9,
+        )
+        self.assertRuleMatches(rules.ResidueRule(1), lambda n: True)
+
+    def test_power(self):
+        """Test powers of a base, plus an offset."""
+        powers = {2 ** i for i in range(10)}
+        self.assertRuleMatches(
+            rules.PowerRule(2),
+            lambda n: n in powers,
+        )
+        self.assertRuleMatches(
+            rules.PowerRule(2, offset=-32),
+            lambda n: n + 32 in powers,
+        )
+        self.assertRuleMatches(
+            rules.PowerRule(3, offset=37),
+            lambda n: n - 37 in {3 ** i for i in range(6)},
+        )
+
+    def test_square(self):
+        """Test square numbers."""
+        squares = {i * i for i in range(1, 30)}
+        self.assertRuleMatches(rules.SquareRule(), lambda n: n in squares)
+
+    def test_bounds(self):
+        """Test the min and max parameters bound a rule."""
+        self.assertRuleMatches(
+            rules.ResidueRule(2, remainder=1, min=2, max=99),
+            lambda n: n % 2 == 1 and 2 <= n <= 99,
+        )
+        self.assertRuleMatches(
+            rules.SquareRule(min=10),
+            lambda n: n >= 10 and int(n ** 0.5) ** 2 == n,
+        )
+
+    def test_get_rule(self):
+        """Test getting a rule by kind and parameters."""
+        rule = rules.get_rule(rules.RESIDUE, {'modulus': 3, 'remainder': 1})
+        self.assertIsInstance(rule, rules.ResidueRule)
+        self.assertTrue(rule.contains(4))
+        for kind, params in [
+            (rules.LIST, {}),
+            ('prime', {}),
+            (rules.RESIDUE, {'modulus': 0}),
+            (rules.POWER, {'base': 1}),
+            (rules.POWER, {'exponent': 2}),
+        ]:
+            with self.assertRaises(ValueError):
+                rules.get_rule(kind, params)
@@ -0,0 +1,50 @@
+"""
+Tests for the core utility functions.
+"""
+from django.test import SimpleTestCase
+
+from core.utils import NumberToWords
+
+
+class NumberToWordsTests(SimpleTestCase):
+    """Test converting numbers to words."""
+
+    def test_convert(self):
+        """Test converting numbers up to billions."""
+        self.assertEqual(NumberToWords.convert(0), 'Zero')
+        self.assertEqual(NumberToWords.convert(15), 'Fifteen')
+        self.assertEqual(NumberToWords.convert(100), 'One Hundred')
+        self.assertEqual(
+            NumberToWords.convert(123),
+            'One Hundred Twenty Three',
+        )
+        self.assertEqual(NumberToWords.convert(1001), 'One Thousand One')
+        self.assertEqual(
+            NumberToWords.convert(2000000005),
+            'Two Billion Five',
+        )
+
+    def test_convert_negative(self):
+        """Test converting negative numbers."""
+        self.assertEqual(NumberToWords.convert(-45), 'Minus Forty Five')
+
+    def test_convert_large(self):
+        """Test converting numbers beyond the largest unit."""
+        self.assertEqual(NumberToWords.convert(10 ** 12), 'One Trillion')
+        self.assertEqual(NumberToWords.convert(10 ** 33), 'One Decillion')
+        self.assertEqual(
+            NumberToWords.convert(10 ** 36 + 1),
+            'One Thousand Decillion One',
+        )
+        self.assertEqual(
+            NumberToWords.convert(7 * 10 ** 66),
+            'Seven Decillion Decillion',
+        )
+
+    def test_convert_many(self):
+        """Test converting many numbers at once."""
+        numbers = [0, 7, -12, 999999, 10 ** 40]
+        self.assertEqual(
+            NumberToWords.convert_many(numbers),
+            [NumberToWords.convert(number) for number in numbers],
+        )
@@ -1,10 +1,17 @@
 """
 Utility functions for core app.
 """
+from functools import lru_cache
 
 
 class NumberToWords:
-    """Convert a number to English word."""
+    """Convert a number to English word.
+
+    Numbers are written in groups of three digits, each group followed
+    by its short scale unit. The words of the groups 0 to 999 are built
+    once, and beyond the largest unit the number of units is itself
+    written out ("One Thousand Decillion"), so any integer converts.
+    """
     lookup = {
         0: "Zero", 1: "One", 2: "Two", 3: "Three", 4: "Four",
         5: "Five", 6: "Six", 7: "Seven", 8: "Eight", 9: "Nine",
@@ -14,20 +21,44 @@ class NumberToWords:
         40: "Forty", 50: "Fifty", 60: "Sixty", 70: "Seventy",
         80: "Eighty", 90: "Ninety",
     }
-    units = ["", "Thousand", "Million", "Billion"]
+    units = [
+        "", "Thousand", "Million", "Billion", "Trillion", "Quadrillion",
+        "Quintillion", "Sextillion", "Septillion", "Octillion",
+        "Nonillion", "Decillion",
+    ]
+    negative = "Minus"
+    cache_size = 4096
 
     @staticmethod
     def convert(number):
+        return NumberToWords._cached_convert(number)
+
+    @staticmethod
+    def convert_many(numbers):
+        """Convert many numbers, without going through the cache."""
+        return [NumberToWords._convert(number) for number in numbers]
+
+    @staticmethod
+    def _convert(number):
         if number == 0:
             return "Zero"
+        if number < 0:
+            return NumberToWords.negative + " " + \
+                NumberToWords._convert(-number)
+        top = NumberToWords._top_unit
+        if number >= top * 1000:
+            high, low = divmod(number, top)
+            ret = NumberToWords._convert(high) + " " + \
+                NumberToWords.units[-1]
+            if low:
+                ret += " " + NumberToWords._convert(low)
+            return ret
+        chunks = NumberToWords._chunks
         res, i = [], 0
         while number:
-            cur = number % 1000
-            if number % 1000:
-                res.append(
-                    NumberToWords.threeDigits(cur, NumberToWords.units[i])
-                    )
-            number //= 1000
+            number, cur = divmod(number, 1000)
+            if cur:
+                res.append(chunks[i][cur])
             i += 1
         return " ".join(res[::-1])
 
@@ -49,3 +80,14 @@ class NumberToWords:
         if unit != "":
             res.append(unit)
         return " ".join(res)
+
+
+# words of every group of three digits, for each unit.
+NumberToWords._chunks = [
+    [""] + [NumberToWords.threeDigits(num, unit) for num in range(1, 1000)]
+    for unit in NumberToWords.units
+]
+NumberToWords._top_unit = 1000 ** (len(NumberToWords.units) - 1)
+NumberToWords._cached_convert = staticmethod(
+    lru_cache(maxsize=NumberToWords.cache_size)(NumberToWords._convert)
+)
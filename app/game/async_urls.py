@@ -0,0 +1,24 @@
+"""
+URL mappings for game API served through app/asgi.py.
+"""
+from django.urls import path
+
+from game import views
+from game import async_views
+
+app_name = 'game'
+
+urlpatterns = [
+    path('create/', views.create_game, name='create'),
+    path('create/batch', views.create_games_batch, name='create_batch'),
+    path('games/', async_views.get_all_games, name='games'),
+    # the export is streamed ahead of Django (see game/streams.py).
+    path('games/<int:id>', async_views.get_game_detail, name='games'),
+    path('games/<int:id>/hint', async_views.get_game_hint, name='hint'),
+    path(
+        'games/<int:id>/move/<int:number>',
+        async_views.create_move,
+        name='moves',
+    ),
+    path('games/<int:id>/moves', async_views.create_moves, name='bulk_moves'),
+]
@@ -0,0 +1,78 @@
+"""
+Async views for the game API, served through app/asgi.py.
+"""
+import json
+
+from rest_framework import status
+
+from core.async_utils import (
+    run_db,
+    json_response,
+    method_not_allowed,
+    authenticate,
+    not_authenticated,
+)
+
+from game.views import (
+    games_page_data,
+    game_detail_data,
+    create_move_data,
+    create_moves_data,
+    hint_data,
+)
+
+
+async def get_all_games(request):
+    "Get a page of all games."
+    if request.method != 'GET':
+        return method_not_allowed(request, ['GET'])
+    data, status_code = await run_db(games_page_data, request.GET)
+    return json_response(data, status_code)
+
+
+async def get_game_detail(request, id):
+    if request.method != 'GET':
+        return method_not_allowed(request, ['GET'])
+    data = await run_db(game_detail_data, id)
+    if data is None:
+        return json_response({}, status.HTTP_404_NOT_FOUND)
+    return json_response(data)
+
+
+async def get_game_hint(request, id):
+    "Get the number splitting the possible ariths of a game best."
+    if request.method != 'GET':
+        return method_not_allowed(request, ['GET'])
+    data, status_code = await run_db(hint_data, id)
+    return json_response(data, status_code)
+
+
+async def create_move(request, id, number):
+    if request.method != 'POST':
+        return method_not_allowed(request, ['POST'])
+    user = await run_db(authenticate, request)
+    if user is None:
+        return not_authenticated()
+    data, status_code = await run_db(create_move_data, user, id, number)
+    return json_response(data, status_code)
+
+
+async def create_moves(request, id):
+    "Play a sequence of numbers on a game, stopping once it is won."
+    if request.method != 'POST':
+        return method_not_allowed(request, ['POST'])
+    user = await run_db(authenticate, request)
+    if user is None:
+        return not_authenticated()
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return json_response({'detail': 'JSON parse error.'},
+                             status.HTTP_400_BAD_REQUEST)
+    data, status_code = await run_db(create_moves_data, user, id, data)
+    return json_response(data, status_code)
+
+
+# token authenticated views are not subject to CSRF checks.
+create_move.csrf_exempt = True
+create_moves.csrf_exempt = True
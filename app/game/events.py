@@ -0,0 +1,117 @@
+"""
+Server-sent events of a game, served through app/asgi.py.
+
+GET /api/game/games/<id>/events first sends the state of the game, then
+a delta each time moves on it commit (see core/events.py). Like the
+other streamed endpoints, it is a bare ASGI app (see core.async_utils).
+"""
+import asyncio
+import functools
+import re
+
+from django.conf import settings
+
+from rest_framework import status
+
+from core import events
+from core.async_utils import run_db, send_json
+from core.models import GameModel
+
+
+EVENTS_PATH = re.compile(r'^/api/game/games/(?P<id>[0-9]+)/events$')
+
+HEADERS = [
+    (b'content-type', b'text/event-stream'),
+    (b'cache-control', b'no-cache'),
+    # keep proxies from buffering the stream.
+    (b'x-accel-buffering', b'no'),
+]
+
+KEEPALIVE = b': keepalive\n\n'
+
+
+def state_event(id):
+    """Return the event of the current state of a game, or None."""
+    game = GameModel.objects.filter(id=id).only(
+        'id', *GameModel.STATE_FIELDS,
+    ).first()
+    if game is None:
+        return None
+    return events.render_event('state', events.game_delta(game))
+
+
+async def stream(subscription, receive, send):
+    """Send the events of a subscription until the client disconnects."""
+    disconnected = asyncio.ensure_future(receive())
+    event = None
+    try:
+        while True:
+            if event is None:
+                event = asyncio.ensure_future(subscription.get())
+            done, _ = await asyncio.wait(
+                {event, disconnected},
+                timeout=settings.GAME_EVENTS_KEEPALIVE,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if disconnected in done:
+                if disconnected.result()['type'] == 'http.disconnect':
+                    return
+                disconnected = asyncio.ensure_future(receive())
+            if event in done:
+                body, event = event.result(), None
+            elif not done:
+                body = KEEPALIVE
+            else:
+                continue
+            await send({
+                'type': 'http.response.body',
+                'body': body,
+                'more_body': True,
+            })
+    finally:
+        for task in (event, disconnected):
+            if task is not None:
+                task.cancel()
+
+
+async def game_events(scope, receive, send, id):
+    """ASGI app streaming the events of a game."""
+    if scope['method'] != 'GET':
+        return await send_json(
+            send,
+            {'detail': f'Method "{scope["method"]}" not allowed.'},
+            status.HTTP_405_METHOD_NOT_ALLOWED,
+            [(b'allow', b'GET')],
+        )
+    broker = events.get_broker()
+    # subscribe first, so that no move is missed after the state is read.
+    subscription = broker.subscribe(events.game_channel(id))
+    try:
+        state = await run_db(state_event, id)
+        if state is None:
+            return await send_json(
+                send,
+                {'detail': 'Not found.'},
+                status.HTTP_404_NOT_FOUND,
+            )
+        await send({
+            'type': 'http.response.start',
+            'status': status.HTTP_200_OK,
+            'headers': HEADERS,
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': state,
+            'more_body': True,
+        })
+        await stream(subscription, receive, send)
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def route(scope):
+    """Return the app streaming the events of a request, or None."""
+    match = EVENTS_PATH.match(scope['path'])
+    if match is None:
+        return None
+    return functools.partial(game_events, id=int(match['id']))
@@ -1,13 +1,17 @@
 """
 Serializers for the game API View.
 """
+from django.conf import settings
+
 from core.models import (
+    ArchivedGameModel,
     GameModel,
     GameMoveModel,
 )
+from core.catalog import get_catalog
 from arithmetical.serializers import (
-    ListNumberSerializer,
-    ListArithmeticalConceptSerializer,
+    arith_data,
+    number_data,
 )
 
 
@@ -29,8 +33,33 @@ class ListGamesSerializer(serializers.ModelSerializer):
         extra_kwargs = {'user': {'read_only': True}}
         extra_kwargs = {'state': {'read_only': True}}
 
+    # columns to load for the games list, with the user joined.
+    ONLY_FIELDS = [
+        'id',
+        'created_on',
+        'game_state',
+        'user__user_name',
+        'user__nick_name',
+        'user__is_active',
+        'user__created_on',
+    ]
+
     def get_state(self, obj):
-        return obj.game_state
+        return obj.get_game_state_display()
+
+
+class CreateGamesBatchSerializer(serializers.Serializer):
+    """Serializer for creating a batch of games."""
+    count = serializers.IntegerField(min_value=1, max_value=1000)
+
+
+class CreateMovesSerializer(serializers.Serializer):
+    """Serializer for the numbers to play in a game, in order."""
+    numbers = serializers.ListField(
+        child=serializers.IntegerField(),
+        min_length=1,
+        max_length=100,
+    )
 
 
 class GameDetailSerializer(serializers.ModelSerializer):
@@ -38,8 +67,8 @@ class GameDetailSerializer(serializers.ModelSerializer):
     user = UserPublicProfileSerializer(read_only=True)
     state = serializers.SerializerMethodField()
     moves = serializers.SerializerMethodField()
-    possible_numbers = ListNumberSerializer(many=True)
-    possible_ariths = ListArithmeticalConceptSerializer(many=True)
+    possible_numbers = serializers.SerializerMethodField()
+    possible_ariths = serializers.SerializerMethodField()
 
     class Meta:
         model = GameModel
@@ -54,18 +83,54 @@ class GameDetailSerializer(serializers.ModelSerializer):
         extra_kwargs = {'moves': {'read_only': True}}
 
     def get_state(self, obj):
-        return obj.game_state
+        return obj.get_game_state_display()
+
+    def get_possible_numbers(self, obj):
+        # the first numbers only: the possible numbers may be all of them.
+        catalog = get_catalog()
+        values = obj.get_possible_numbers(
+            settings.GAME_POSSIBLE_NUMBERS_LIMIT, catalog,
+        )
+        return [number_data(catalog, catalog.number(value))
+                for value in values]
+
+    def get_possible_ariths(self, obj):
+        catalog = get_catalog()
+        ariths = [catalog.concepts.get(id) for id in obj.get_possible_ariths()]
+        return [arith_data(arith) for arith in ariths if arith]
 
     def get_moves(self, obj):
-        moves = []
         moves_query_set = GameMoveModel.objects.filter(
             game=obj,
-        ).order_by('-created_on')
-        for move in moves_query_set.all():
-            move_obj = {
-                "number": move.number.value,
-                "created_on": move.created_on,
-                'in_hidden': obj.hidden_arith_concept.has_number(move.number),
+        ).order_by('-created_on', '-id').values_list(
+            'number_value',
+            'created_on',
+            'in_hidden',
+        )
+        return [
+            {
+                'number': number_value,
+                'created_on': created_on,
+                'in_hidden': in_hidden,
+            }
+            for number_value, created_on, in_hidden in moves_query_set
+        ]
+
+
+class ArchivedGameDetailSerializer(GameDetailSerializer):
+    """Serializer for the details of an archived game."""
+
+    class Meta(GameDetailSerializer.Meta):
+        model = ArchivedGameModel
+
+    def get_moves(self, obj):
+        return [
+            {
+                'number': number_value,
+                'created_on': created_on,
+                'in_hidden': in_hidden,
             }
-            moves.append(move_obj)
-        return moves
+            for number_value, in_hidden, created_on in reversed(
+                obj.get_moves()
+            )
+        ]
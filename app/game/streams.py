@@ -0,0 +1,76 @@
+"""
+Streamed game export, served through app/asgi.py.
+
+Under ASGI, GET /api/game/games/export is served by export_stream,
+which reads the games chunk by chunk with core.export.export_chunk (see
+core.async_utils for the streamed endpoints).
+"""
+import functools
+
+from django.http import QueryDict
+from django.urls import reverse
+
+from rest_framework import status
+
+from core.async_utils import (
+    authenticate_header,
+    run_db,
+    scope_header,
+    send_json,
+    send_stream,
+)
+from core.export import (
+    export_chunk,
+    parse_since,
+)
+
+
+async def export_stream(scope, receive, send):
+    """ASGI app streaming every game and its moves, for staff users."""
+    if scope['method'] != 'GET':
+        return await send_json(
+            send,
+            {'detail': f'Method "{scope["method"]}" not allowed.'},
+            status.HTTP_405_METHOD_NOT_ALLOWED,
+            [(b'allow', b'GET')],
+        )
+    user = await run_db(
+        authenticate_header,
+        scope_header(scope, b'authorization'),
+    )
+    if user is None:
+        return await send_json(
+            send,
+            {'detail': 'Authentication credentials were not provided.'},
+            status.HTTP_401_UNAUTHORIZED,
+            [(b'www-authenticate', b'Token')],
+        )
+    if not user.is_staff:
+        return await send_json(
+            send,
+            {'detail': 'You do not have permission to perform this action.'},
+            status.HTTP_403_FORBIDDEN,
+        )
+    params = QueryDict(scope['query_string'])
+    since = None
+    if params.get('since'):
+        since = parse_since(params['since'])
+        if since is None:
+            return await send_json(
+                send,
+                {'detail': 'Invalid since.'},
+                status.HTTP_400_BAD_REQUEST,
+            )
+    await send_stream(
+        send,
+        functools.partial(export_chunk, since),
+        0,
+        b'application/x-ndjson',
+    )
+
+
+def route(scope):
+    """Return the app streaming the export of a request, or None."""
+    if scope['path'] != reverse('game:export'):
+        return None
+    return export_stream
@@ -1,19 +1,43 @@
 """
 Tests for the game API.
 """
-from django.test import TestCase
+import json
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+
+from django.test import (
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from django.core.management import call_command
 from django.contrib.auth import get_user_model
 
 from rest_framework.test import APIClient
+from rest_framework.authtoken.models import Token
 from rest_framework import status
+from app.asgi import application
+from core import events
+from core.catalog import Catalog
 from core.models import (
+    ArchivedGameModel,
+    NumberModel,
+    ArithmeticalConceptModel,
     GameModel,
+    GameState,
+    GameMoveModel,
 )
 
 GAMES_URL = reverse('game:games')
 CREATE_GAME_URL = reverse('game:create')
+CREATE_GAMES_BATCH_URL = reverse('game:create_batch')
+EXPORT_URL = reverse('game:export')
 
 
 def get_game_url(id):
@@ -36,6 +60,18 @@ def get_create_move_url(id, number):
     return reverse('game:moves', args=[id, number])
 
 
+def get_create_moves_url(id):
+    return reverse('game:bulk_moves', args=[id])
+
+
+def get_events_url(id):
+    return f'/api/game/games/{id}/events'
+
+
+def get_hint_url(id):
+    return reverse('game:hint', args=[id])
+
+
 class PublicGameApiTests(TestCase):
     """Test the public features of the game API."""
 
@@ -46,6 +82,80 @@ class PublicGameApiTests(TestCase):
         "Test list all games."
         res = self.client.get(GAMES_URL)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'results': [], 'next': None})
+
+    def test_list_games_pages(self):
+        "Test list games page by page with a cursor."
+        call_command('create_default_arithmetical_concept')
+        user = create_user()
+        user2 = create_user(user_name='otheruser', email='other@example.com')
+        GameModel.objects.create_games(
+            [GameModel(user=user) for _ in range(5)]
+            + [GameModel(user=user2) for _ in range(2)]
+        )
+        expected = list(GameModel.objects.order_by(
+            '-created_on', '-id',
+        ).values_list('id', flat=True))
+
+        ids = []
+        params = {'limit': 3}
+        while True:
+            with self.assertNumQueries(1):
+                res = self.client.get(GAMES_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(res.data['results']), 3)
+            ids += [game['id'] for game in res.data['results']]
+            if res.data['next'] is None:
+                break
+            params['cursor'] = res.data['next']
+        self.assertEqual(ids, expected)
+
+    def test_list_games_cursor_bound(self):
+        "Test the pages after a cursor bound the scan of the index."
+        call_command('create_default_arithmetical_concept')
+        user = create_user()
+        GameModel.objects.create_games(
+            [GameModel(user=user) for _ in range(3)],
+        )
+        res = self.client.get(GAMES_URL, {'limit': 1})
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(GAMES_URL, {'limit': 1,
+                                              'cursor': res.data['next']})
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertIn('"core_gamemodel"."created_on" <= ',
+                      context.captured_queries[0]['sql'])
+
+    def test_list_games_filters(self):
+        "Test list games filtered by user and state."
+        call_command('create_default_arithmetical_concept')
+        user = create_user()
+        user2 = create_user(user_name='otheruser', email='other@example.com')
+        running = GameModel.objects.create(user=user)
+        won = GameModel.objects.create(user=user2)
+        GameModel.objects.filter(id=won.id).update(game_state=GameState.WON)
+
+        res = self.client.get(GAMES_URL, {'user': 'otheruser'})
+        self.assertEqual([game['id'] for game in res.data['results']],
+                         [won.id])
+        res = self.client.get(GAMES_URL, {'state': 'Win.'})
+        self.assertEqual([game['id'] for game in res.data['results']],
+                         [won.id])
+        res = self.client.get(GAMES_URL, {'user': user.user_name,
+                                          'state': 'Win.'})
+        self.assertEqual(res.data['results'], [])
+        res = self.client.get(GAMES_URL, {'state': 'running'})
+        self.assertEqual([game['id'] for game in res.data['results']],
+                         [running.id])
+        self.assertEqual(res.data['results'][0]['state'], 'Runing...')
+        res = self.client.get(GAMES_URL, {'state': 'lost'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_games_invalid_page(self):
+        "Test list games with an invalid cursor or limit fails."
+        for params in [{'cursor': 'abc'}, {'cursor': 'W10'},
+                       {'limit': 0}, {'limit': 'all'}]:
+            res = self.client.get(GAMES_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
     def test_post_all_games_not_allowed(self):
         "Test post to all games is not allowed."
@@ -62,6 +172,119 @@ class PublicGameApiTests(TestCase):
         res = self.client.get(get_game_url(game_id))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
+    def test_game_detail_expands_candidates(self):
+        "Test game details list the possible numbers and ariths."
+        user = create_user()
+        call_command('create_default_arithmetical_concept')
+        game = GameModel.objects.create(user=user)
+        res = self.client.get(get_game_url(game.id))
+
+        values = [number['value'] for number in res.data['possible_numbers']]
+        self.assertEqual(values, game.get_possible_numbers())
+        number = NumberModel.objects.get(value=values[0])
+        self.assertEqual(res.data['possible_numbers'][0], {
+            'id': number.id,
+            'name': number.name,
+            'value': number.value,
+            'count': len(number.get_arithmetical_concepts()),
+        })
+        ids = [arith['id'] for arith in res.data['possible_ariths']]
+        self.assertEqual(ids, game.get_possible_ariths())
+
+    def test_game_hint(self):
+        "Test get the number splitting the possible ariths best."
+        user = create_user()
+        call_command('create_default_arithmetical_concept')
+        game = GameModel.objects.create(user=user)
+        with self.assertNumQueries(1):
+            res = self.client.get(get_hint_url(game.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn(res.data['number'], game.get_possible_numbers())
+        possible_ariths = game.get_possible_ariths()
+        self.assertEqual(res.data['possible_ariths_count'],
+                         len(possible_ariths))
+
+        number = NumberModel.objects.get(value=res.data['number'])
+        k = len([
+            arith for arith in number.get_arithmetical_concepts()
+            if arith.id in possible_ariths
+        ])
+        n = len(possible_ariths)
+        self.assertAlmostEqual(res.data['expected_eliminated'],
+                               2 * k * (n - k) / n)
+
+    @override_settings(GAME_POSSIBLE_NUMBERS_LIMIT=5)
+    def test_game_detail_caps_possible_numbers(self):
+        "Test game details list the smallest possible numbers only."
+        user = create_user()
+        call_command('create_default_arithmetical_concept')
+        game = GameModel.objects.create(user=user)
+        res = self.client.get(get_game_url(game.id))
+
+        values = [number['value'] for number in res.data['possible_numbers']]
+        self.assertEqual(values, game.get_possible_numbers()[:5])
+
+    def test_game_hint_not_found(self):
+        "Test get the hint of a missing game."
+        res = self.client.get(get_hint_url(0))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_game_hint_won_game(self):
+        "Test there is no hint once a single arith is left."
+        user = create_user()
+        call_command('create_default_arithmetical_concept')
+        game = GameModel.objects.create(user=user)
+        game.set_possible_ariths([game.hidden_arith_concept_id])
+        game.save()
+        res = self.client.get(get_hint_url(game.id))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_game_detail_moves(self):
+        "Test game details list the moves with their outcome."
+        user = create_user()
+        call_command('create_default_arithmetical_concept')
+        game = GameModel.objects.create(user=user)
+        hidden = game.hidden_arith_concept
+        for _ in range(3):
+            game.refresh_from_db()
+            if game.game_state == GameState.WON:
+                break
+            number = NumberModel.objects.get(
+                value=game.get_possible_numbers()[0],
+            )
+            GameMoveModel.objects.create(game=game, number=number)
+
+        moves = GameMoveModel.objects.filter(game=game)
+        with self.assertNumQueries(3):
+            res = self.client.get(get_game_url(game.id))
+        self.assertEqual(len(res.data['moves']), moves.count())
+        for move in res.data['moves']:
+            number = NumberModel.objects.get(value=move['number'])
+            self.assertEqual(move['in_hidden'], hidden.has_number(number))
+
+    def test_get_archived_game(self):
+        "Test get game details falls back to the archive."
+        call_command('create_default_arithmetical_concept')
+        game = GameModel.objects.create(user=create_user())
+        numbers = list(NumberModel.objects.filter(
+            value__in=game.get_possible_numbers()[:3],
+        ))
+        GameMoveModel.objects.create_many(game, numbers)
+        GameModel.objects.filter(id=game.id).update(game_state=GameState.WON)
+        res = self.client.get(get_game_url(game.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        ArchivedGameModel.objects.archive(timezone.now(), 10)
+        self.assertFalse(GameModel.objects.filter(id=game.id).exists())
+        archived = self.client.get(get_game_url(game.id))
+        self.assertEqual(archived.status_code, status.HTTP_200_OK)
+        self.assertEqual(archived.json(), res.json())
+
+    def test_create_games_batch_unauthorized(self):
+        "Test create a batch of games requires authentication."
+        res = self.client.post(CREATE_GAMES_BATCH_URL, {'count': 2})
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
 
 class PrivateGameApiTests(TestCase):
     """Test API requests that require authentication."""
@@ -88,8 +311,8 @@ class PrivateGameApiTests(TestCase):
         call_command('create_default_arithmetical_concept')
         game = GameModel.objects.create(user=self.user)
         game_id = game.id
-        number = game.possible_numbers.all()[0]
-        res = self.client.post(get_create_move_url(game_id, number.value), {})
+        number = game.get_possible_numbers()[0]
+        res = self.client.post(get_create_move_url(game_id, number), {})
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
 
     def test_create_move_unauthorized(self):
@@ -97,6 +320,429 @@ class PrivateGameApiTests(TestCase):
         user2 = create_user()
         game = GameModel.objects.create(user=user2)
         game_id = game.id
-        number = game.possible_numbers.all()[0]
-        res = self.client.post(get_create_move_url(game_id, number.value), {})
+        number = game.get_possible_numbers()[0]
+        res = self.client.post(get_create_move_url(game_id, number), {})
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_create_moves_sucessful(self):
+        "Test play a sequence of numbers on a game."
+        call_command('create_default_arithmetical_concept')
+        game = GameModel.objects.create(user=self.user)
+        values = game.get_possible_numbers()[:3]
+        res = self.client.post(
+            get_create_moves_url(game.id),
+            {'numbers': values},
+            format='json',
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        moves = res.data['moves']
+        self.assertEqual(
+            [move['number'] for move in moves],
+            values[:len(moves)],
+        )
+        applied = [move['number'] for move in moves if move['applied']]
+        self.assertEqual(len(res.data['game']['moves']), len(applied))
+        self.assertEqual(
+            list(GameMoveModel.objects.filter(
+                game=game,
+            ).order_by('id').values_list('number_value', flat=True)),
+            applied,
+        )
+        if res.data['game']['state'] != 'Win.':
+            self.assertEqual(len(moves), 3)
+
+    def test_create_moves_stops_on_win(self):
+        "Test no number is played once the game is won."
+        call_command('create_default_arithmetical_concept')
+        game = GameModel.objects.create(user=self.user)
+        values = game.get_possible_numbers()
+        res = self.client.post(
+            get_create_moves_url(game.id),
+            {'numbers': values},
+            format='json',
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        game.refresh_from_db()
+        if game.game_state == GameState.WON:
+            self.assertTrue(res.data['moves'][-1]['applied'])
+            res = self.client.post(
+                get_create_moves_url(game.id),
+                {'numbers': values[:1]},
+                format='json',
+            )
+            self.assertEqual(res.data['moves'], [])
+        self.assertEqual(
+            GameMoveModel.objects.filter(game=game).count(),
+            game.moves_count,
+        )
+
+    def test_create_moves_on_archived_game(self):
+        "Test playing on a game archived once looked up is not found."
+        call_command('create_default_arithmetical_concept')
+        game = GameModel.objects.create(user=self.user)
+        number_instance = Catalog.number_instance
+
+        def archive_then_number(catalog, value):
+            # the game leaves the game table between lookup and lock.
+            GameModel.objects.filter(id=game.id).delete()
+            return number_instance(catalog, value)
+
+        value = game.get_possible_numbers()[0]
+        with patch.object(Catalog, 'number_instance', archive_then_number):
+            res = self.client.post(get_create_move_url(game.id, value), {})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        game = GameModel.objects.create(user=self.user)
+        with patch.object(Catalog, 'number_instance', archive_then_number):
+            res = self.client.post(
+                get_create_moves_url(game.id),
+                {'numbers': game.get_possible_numbers()[:2]},
+                format='json',
+            )
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_create_moves_invalid(self):
+        "Test play an invalid sequence of numbers fails."
+        call_command('create_default_arithmetical_concept')
+        game = GameModel.objects.create(user=self.user)
+        for numbers in [[], ['one'], [0], list(range(1, 102)), 7]:
+            res = self.client.post(
+                get_create_moves_url(game.id),
+                {'numbers': numbers},
+                format='json',
+            )
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(GameMoveModel.objects.filter(game=game).exists())
+
+    def test_create_moves_unauthorized(self):
+        "Test play numbers on a game of another user fails."
+        call_command('create_default_arithmetical_concept')
+        game = GameModel.objects.create(user=create_user())
+        res = self.client.post(
+            get_create_moves_url(game.id),
+            {'numbers': game.get_possible_numbers()[:2]},
+            format='json',
+        )
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        res = self.client.post(
+            get_create_moves_url(0),
+            {'numbers': [1]},
+            format='json',
+        )
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_create_games_batch_sucessful(self):
+        "Test create a batch of games sucessful."
+        call_command('create_default_arithmetical_concept')
+        res = self.client.post(CREATE_GAMES_BATCH_URL, {'count': 25})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 25)
+        games = GameModel.objects.filter(user=self.user)
+        self.assertEqual(games.count(), 25)
+        for game in games:
+            possible_ariths = game.get_possible_ariths()
+            self.assertIn(game.hidden_arith_concept_id, possible_ariths)
+            possible_numbers = set()
+            for arith in ArithmeticalConceptModel.objects.filter(
+                id__in=possible_ariths,
+            ):
+                possible_numbers.update(
+                    arith.get_numbers().values_list('value', flat=True)
+                )
+            self.assertEqual(
+                game.get_possible_numbers(),
+                sorted(possible_numbers),
+            )
+
+    def test_create_games_batch_invalid_count(self):
+        "Test create a batch of games with an invalid count fails."
+        call_command('create_default_arithmetical_concept')
+        for count in [0, -1, 1001, 'many']:
+            res = self.client.post(CREATE_GAMES_BATCH_URL, {'count': count})
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(GameModel.objects.filter(user=self.user).exists())
+
+
+class ExportGamesApiTests(TestCase):
+    """Test the export of the games for staff users."""
+
+    def setUp(self):
+        call_command('create_default_arithmetical_concept')
+        self.user = create_user()
+        self.client = APIClient()
+        self.games = [GameModel.objects.create(user=self.user)
+                      for _ in range(3)]
+        for game in self.games:
+            number = NumberModel.objects.get(
+                value=game.get_possible_numbers()[0],
+            )
+            GameMoveModel.objects.create(game=game, number=number)
+
+    def test_export_requires_staff(self):
+        "Test the export is refused to anonymous and regular users."
+        res = self.client.get(EXPORT_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.force_authenticate(user=self.user)
+        res = self.client.get(EXPORT_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_export_games(self):
+        "Test staff users stream every game with its moves."
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_authenticate(user=self.user)
+        res = self.client.get(EXPORT_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        records = [
+            json.loads(line) for line in
+            b''.join(res.streaming_content).decode().splitlines()
+        ]
+        self.assertEqual([record['id'] for record in records],
+                         [game.id for game in self.games])
+        self.assertEqual([len(record['moves']) for record in records],
+                         [1, 1, 1])
+
+        res = self.client.get(EXPORT_URL, {'since': 'soon'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncExportGamesTests(TransactionTestCase):
+    """Test the export of the games through the ASGI app."""
+
+    def setUp(self):
+        call_command('create_default_arithmetical_concept')
+        self.user = create_user()
+        self.token = Token.objects.create(user=self.user)
+        self.games = [GameModel.objects.create(user=self.user)
+                      for _ in range(3)]
+        for game in self.games:
+            number = NumberModel.objects.get(
+                value=game.get_possible_numbers()[0],
+            )
+            GameMoveModel.objects.create(game=game, number=number)
+
+    async def get(self, query_string=b'', token=None):
+        """Send a request to the ASGI app, and return its messages."""
+        headers = [(b'host', b'testserver')]
+        if token is not None:
+            headers.append((b'authorization', f'Token {token}'.encode()))
+        communicator = ApplicationCommunicator(application, {
+            'type': 'http',
+            'method': 'GET',
+            'path': EXPORT_URL,
+            'query_string': query_string,
+            'headers': headers,
+        })
+        await communicator.send_input({'type': 'http.request', 'body': b''})
+        messages = [await communicator.receive_output(5)]
+        while messages[-1].get('more_body', messages[-1]['type'] ==
+                               'http.response.start'):
+            messages.append(await communicator.receive_output(5))
+        return messages
+
+    async def test_export_requires_staff(self):
+        "Test the export is refused to anonymous and regular users."
+        start, _ = await self.get()
+        self.assertEqual(start['status'], status.HTTP_401_UNAUTHORIZED)
+        start, _ = await self.get(token=self.token.key)
+        self.assertEqual(start['status'], status.HTTP_403_FORBIDDEN)
+
+    @patch('core.export.CHUNK_SIZE', 2)
+    async def test_export_games(self):
+        "Test staff users stream every game by chunks under ASGI."
+        self.user.is_staff = True
+        await sync_to_async(self.user.save)()
+        start, *bodies = await self.get(token=self.token.key)
+        self.assertEqual(start['status'], status.HTTP_200_OK)
+        self.assertIn((b'content-type', b'application/x-ndjson'),
+                      start['headers'])
+        self.assertEqual(len(bodies), 2)
+        records = [
+            json.loads(line) for line in
+            b''.join(body['body'] for body in bodies).splitlines()
+        ]
+        self.assertEqual([record['id'] for record in records],
+                         [game.id for game in self.games])
+        self.assertEqual([len(record['moves']) for record in records],
+                         [1, 1, 1])
+
+        start, _ = await self.get(b'since=soon', self.token.key)
+        self.assertEqual(start['status'], status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(ROOT_URLCONF='app.asgi_urls')
+class AsyncGameApiTests(TransactionTestCase):
+    """Test the async game views served through ASGI."""
+
+    def setUp(self):
+        call_command('create_default_arithmetical_concept')
+        self.user = create_user()
+        self.token = Token.objects.create(user=self.user)
+        self.game = GameModel.objects.create(user=self.user)
+
+    async def test_list_all_games(self):
+        "Test list all games."
+        res = await self.async_client.get(GAMES_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [game['id'] for game in res.json()['results']],
+            [self.game.id],
+        )
+
+    async def test_get_game_detail(self):
+        "Test get game details by id."
+        res = await self.async_client.get(get_game_url(self.game.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()['id'], self.game.id)
+
+        res = await self.async_client.get(get_game_url(self.game.id + 1))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_create_move(self):
+        "Test add move to a game."
+        number = self.game.get_possible_numbers()[0]
+        url = get_create_move_url(self.game.id, number)
+        res = await self.async_client.post(
+            url,
+            authorization=f'Token {self.token.key}',
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.json()['moves'][0]['number'], number)
+
+    async def test_create_move_unauthenticated(self):
+        "Test add move to a game requires authentication."
+        number = self.game.get_possible_numbers()[0]
+        url = get_create_move_url(self.game.id, number)
+        res = await self.async_client.post(url)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        res = await self.async_client.post(url, authorization='Token bad')
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_create_moves(self):
+        "Test play a sequence of numbers on a game."
+        values = self.game.get_possible_numbers()[:2]
+        res = await self.async_client.post(
+            get_create_moves_url(self.game.id),
+            {'numbers': values},
+            content_type='application/json',
+            authorization=f'Token {self.token.key}',
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.json()['moves'][0]['number'], values[0])
+
+        res = await self.async_client.post(
+            get_create_moves_url(self.game.id),
+            'numbers',
+            content_type='application/json',
+            authorization=f'Token {self.token.key}',
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_method_not_allowed(self):
+        "Test post to all games is not allowed."
+        res = await self.async_client.post(GAMES_URL)
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+class GameEventsTests(TransactionTestCase):
+    """Test the server-sent events of the games."""
+
+    def setUp(self):
+        call_command('create_default_arithmetical_concept')
+        self.user = create_user()
+        self.game = GameModel.objects.create(user=self.user)
+
+    async def open(self, path, method='GET'):
+        """Send a request to the ASGI app, and return the response start."""
+        communicator = ApplicationCommunicator(application, {
+            'type': 'http',
+            'method': method,
+            'path': path,
+            'query_string': b'',
+            'headers': [(b'host', b'testserver')],
+        })
+        await communicator.send_input({'type': 'http.request', 'body': b''})
+        start = await communicator.receive_output(5)
+        return communicator, start
+
+    async def read_event(self, communicator):
+        """Return the name and the data of the next event."""
+        body = (await communicator.receive_output(5))['body'].decode()
+        fields = dict(
+            line.split(': ', 1) for line in body.strip().split('\n')
+        )
+        return fields['event'], json.loads(fields['data'])
+
+    async def test_stream_moves(self):
+        "Test viewers get the state, then a delta per committed move."
+        communicator, start = await self.open(get_events_url(self.game.id))
+        self.assertEqual(start['status'], status.HTTP_200_OK)
+        self.assertIn((b'content-type', b'text/event-stream'),
+                      start['headers'])
+        name, data = await self.read_event(communicator)
+        self.assertEqual(name, 'state')
+        self.assertEqual(data['moves_count'], 0)
+        self.assertEqual(data['possible_ariths'],
+                         self.game.get_possible_ariths())
+
+        # the first move keeps the most concepts, so the game goes on.
+        value = await sync_to_async(max)(
+            self.game.get_possible_numbers(),
+            key=lambda value: len(
+                self.game.move_outcome(value).possible_ariths,
+            ),
+        )
+        number = await sync_to_async(NumberModel.objects.get)(value=value)
+        await sync_to_async(GameMoveModel.objects.create)(
+            game=self.game, number=number,
+        )
+        name, data = await self.read_event(communicator)
+        self.assertEqual(name, 'move')
+        self.assertEqual([move['number'] for move in data['moves']],
+                         [value])
+        self.assertEqual(data['moves_count'], 1)
+        await sync_to_async(self.game.refresh_from_db)()
+        self.assertEqual(data['possible_ariths'],
+                         self.game.get_possible_ariths())
+
+        values = self.game.get_possible_numbers()[:2]
+        numbers = await sync_to_async(list)(
+            NumberModel.objects.filter(value__in=values).order_by('value'),
+        )
+        await sync_to_async(GameMoveModel.objects.create_many)(
+            self.game, numbers,
+        )
+        name, data = await self.read_event(communicator)
+        self.assertEqual(data['moves_count'], self.game.moves_count)
+        self.assertEqual(data['state'], self.game.get_game_state_display())
+
+        await communicator.send_input({'type': 'http.disconnect'})
+        await communicator.wait(5)
+        self.assertEqual(
+            events.get_broker().subscribers(events.game_channel(self.game.id)),
+            0,
+        )
+
+    @override_settings(GAME_EVENTS_KEEPALIVE=0.01)
+    async def test_keepalive(self):
+        "Test idle streams send keepalive comments."
+        communicator, _ = await self.open(get_events_url(self.game.id))
+        await communicator.receive_output(5)
+        body = (await communicator.receive_output(5))['body']
+        self.assertTrue(body.startswith(b':'))
+        await communicator.send_input({'type': 'http.disconnect'})
+        await communicator.wait(5)
+
+    async def test_stream_errors(self):
+        "Test missing games and other methods are refused."
+        _, start = await self.open(get_events_url(self.game.id + 1))
+        self.assertEqual(start['status'], status.HTTP_404_NOT_FOUND)
+        _, start = await self.open(get_events_url(self.game.id), 'POST')
+        self.assertEqual(start['status'],
+                         status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    async def test_other_paths(self):
+        "Test the other requests are served by Django."
+        _, start = await self.open(GAMES_URL)
+        self.assertEqual(start['status'], status.HTTP_200_OK)
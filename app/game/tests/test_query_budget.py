@@ -0,0 +1,116 @@
+"""
+Query budgets of the game API endpoints.
+"""
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import authentication
+from core.models import (
+    ArchivedGameModel,
+    GameModel,
+    GameState,
+    GameMoveModel,
+    NumberModel,
+)
+from core.query_budget import QueryBudgetTestMixin
+
+
+class GameQueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """Test the game endpoints stay within their query budget."""
+
+    def setUp(self):
+        call_command('create_default_arithmetical_concept')
+        authentication.clear()
+        self.user = get_user_model().objects.create_user(
+            user_name='testuser123',
+            email='test@example.com',
+            password='testpass123',
+        )
+        token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.games = [GameModel.objects.create(user=self.user)
+                      for _ in range(5)]
+        for game in self.games:
+            for value in game.get_possible_numbers()[:3]:
+                game.refresh_from_db()
+                if game.game_state == GameState.WON:
+                    break
+                GameMoveModel.objects.create(
+                    game=game,
+                    number=NumberModel.objects.get(value=value),
+                )
+        # load the catalog, shared by the requests of every worker.
+        self.client.get(reverse('game:games', args=[self.games[0].id]))
+
+    def test_create_game(self):
+        with self.assertMaxQueries(3):
+            res = self.client.post(reverse('game:create'))
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_create_games_batch(self):
+        with self.assertMaxQueries(3):
+            res = self.client.post(reverse('game:create_batch'),
+                                   {'count': 20})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_list_games(self):
+        with self.assertMaxQueries(1):
+            res = self.client.get(reverse('game:games'))
+        self.assertEqual(len(res.data['results']), len(self.games))
+
+    def test_game_detail(self):
+        with self.assertMaxQueries(3):
+            res = self.client.get(
+                reverse('game:games', args=[self.games[0].id]),
+            )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_archived_game_detail(self):
+        game = self.games[0]
+        GameModel.objects.filter(id=game.id).update(game_state=GameState.WON)
+        ArchivedGameModel.objects.archive(timezone.now(), 10)
+        with self.assertMaxQueries(2):
+            res = self.client.get(reverse('game:games', args=[game.id]))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_game_hint(self):
+        game = GameModel.objects.create(user=self.user)
+        with self.assertMaxQueries(1):
+            res = self.client.get(reverse('game:hint', args=[game.id]))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_export_games(self):
+        self.user.is_staff = True
+        self.user.save()
+        with self.assertMaxQueries(4):
+            res = self.client.get(reverse('game:export'))
+            b''.join(res.streaming_content)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_create_move(self):
+        game = GameModel.objects.create(user=self.user)
+        number = game.get_possible_numbers()[0]
+        with self.assertMaxQueries(9):
+            res = self.client.post(
+                reverse('game:moves', args=[game.id, number]),
+            )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_create_moves(self):
+        game = GameModel.objects.create(user=self.user)
+        numbers = game.get_possible_numbers()[:10]
+        with self.assertMaxQueries(9):
+            res = self.client.post(
+                reverse('game:bulk_moves', args=[game.id]),
+                {'numbers': numbers},
+                format='json',
+            )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
@@ -9,7 +9,11 @@ app_name = 'game'
 
 urlpatterns = [
     path('create/', views.create_game, name='create'),
+    path('create/batch', views.create_games_batch, name='create_batch'),
     path('games/', views.get_all_games, name='games'),
+    path('games/export', views.export_games, name='export'),
     path('games/<int:id>', views.get_game_detail, name='games'),
+    path('games/<int:id>/hint', views.get_game_hint, name='hint'),
     path('games/<int:id>/move/<int:number>', views.create_move, name='moves'),
+    path('games/<int:id>/moves', views.create_moves, name='bulk_moves'),
 ]
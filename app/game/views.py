@@ -9,31 +9,186 @@ from rest_framework.decorators import (
 
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.authentication import TokenAuthentication
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from django.http import StreamingHttpResponse
 
 from core.models import (
-    NumberModel,
+    ArchivedGameModel,
     GameModel,
     GameMoveModel,
+    GameState,
+)
+from core.authentication import CachedTokenAuthentication
+from core.catalog import get_catalog
+from core.export import (
+    export_ndjson,
+    parse_since,
+)
+from core.hints import best_split
+from core.pagination import (
+    InvalidPage,
+    keyset_page,
 )
 
 from game.serializers import (
     ListGamesSerializer,
     GameDetailSerializer,
+    ArchivedGameDetailSerializer,
+    CreateGamesBatchSerializer,
+    CreateMovesSerializer,
 )
 
 
+# states of the games list filter, by label and by name.
+GAME_STATES = {
+    **{state.label: state for state in GameState},
+    **{state.name.lower(): state for state in GameState},
+}
+
+
+def games_page_data(params):
+    """Return a page of the games, newest first, and the status.
+
+    The page is selected by the `cursor` and `limit` parameters, and the
+    games can be filtered by `state` (label, or `running` and `won`) and
+    by `user` (user name).
+    """
+    games = GameModel.objects.select_related('user').only(
+        *ListGamesSerializer.ONLY_FIELDS,
+    )
+    if params.get('state'):
+        state = GAME_STATES.get(params['state'])
+        if state is None:
+            return {'detail': 'Invalid state.'}, status.HTTP_400_BAD_REQUEST
+        games = games.filter(game_state=state)
+    if params.get('user'):
+        games = games.filter(user__user_name=params['user'])
+    try:
+        games, next_cursor = keyset_page(
+            games,
+            ['created_on', 'id'],
+            cursor=params.get('cursor'),
+            limit=params.get('limit'),
+        )
+    except InvalidPage as error:
+        return {'detail': str(error)}, status.HTTP_400_BAD_REQUEST
+    data = {
+        'results': ListGamesSerializer(games, many=True).data,
+        'next': next_cursor,
+    }
+    return data, status.HTTP_200_OK
+
+
+def game_detail_data(id):
+    "Return the details of a game, or None if the game does not exist."
+    game = GameModel.objects.filter(id=id).first()
+    if game is not None:
+        return GameDetailSerializer(game).data
+    # finished games are moved to the archive after a while.
+    archived = ArchivedGameModel.objects.select_related('user').filter(
+        id=id,
+    ).first()
+    if archived is None:
+        return None
+    return ArchivedGameDetailSerializer(archived).data
+
+
+def create_move_data(user, id, number):
+    "Create a move on a game of the user, and return the data and status."
+    game = GameModel.objects.filter(id=id).first()
+    if game is None:
+        return {}, status.HTTP_404_NOT_FOUND
+    # test if the user is autherized to create a move for this game.
+    if game.user_id != user.id:
+        return {}, status.HTTP_401_UNAUTHORIZED
+    # the serializer reads the user, which the request already holds.
+    game.user = user
+    number_obj = get_catalog().number_instance(number)
+    if number_obj is None:
+        return {}, status.HTTP_404_NOT_FOUND
+    # the game is reloaded from its locked row while the move is applied,
+    # which is gone if the game was archived since the lookup.
+    try:
+        GameMoveModel.objects.create(game=game, number=number_obj)
+    except GameModel.DoesNotExist:
+        return {}, status.HTTP_404_NOT_FOUND
+    return GameDetailSerializer(game).data, status.HTTP_201_CREATED
+
+
+def create_moves_data(user, id, data):
+    """Play a sequence of numbers on a game of the user.
+
+    Return the data, with the outcome of each number tried and the final
+    state of the game, and the status.
+    """
+    serializer = CreateMovesSerializer(data=data)
+    if not serializer.is_valid():
+        return serializer.errors, status.HTTP_400_BAD_REQUEST
+    game = GameModel.objects.filter(id=id).first()
+    if game is None:
+        return {}, status.HTTP_404_NOT_FOUND
+    if game.user_id != user.id:
+        return {}, status.HTTP_401_UNAUTHORIZED
+    game.user = user
+    catalog = get_catalog()
+    numbers = [
+        catalog.number_instance(value)
+        for value in serializer.validated_data['numbers']
+    ]
+    if None in numbers:
+        return {'numbers': ['Unknown number.']}, status.HTTP_400_BAD_REQUEST
+
+    try:
+        results = GameMoveModel.objects.create_many(game, numbers)
+    except GameModel.DoesNotExist:
+        return {}, status.HTTP_404_NOT_FOUND
+    moves = [
+        {
+            'number': number.value,
+            'applied': outcome is not None,
+            'in_hidden': outcome.in_hidden if outcome else None,
+            'removed_ariths': outcome.removed_ariths if outcome else [],
+        }
+        for number, outcome in results
+    ]
+    data = {
+        'moves': moves,
+        'game': GameDetailSerializer(game).data,
+    }
+    return data, status.HTTP_201_CREATED
+
+
+def hint_data(id):
+    "Return the best number to play in a game, and the status."
+    game = GameModel.objects.filter(id=id).only(
+        'id', 'possible_ariths_mask',
+    ).first()
+    if game is None:
+        return {}, status.HTTP_404_NOT_FOUND
+    catalog = get_catalog()
+    possible_ariths = game.get_possible_ariths()
+    hint = best_split(catalog, possible_ariths)
+    if hint is None:
+        return {'detail': 'No number splits the possible ariths.'}, \
+            status.HTTP_400_BAD_REQUEST
+    data = {
+        'number': hint.value,
+        'name': catalog.number(hint.value).name,
+        'expected_eliminated': hint.expected_eliminated,
+        'possible_ariths_count': len(possible_ariths),
+    }
+    return data, status.HTTP_200_OK
+
+
 @api_view(['GET'])
 def get_all_games(request):
-    "Get list of all games."
-    games = GameModel.objects.all().order_by('-created_on')
-    serializer = ListGamesSerializer(games, many=True)
-    return Response(serializer.data)
+    "Get a page of all games."
+    data, status_code = games_page_data(request.query_params)
+    return Response(data, status=status_code)
 
 
 @api_view(['POST'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def create_game(request):
     game = GameModel.objects.create(user=request.user)
@@ -42,31 +197,66 @@ def create_game(request):
     return response
 
 
+@api_view(['POST'])
+@authentication_classes([CachedTokenAuthentication])
+@permission_classes([IsAuthenticated])
+def create_games_batch(request):
+    "Create a batch of games for the authenticated user."
+    serializer = CreateGamesBatchSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    count = serializer.validated_data['count']
+    games = GameModel.objects.create_games(
+        [GameModel(user=request.user) for _ in range(count)]
+    )
+    serializer = ListGamesSerializer(games, many=True)
+    response = Response(serializer.data, status=status.HTTP_201_CREATED)
+    return response
+
+
 @api_view(['GET'])
 def get_game_detail(request, id):
-    # check if 404
-    if not GameModel.objects.filter(id=id).exists():
+    data = game_detail_data(id)
+    if data is None:
         return Response({}, status=status.HTTP_404_NOT_FOUND)
-    game = GameModel.objects.get(id=id)
-    serializer = GameDetailSerializer(game)
-    return Response(serializer.data)
+    return Response(data)
+
+
+@api_view(['GET'])
+def get_game_hint(request, id):
+    "Get the number splitting the possible ariths of a game best."
+    data, status_code = hint_data(id)
+    return Response(data, status=status_code)
 
 
 @api_view(['POST'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def create_move(request, id, number):
-    # check if 404
-    if not GameModel.objects.filter(id=id).exists():
-        return Response({}, status=status.HTTP_404_NOT_FOUND)
-    game = GameModel.objects.get(id=id)
-    # test if the user is autherized to create a move for this game.
-    if game.user.id != request.user.id:
-        return Response({}, status=status.HTTP_401_UNAUTHORIZED)
-    # create a move
-    number_obj = NumberModel.objects.get(value=number)
-    GameMoveModel.objects.create(game=game, number=number_obj)
-    game.refresh_from_db()
-    serializer = GameDetailSerializer(game)
-    response = Response(serializer.data, status=status.HTTP_201_CREATED)
-    return response
+    data, status_code = create_move_data(request.user, id, number)
+    return Response(data, status=status_code)
+
+
+@api_view(['POST'])
+@authentication_classes([CachedTokenAuthentication])
+@permission_classes([IsAuthenticated])
+def create_moves(request, id):
+    "Play a sequence of numbers on a game, stopping once it is won."
+    data, status_code = create_moves_data(request.user, id, request.data)
+    return Response(data, status=status_code)
+
+
+@api_view(['GET'])
+@authentication_classes([CachedTokenAuthentication])
+@permission_classes([IsAdminUser])
+def export_games(request):
+    "Stream every game and its moves as NDJSON, for staff users."
+    since = None
+    if request.query_params.get('since'):
+        since = parse_since(request.query_params['since'])
+        if since is None:
+            return Response({'detail': 'Invalid since.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+    return StreamingHttpResponse(
+        (line.encode() for line in export_ndjson(since)),
+        content_type='application/x-ndjson',
+    )
@@ -1,15 +1,13 @@
 """
 Serializers for the user API View.
 """
-from django.contrib.auth import (
-    get_user_model,
-    authenticate,
-)
+from django.contrib.auth import get_user_model
 from django.utils.translation import gettext as _
 
 from rest_framework import serializers
 
 import core
+from core.models import UserStatsModel
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -47,36 +45,18 @@ class AuthTokenSerializer(serializers.Serializer):
     )
 
     def validate(self, attrs):
-        """Validate and authenticate the user."""
-        user = attrs.get('user')
-        password = attrs.get('password')
-        user_user_name = authenticate(
-            request=self.context.get('request'),
-            user_name=user.lower(),
-            password=password,
-        )
-        if user_user_name:
-            attrs['user'] = user_user_name
-            return attrs
+        """Validate and authenticate the user.
 
-        user_name_exists = get_user_model().objects.filter(
-            email=user
-        ).exists()
-        if not user_name_exists:
-            msg = _('Unable to authenticate with provided credentials.')
-            raise serializers.ValidationError(msg, code='authorization')
-
-        user_name = get_user_model().objects.get(
-            email=user
-        ).user_name
-
-        user_email = authenticate(
-            request=self.context.get('request'),
-            user_name=user_name,
-            password=password,
-        )
-        if user_email:
-            attrs['user'] = user_email
+        The user is looked up once by user name or email, and the
+        password is hashed once whether the user exists or not.
+        """
+        password = attrs.get('password')
+        user = get_user_model().objects.get_for_login(attrs.get('user'))
+        if user is None:
+            # hash anyway, so that missing users take as long to reject.
+            get_user_model()().set_password(password)
+        elif user.check_password(password) and user.is_active:
+            attrs['user'] = user
             return attrs
 
         msg = _('Unable to authenticate with provided credentials.')
@@ -112,6 +92,26 @@ class ListUsersSerializer(serializers.ModelSerializer):
         extra_kwargs = {'created_on': {'read_only': True}}
 
 
+class UserStatsSerializer(serializers.ModelSerializer):
+    """Serializer for the game stats of a user."""
+    average_moves_to_win = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = UserStatsModel
+        fields = ['games_played', 'games_won', 'average_moves_to_win']
+        read_only_fields = fields
+
+
+class LeaderboardSerializer(UserStatsSerializer):
+    """Serializer for the leaderboard entries, given their rank."""
+    rank = serializers.IntegerField(read_only=True)
+    user_name = serializers.CharField(source='user.user_name', read_only=True)
+
+    class Meta(UserStatsSerializer.Meta):
+        fields = ['rank', 'user_name'] + UserStatsSerializer.Meta.fields
+        read_only_fields = fields
+
+
 class UserPublicProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = get_user_model()
@@ -120,3 +120,21 @@ class UserPublicProfileSerializer(serializers.ModelSerializer):
         extra_kwargs = {'nick_name': {'read_only': True}}
         extra_kwargs = {'is_active': {'read_only': True}}
         extra_kwargs = {'created_on': {'read_only': True}}
+
+
+class UserProfileDetailSerializer(UserPublicProfileSerializer):
+    """Serializer for the public profile of a user, with their stats."""
+    stats = serializers.SerializerMethodField()
+
+    class Meta(UserPublicProfileSerializer.Meta):
+        fields = UserPublicProfileSerializer.Meta.fields + ['stats']
+
+    def get_stats(self, obj):
+        """Return the stats of the user and their leaderboard rank."""
+        try:
+            stats = obj.stats
+        except UserStatsModel.DoesNotExist:
+            stats = UserStatsModel(user=obj)
+        data = UserStatsSerializer(stats).data
+        data['rank'] = UserStatsModel.objects.rank(stats)
+        return data
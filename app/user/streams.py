@@ -0,0 +1,43 @@
+"""
+Streamed user directory, served through app/asgi.py.
+
+Under ASGI, GET /api/user/users/?stream=1 is served by users_stream,
+which reads the users chunk by chunk with user.views.users_chunk (see
+core.async_utils for the streamed endpoints).
+"""
+import functools
+
+from django.http import QueryDict
+from django.urls import reverse
+
+from rest_framework import status
+
+from core.async_utils import send_json, send_stream
+from user.views import users_chunk
+
+
+async def users_stream(scope, receive, send, params):
+    """ASGI app streaming the users as NDJSON."""
+    if scope['method'] != 'GET':
+        return await send_json(
+            send,
+            {'detail': f'Method "{scope["method"]}" not allowed.'},
+            status.HTTP_405_METHOD_NOT_ALLOWED,
+            [(b'allow', b'GET')],
+        )
+    await send_stream(
+        send,
+        functools.partial(users_chunk, params),
+        '',
+        b'application/x-ndjson',
+    )
+
+
+def route(scope):
+    """Return the app streaming the users of a request, or None."""
+    if scope['path'] != reverse('user:users'):
+        return None
+    params = QueryDict(scope['query_string'])
+    if not params.get('stream'):
+        return None
+    return functools.partial(users_stream, params=params)
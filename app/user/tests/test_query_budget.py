@@ -0,0 +1,77 @@
+"""
+Query budgets of the user API endpoints.
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import authentication
+from core.query_budget import QueryBudgetTestMixin
+
+
+class UserQueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """Test the user endpoints stay within their query budget."""
+
+    def setUp(self):
+        authentication.clear()
+        self.users = [
+            get_user_model().objects.create_user(
+                user_name=f'testuser{i}',
+                email=f'test{i}@example.com',
+                password='testpass123',
+            )
+            for i in range(10)
+        ]
+        token = Token.objects.create(user=self.users[0])
+        self.client = APIClient()
+        self.auth_client = APIClient()
+        self.auth_client.credentials(
+            HTTP_AUTHORIZATION=f'Token {token.key}',
+        )
+
+    def test_create_user(self):
+        with self.assertMaxQueries(4):
+            res = self.client.post(reverse('user:create'), {
+                'user_name': 'newuser123',
+                'email': 'new@example.com',
+                'password': 'testpass123',
+            })
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_create_token(self):
+        with self.assertMaxQueries(5):
+            res = self.client.post(reverse('user:token'), {
+                'user': 'test1@example.com',
+                'password': 'testpass123',
+            })
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_retrieve_me(self):
+        with self.assertMaxQueries(1):
+            res = self.auth_client.get(reverse('user:me'))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_update_me(self):
+        with self.assertMaxQueries(3):
+            res = self.auth_client.patch(reverse('user:me'),
+                                         {'nick_name': 'nick'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list_users(self):
+        with self.assertMaxQueries(1):
+            res = self.client.get(reverse('user:users'))
+        self.assertEqual(len(res.data['results']), len(self.users))
+
+    def test_leaderboard(self):
+        with self.assertMaxQueries(1):
+            res = self.client.get(reverse('user:leaderboard'))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_user_profile(self):
+        with self.assertMaxQueries(2):
+            res = self.client.get(reverse('user:users', args=['testuser3']))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -1,18 +1,29 @@
 """
 Tests for the user API.
 """
-from django.test import TestCase
+import json
+from unittest.mock import patch
+
+from asgiref.testing import ApplicationCommunicator
+
+from django.test import TestCase, TransactionTestCase
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, make_password
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from app.asgi import application
+from core.models import UserStatsModel
+from user.serializers import AuthTokenSerializer
+
 
 CREATE_USER_URL = reverse('user:create')
 TOKEN_URL = reverse('user:token')
 ME_URL = reverse('user:me')
 USERS_URL = reverse('user:users')
+LEADERBOARD_URL = reverse('user:leaderboard')
 
 
 def get_users_url(user_slug):
@@ -280,6 +291,56 @@ class PublicUserApiTests(TestCase):
         self.assertNotIn('token', res.data)
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_create_token_case_insensitive_email(self):
+        """Test generates token for an email in another case."""
+        create_user(
+            user_name='testuser123',
+            email='Test.User@Example.com',
+            password='pass123',
+        )
+        for login in ['test.user@example.com', 'TEST.USER@EXAMPLE.COM',
+                      'TestUser123']:
+            res = self.client.post(
+                TOKEN_URL, {'user': login, 'password': 'pass123'},
+            )
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertIn('token', res.data)
+
+    def test_create_token_inactive_user(self):
+        """Test inactive users get no token."""
+        create_user(
+            user_name='testuser123',
+            email='test@example.com',
+            password='pass123',
+            is_active=False,
+        )
+        res = self.client.post(
+            TOKEN_URL, {'user': 'testuser123', 'password': 'pass123'},
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_token_credentials_single_query(self):
+        """Test the credentials are checked with a single query and hash."""
+        create_user(
+            user_name='testuser123',
+            email='test@example.com',
+            password='pass123',
+        )
+        for login in ['test@example.com', 'testuser123', 'missing']:
+            serializer = AuthTokenSerializer(
+                data={'user': login, 'password': 'pass123'},
+            )
+            with patch(
+                'django.contrib.auth.base_user.check_password',
+                wraps=check_password,
+            ) as check, patch(
+                'django.contrib.auth.base_user.make_password',
+                wraps=make_password,
+            ) as make, self.assertNumQueries(1):
+                serializer.is_valid()
+            self.assertEqual(check.call_count + make.call_count, 1)
+            self.assertEqual(serializer.is_valid(), login != 'missing')
+
     def test_retrieve_user_unauthorized(self):
         "Test authoentication is required for users."
         res = self.client.get(ME_URL)
@@ -303,7 +364,63 @@ class PublicUserApiTests(TestCase):
 
         res = self.client.get(USERS_URL)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 2)
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertIsNone(res.data['next'])
+
+    def test_list_users_pages(self):
+        "Test list users page by page with a cursor, newest first."
+        users = [
+            create_user(user_name=f'player{i}', email=f'p{i}@example.com',
+                        password='pass123')
+            for i in range(5)
+        ]
+        names = []
+        cursor = None
+        while True:
+            params = {'limit': 2}
+            if cursor:
+                params['cursor'] = cursor
+            res = self.client.get(USERS_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(res.data['results']), 2)
+            names += [user['user_name'] for user in res.data['results']]
+            cursor = res.data['next']
+            if cursor is None:
+                break
+        self.assertEqual(names, [user.user_name for user in users[::-1]])
+
+        res = self.client.get(USERS_URL, {'cursor': 'bad'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_users_search(self):
+        "Test search users by the prefix of their user name."
+        for name in ['alice1', 'alicia2', 'bob123']:
+            create_user(user_name=name, email=f'{name}@example.com',
+                        password='pass123')
+        res = self.client.get(USERS_URL, {'search': 'ALI'})
+        self.assertEqual(
+            [user['user_name'] for user in res.data['results']],
+            ['alicia2', 'alice1'],
+        )
+
+    def test_list_users_stream(self):
+        "Test stream the users as lines of JSON."
+        for i in range(3):
+            create_user(user_name=f'player{i}', email=f'p{i}@example.com',
+                        password='pass123')
+        res = self.client.get(USERS_URL, {'stream': '1', 'search': 'player'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        users = [json.loads(line) for line in lines]
+        self.assertEqual(
+            [user['user_name'] for user in users],
+            ['player2', 'player1', 'player0'],
+        )
+        self.assertEqual(
+            users[0],
+            self.client.get(USERS_URL).data['results'][0],
+        )
 
     def test_user_public_profile_sucessful(self):
         "Test get user public profile sucessful."
@@ -318,6 +435,61 @@ class PublicUserApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data['user_name'], user.user_name)
 
+    def test_user_public_profile_stats(self):
+        "Test the public profile holds the stats and rank of the user."
+        users = [
+            create_user(user_name=f'player{i}', email=f'p{i}@example.com',
+                        password='pass123')
+            for i in range(3)
+        ]
+        UserStatsModel.objects.filter(user=users[0]).update(
+            games_played=4, games_won=2, win_moves=9,
+        )
+        UserStatsModel.objects.filter(user=users[1]).update(
+            games_played=3, games_won=3, win_moves=12,
+        )
+
+        res = self.client.get(get_users_url(users[0].user_name))
+        self.assertEqual(res.data['stats'], {
+            'games_played': 4,
+            'games_won': 2,
+            'average_moves_to_win': 4.5,
+            'rank': 2,
+        })
+        res = self.client.get(get_users_url(users[2].user_name))
+        self.assertEqual(res.data['stats'], {
+            'games_played': 0,
+            'games_won': 0,
+            'average_moves_to_win': None,
+            'rank': None,
+        })
+
+    def test_leaderboard(self):
+        "Test the leaderboard lists the winners, best first."
+        users = [
+            create_user(user_name=f'player{i}', email=f'p{i}@example.com',
+                        password='pass123')
+            for i in range(4)
+        ]
+        for user, won, moves in [(users[0], 1, 3), (users[1], 2, 10),
+                                 (users[2], 2, 8)]:
+            UserStatsModel.objects.filter(user=user).update(
+                games_played=won, games_won=won, win_moves=moves,
+            )
+
+        res = self.client.get(LEADERBOARD_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(entry['rank'], entry['user_name']) for entry in res.data],
+            [(1, 'player2'), (2, 'player1'), (3, 'player0')],
+        )
+        self.assertEqual(res.data[0]['average_moves_to_win'], 4.0)
+
+        res = self.client.get(LEADERBOARD_URL, {'limit': 1})
+        self.assertEqual(len(res.data), 1)
+        res = self.client.get(LEADERBOARD_URL, {'limit': 'top'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_user_public_profile_not_found(self):
         "Test get user public profile not found."
         user_signup_details = {
@@ -397,3 +569,48 @@ class PrivateUserApiTests(TestCase):
         self.user.refresh_from_db()
         self.assertNotEqual(res.data['email'], payload_update['email'])
         self.assertEqual(self.user.email, 'test@example.com')
+
+
+class AsyncUserStreamTests(TransactionTestCase):
+    """Test streaming the users through the ASGI app."""
+
+    def setUp(self):
+        for i in range(5):
+            create_user(user_name=f'player{i}', email=f'p{i}@example.com',
+                        password='pass123')
+
+    async def get(self, query_string):
+        """Send a request to the ASGI app, and return its messages."""
+        communicator = ApplicationCommunicator(application, {
+            'type': 'http',
+            'method': 'GET',
+            'path': USERS_URL,
+            'query_string': query_string,
+            'headers': [(b'host', b'testserver')],
+        })
+        await communicator.send_input({'type': 'http.request', 'body': b''})
+        messages = [await communicator.receive_output(5)]
+        while messages[-1].get('more_body', messages[-1]['type'] ==
+                               'http.response.start'):
+            messages.append(await communicator.receive_output(5))
+        return messages
+
+    @patch('user.views.STREAM_CHUNK_SIZE', 2)
+    async def test_list_users_stream(self):
+        "Test stream the users by chunks under ASGI."
+        start, *bodies = await self.get(b'stream=1&search=player')
+        self.assertEqual(start['status'], status.HTTP_200_OK)
+        self.assertIn((b'content-type', b'application/x-ndjson'),
+                      start['headers'])
+        self.assertEqual(len(bodies), 3)
+        lines = b''.join(body['body'] for body in bodies).splitlines()
+        self.assertEqual(
+            [json.loads(line)['user_name'] for line in lines],
+            [f'player{i}' for i in range(4, -1, -1)],
+        )
+
+    async def test_list_users_page(self):
+        "Test pages of users are still served by Django under ASGI."
+        start, body = await self.get(b'limit=2')
+        self.assertEqual(start['status'], status.HTTP_200_OK)
+        self.assertEqual(len(json.loads(body['body'])['results']), 2)
@@ -13,5 +13,6 @@ urlpatterns = [
     path('token/', views.CreateTokenView.as_view(), name='token'),
     path('me/', views.ManageUserView.as_view(), name='me'),
     path('users/', views.list_all_users, name='users'),
+    path('leaderboard/', views.get_leaderboard, name='leaderboard'),
     path('users/<slug:slug>/', views.user_profile_detail, name='users'),
 ]
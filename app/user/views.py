@@ -3,7 +3,6 @@ Views for the user API.
 """
 from rest_framework import (
     generics,
-    authentication,
     permissions,
     status,
 )
@@ -11,15 +10,26 @@ from rest_framework import (
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 from rest_framework.decorators import api_view
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
+from django.http import StreamingHttpResponse
+
+from core.authentication import CachedTokenAuthentication
+from core.models import UserStatsModel
+from core.pagination import (
+    InvalidPage,
+    keyset_page,
+    parse_limit,
+)
 
 from user.serializers import (
     UserSerializer,
     AuthTokenSerializer,
     ManageUserSerializer,
     ListUsersSerializer,
-    UserPublicProfileSerializer,
+    UserProfileDetailSerializer,
+    LeaderboardSerializer,
 )
 
 
@@ -37,7 +47,7 @@ class CreateTokenView(ObtainAuthToken):
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated user."""
     serializer_class = ManageUserSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
@@ -45,20 +55,110 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
         return self.request.user
 
 
+# rows fetched per round trip when streaming the users.
+STREAM_CHUNK_SIZE = 2000
+
+
+def filter_users(params):
+    """Return the users, filtered by the `search` prefix of user names."""
+    users = get_user_model().objects.only(*ListUsersSerializer.Meta.fields)
+    if params.get('search'):
+        # user names are stored lowercase.
+        users = users.filter(user_name__startswith=params['search'].lower())
+    return users
+
+
+def users_page_data(params):
+    """Return a page of the users, newest first, and the status.
+
+    The page is selected by the `cursor` and `limit` parameters.
+    """
+    try:
+        users, next_cursor = keyset_page(
+            filter_users(params),
+            ['created_on', 'id'],
+            cursor=params.get('cursor'),
+            limit=params.get('limit'),
+        )
+    except InvalidPage as error:
+        return {'detail': str(error)}, status.HTTP_400_BAD_REQUEST
+    data = {
+        'results': ListUsersSerializer(users, many=True).data,
+        'next': next_cursor,
+    }
+    return data, status.HTTP_200_OK
+
+
+def users_chunk(params, cursor):
+    """Return a chunk of the users, newest first, as lines of JSON.
+
+    Returns the lines and the cursor of the next chunk, which is None
+    after the last one. Each chunk is one index range scan, so memory
+    stays flat whatever the number of users.
+    """
+    users, next_cursor = keyset_page(
+        filter_users(params),
+        ['created_on', 'id'],
+        cursor=cursor,
+        limit=STREAM_CHUNK_SIZE,
+        max_limit=STREAM_CHUNK_SIZE,
+    )
+    serializer = ListUsersSerializer()
+    renderer = JSONRenderer()
+    lines = b''.join(
+        renderer.render(serializer.to_representation(user)) + b'\n'
+        for user in users
+    )
+    return lines, next_cursor
+
+
+def stream_users(params):
+    """Generate every user, newest first, as lines of JSON."""
+    cursor = ''
+    while cursor is not None:
+        lines, cursor = users_chunk(params, cursor)
+        yield lines
+
+
 @api_view(['GET'])
 def list_all_users(request):
-    users = get_user_model().objects.all().order_by('-created_on')
-    serializer = ListUsersSerializer(users, many=True)
-    return Response(serializer.data)
+    """Get a page of the users, or all of them as NDJSON with `stream`.
+
+    Users can be searched by the prefix of their user name.
+    """
+    if request.query_params.get('stream'):
+        return StreamingHttpResponse(
+            stream_users(request.query_params),
+            content_type='application/x-ndjson',
+        )
+    data, status_code = users_page_data(request.query_params)
+    return Response(data, status=status_code)
 
 
 @api_view(['GET'])
 def user_profile_detail(request, slug):
     try:
-        user = get_user_model().objects.get(
+        user = get_user_model().objects.select_related('stats').get(
             user_name=slug,
         )
-        serializer = UserPublicProfileSerializer(user)
+        serializer = UserProfileDetailSerializer(user)
         return Response(serializer.data)
     except get_user_model().DoesNotExist:
         return Response({}, status=status.HTTP_404_NOT_FOUND)
+
+
+@api_view(['GET'])
+def get_leaderboard(request):
+    "Get the best players, ranked by games won then average moves to win."
+    try:
+        limit = parse_limit(request.query_params.get('limit'))
+    except InvalidPage as error:
+        return Response({'detail': str(error)},
+                        status=status.HTTP_400_BAD_REQUEST)
+    entries = list(
+        UserStatsModel.objects.leaderboard().select_related('user')[:limit]
+    )
+    for rank, entry in enumerate(entries, start=1):
+        entry.rank = rank
+    serializer = LeaderboardSerializer(entries, many=True)
+    return Response(serializer.data)